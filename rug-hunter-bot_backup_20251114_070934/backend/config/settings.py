@@ -14,6 +14,11 @@ class Settings(BaseSettings):
     ETH_RPC_URL: str = "https://eth.llamarpc.com"
     BSC_RPC_URL: str = "https://bsc-dataseed1.binance.org"
     SOL_RPC_URL: str = "https://api.mainnet-beta.solana.com"
+    SOL_WS_URL: str = ""  # vide: dérivé de SOL_RPC_URL (wss://)
+    
+    # RPC de simulation achat/vente (eth_simulateV1), ex: fork anvil local
+    ETH_SIMULATION_RPC_URL: Optional[str] = None
+    BSC_SIMULATION_RPC_URL: Optional[str] = None
     
     # API Keys
     ETHERSCAN_API_KEY: Optional[str] = None
@@ -45,10 +50,21 @@ class Settings(BaseSettings):
     # Detection
     ENABLE_ETH_DETECTION: bool = True
     ENABLE_BSC_DETECTION: bool = True
-    ENABLE_SOL_DETECTION: bool = True
+    ENABLE_SOL_DETECTION: bool = False
     MIN_LIQUIDITY_USD: int = 5000
     MAX_TOKEN_AGE_MINUTES: int = 30
     SCAN_BLOCK_INTERVAL: int = 3
+    DEPLOYER_INDEX_PATH: str = "data/deployer_index.db"
+    ML_MODELS_PATH: str = "backend/ml/models"
+    DATABASE_URL: str = "sqlite:///./rug_hunter.db"
+    ML_FALLBACK: str = "neutral"  # error | neutral | synthetic
+    ML_SHADOW_SECONDS: int = 300
+    ML_MAX_DECISION_FLIP_RATE: float = 0.3
+    ML_SCORING_WORKERS: int = 2  # 0 = scoring dans la boucle d'événements
+    ML_MAX_IN_FLIGHT: int = 1000
+    MAX_CONCURRENT_ANALYSES: int = 16  # détections analysées en parallèle (les scorings se regroupent en lots)
+    SKIP_UNUSED_COLLECTORS: bool = True  # collecteurs dont aucun champ n'est lu par le modèle actif
+    FULL_COLLECTION_SAMPLE_RATE: float = 0.1  # détections collectées en entier malgré le skip (features abandonnées)
     MIN_HOLDERS: int = 50
     MAX_TOP_HOLDER_PERCENT: float = 20.0
     MAX_TOP10_HOLDERS_PERCENT: float = 50.0
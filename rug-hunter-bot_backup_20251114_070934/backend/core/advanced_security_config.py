@@ -3,11 +3,13 @@
 Gestion complète de la sécurité et de la détection des risques
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass
-from enum import Enum
+from enum import Enum, IntFlag
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -121,9 +123,161 @@ class SecurityConfig:
     sol_min_account_age_seconds: int = 300  # 5 minutes
 
 
+class Reason(IntFlag):
+    """Codes de raison compacts (un bit par check déclenché)"""
+    BUY_TAX_BLOCK = 1 << 0
+    BUY_TAX_WARN = 1 << 1
+    SELL_TAX_BLOCK = 1 << 2
+    SELL_TAX_WARN = 1 << 3
+    CANNOT_SELL = 1 << 4
+    FREEZE_AUTHORITY = 1 << 5
+    LIQUIDITY_BLOCK = 1 << 6
+    LIQUIDITY_WARN = 1 << 7
+    LIQUIDITY_RATIO = 1 << 8
+    FEW_HOLDERS = 1 << 9
+    TOP10_CONCENTRATION = 1 << 10
+    NOT_VERIFIED = 1 << 11
+    NOT_RENOUNCED = 1 << 12
+    NO_AUDIT = 1 << 13
+    LOW_VOLUME = 1 << 14
+    HIGH_VOLATILITY = 1 << 15
+    TOO_RECENT = 1 << 16
+    TOO_OLD = 1 << 17
+
+
+BLOCKER_REASONS = (Reason.BUY_TAX_BLOCK | Reason.SELL_TAX_BLOCK | Reason.CANNOT_SELL
+                   | Reason.LIQUIDITY_BLOCK | Reason.NOT_VERIFIED)
+
+# Messages identiques au check unitaire, formatés uniquement à la demande
+REASON_MESSAGES = {
+    Reason.BUY_TAX_BLOCK: lambda f, i: f"Buy tax trop élevée: {f['buy_tax'][i]:g}%",
+    Reason.BUY_TAX_WARN: lambda f, i: f"Buy tax élevée: {f['buy_tax'][i]:g}%",
+    Reason.SELL_TAX_BLOCK: lambda f, i: f"Sell tax trop élevée: {f['sell_tax'][i]:g}%",
+    Reason.SELL_TAX_WARN: lambda f, i: f"Sell tax élevée: {f['sell_tax'][i]:g}%",
+    Reason.CANNOT_SELL: lambda f, i: "Impossible de vendre - HONEYPOT confirmé!",
+    Reason.FREEZE_AUTHORITY: lambda f, i: "Freeze authority présente",
+    Reason.LIQUIDITY_BLOCK: lambda f, i: f"Liquidité trop faible: ${f['liquidity_usd'][i]:,.0f}",
+    Reason.LIQUIDITY_WARN: lambda f, i: f"Liquidité faible: ${f['liquidity_usd'][i]:,.0f}",
+    Reason.LIQUIDITY_RATIO: lambda f, i: f"Ratio liquidité/MC faible: {f['liquidity_usd'][i] / f['market_cap_usd'][i]:.2f}",
+    Reason.FEW_HOLDERS: lambda f, i: f"Peu de holders: {f['holders'][i]:.0f}",
+    Reason.TOP10_CONCENTRATION: lambda f, i: f"Top 10 holders: {f['top10_holders_percent'][i]:.1f}%",
+    Reason.NOT_VERIFIED: lambda f, i: "Contrat non vérifié",
+    Reason.NOT_RENOUNCED: lambda f, i: "Ownership non renoncé",
+    Reason.NO_AUDIT: lambda f, i: "Pas d'audit",
+    Reason.LOW_VOLUME: lambda f, i: f"Volume faible: ${f['volume_24h_usd'][i]:,.0f}",
+    Reason.HIGH_VOLATILITY: lambda f, i: f"Volatilité élevée: {abs(f['price_change_1h'][i]):.1f}%",
+    Reason.TOO_RECENT: lambda f, i: f"Token très récent: {f['age_minutes'][i]:g}min",
+    Reason.TOO_OLD: lambda f, i: f"Token trop vieux: {f['age_minutes'][i]:g}min",
+}
+
+# Colonnes du frame et valeur par défaut (mêmes défauts que check_token_security).
+# NaN = inconnu (holders / top10 à None): pas de pénalité. Colonnes booléennes:
+# None vaut bool(None) = False, comme le `not value` du check unitaire.
+SECURITY_COLUMNS = {
+    "buy_tax": 0.0,
+    "sell_tax": 0.0,
+    "can_sell": True,
+    "is_sol": False,
+    "freeze_authority": False,
+    "liquidity_usd": 0.0,
+    "market_cap_usd": 0.0,
+    "holders": 0.0,
+    "top10_holders_percent": 100.0,
+    "contract_verified": False,
+    "ownership_renounced": False,
+    "audited": False,
+    "volume_24h_usd": 0.0,
+    "price_change_1h": 0.0,
+    "age_minutes": 0.0,
+}
+
+CATEGORY_WEIGHTS = {
+    "honeypot": 0.3,
+    "liquidity": 0.2,
+    "holders": 0.15,
+    "contract": 0.15,
+    "trading": 0.1,
+    "age": 0.1,
+}
+
+RISK_LEVEL_ORDER = (RiskLevel.VERY_LOW, RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.CRITICAL)
+
+
+def _bool_column(values) -> np.ndarray:
+    """Booléens au sens du check unitaire: None et NaN (valeur absente) sont faux"""
+    values = np.asarray(values)
+    if values.dtype == np.bool_:
+        return values
+    if values.dtype.kind == "f":
+        return np.nan_to_num(values, nan=0.0).astype(np.bool_)
+    return np.fromiter((bool(v) and v == v for v in values), dtype=np.bool_, count=len(values))
+
+
+def build_security_frame(tokens: Sequence[Dict]) -> Dict[str, np.ndarray]:
+    """Convertit des token_data (format de check_token_security) en colonnes numpy"""
+    columns = {name: [] for name in SECURITY_COLUMNS}
+    for token in tokens:
+        honeypot = token.get("honeypot_check", {})
+        row = {
+            "buy_tax": honeypot.get("buy_tax", 0),
+            "sell_tax": honeypot.get("sell_tax", 0),
+            "can_sell": honeypot.get("can_sell", True),
+            "is_sol": token.get("chain") == "SOL",
+            "freeze_authority": bool(token.get("freeze_authority")),
+        }
+        for name, default in SECURITY_COLUMNS.items():
+            value = row[name] if name in row else token.get(name, default)
+            if isinstance(default, bool):
+                columns[name].append(bool(value))
+            else:
+                columns[name].append(np.nan if value is None else value)
+    return {
+        name: np.asarray(values, dtype=np.bool_ if isinstance(SECURITY_COLUMNS[name], bool) else np.float64)
+        for name, values in columns.items()
+    }
+
+
+@dataclass
+class SecurityBatchResult:
+    """Résultat vectorisé pour un preset: une ligne par token"""
+    preset: str
+    risk_score: np.ndarray
+    reasons: np.ndarray
+    category_scores: Dict[str, np.ndarray]
+    frame: Mapping[str, np.ndarray]
+
+    @property
+    def risk_level_codes(self) -> np.ndarray:
+        """Index dans RISK_LEVEL_ORDER (0 = VERY_LOW ... 4 = CRITICAL)"""
+        return np.searchsorted(np.array([20, 40, 60, 80]), self.risk_score, side="right").astype(np.int8)
+
+    @property
+    def is_safe(self) -> np.ndarray:
+        return self.risk_score < 60
+
+    @property
+    def has_blockers(self) -> np.ndarray:
+        return (self.reasons & int(BLOCKER_REASONS)) != 0
+
+    def risk_level(self, i: int) -> RiskLevel:
+        return RISK_LEVEL_ORDER[int(self.risk_level_codes[i])]
+
+    def messages(self, i: int) -> Dict[str, List[str]]:
+        """Messages lisibles (blockers / warnings) du token i, construits à la demande"""
+        blockers, warnings = [], []
+        code = int(self.reasons[i])
+        for reason, render in REASON_MESSAGES.items():
+            if code & reason:
+                (blockers if reason & BLOCKER_REASONS else warnings).append(render(self.frame, i))
+        return {"blockers": blockers, "warnings": warnings}
+
+
 class AdvancedSecurityChecker:
     """
-    Vérificateur de sécurité avancé avec scores détaillés
+    Vérificateur de sécurité avancé avec scores détaillés.
+    Reste en code plutôt qu'en règles (config/rules.json): les seuils viennent
+    des presets SecurityConfig, et check_batch évalue des colonnes numpy entières
+    (bitmask Reason) là où le moteur de règles évalue un token à la fois.
     """
     
     def __init__(self, config: SecurityConfig):
@@ -199,6 +353,90 @@ class AdvancedSecurityChecker:
         
         return result
     
+    def check_batch(self, frame: Union[Mapping[str, np.ndarray], Sequence[Dict]],
+                    presets: Optional[Sequence[str]] = None) -> Dict[str, SecurityBatchResult]:
+        """
+        Version vectorisée de check_token_security pour N tokens et P configurations.
+        `frame` est un mapping colonne -> tableau (dict de numpy, DataFrame pandas)
+        ou une liste de token_data. Sans `presets`, seule la config courante est évaluée.
+        Les seuils sont empilés en (P, 1) et tous les checks calculés en (P, N) d'un coup.
+        """
+        if not isinstance(frame, Mapping) and not hasattr(frame, "columns"):
+            frame = build_security_frame(frame)
+        n = len(frame["liquidity_usd"])
+        cols = {
+            name: (_bool_column(frame[name]) if isinstance(default, bool) else np.asarray(frame[name], dtype=np.float64))
+            if name in frame else np.full(n, default)
+            for name, default in SECURITY_COLUMNS.items()
+        }
+
+        configs = {name: SECURITY_PRESETS[name] for name in presets} if presets else {"current": self.config}
+
+        def param(attr: str) -> np.ndarray:
+            return np.array([[getattr(c, attr)] for c in configs.values()], dtype=np.float64)
+
+        shape = (len(configs), n)
+        scores = {name: np.zeros(shape, dtype=np.float64) for name in CATEGORY_WEIGHTS}
+        reasons = np.zeros(shape, dtype=np.uint32)
+
+        def flag(mask: np.ndarray, category: str, points: float, reason: Reason):
+            mask = np.broadcast_to(mask, shape)
+            scores[category] += mask * points
+            reasons[mask] |= np.uint32(reason)
+
+        # Honeypot
+        for tax, limit, block, warn in (("buy_tax", "max_buy_tax", Reason.BUY_TAX_BLOCK, Reason.BUY_TAX_WARN),
+                                        ("sell_tax", "max_sell_tax", Reason.SELL_TAX_BLOCK, Reason.SELL_TAX_WARN)):
+            over = cols[tax] > param(limit)
+            flag(over, "honeypot", 30, block)
+            flag(~over & (cols[tax] > param(limit) * 0.7), "honeypot", 15, warn)
+        flag(~cols["can_sell"], "honeypot", 50, Reason.CANNOT_SELL)
+        flag(cols["is_sol"] & cols["freeze_authority"] & param("sol_require_no_freeze_authority").astype(bool),
+             "honeypot", 25, Reason.FREEZE_AUTHORITY)
+
+        # Liquidité
+        liquidity, market_cap = cols["liquidity_usd"], cols["market_cap_usd"]
+        too_low = liquidity < param("min_liquidity_usd")
+        flag(too_low, "liquidity", 40, Reason.LIQUIDITY_BLOCK)
+        flag(~too_low & (liquidity < param("min_liquidity_usd") * 2), "liquidity", 20, Reason.LIQUIDITY_WARN)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(market_cap > 0, liquidity / market_cap, np.inf)
+        flag(ratio < param("min_liquidity_ratio"), "liquidity", 15, Reason.LIQUIDITY_RATIO)
+
+        # Holders (NaN: comparaisons fausses, donc pas de pénalité)
+        flag(cols["holders"] < param("min_holders"), "holders", 25, Reason.FEW_HOLDERS)
+        flag(cols["top10_holders_percent"] > param("max_top10_holders_percent"), "holders", 20,
+             Reason.TOP10_CONCENTRATION)
+
+        # Contrat
+        flag(param("require_verified_contract").astype(bool) & ~cols["contract_verified"], "contract", 30,
+             Reason.NOT_VERIFIED)
+        flag(param("require_ownership_renounced").astype(bool) & ~cols["ownership_renounced"], "contract", 15,
+             Reason.NOT_RENOUNCED)
+        flag(param("require_audit").astype(bool) & ~cols["audited"], "contract", 20, Reason.NO_AUDIT)
+
+        # Trading
+        flag(cols["volume_24h_usd"] < param("min_volume_24h_usd"), "trading", 15, Reason.LOW_VOLUME)
+        flag(np.abs(cols["price_change_1h"]) > param("max_price_volatility_1h"), "trading", 20,
+             Reason.HIGH_VOLATILITY)
+
+        # Âge
+        too_recent = cols["age_minutes"] < param("min_token_age_minutes")
+        flag(too_recent, "age", 25, Reason.TOO_RECENT)
+        flag(~too_recent & (cols["age_minutes"] > param("max_token_age_minutes")), "age", 10, Reason.TOO_OLD)
+
+        risk = sum(scores[name] * weight for name, weight in CATEGORY_WEIGHTS.items())
+        return {
+            name: SecurityBatchResult(
+                preset=name,
+                risk_score=risk[p],
+                reasons=reasons[p],
+                category_scores={category: values[p] for category, values in scores.items()},
+                frame=cols,
+            )
+            for p, name in enumerate(configs)
+        }
+    
     def _check_honeypot(self, token_data: Dict, result: Dict) -> float:
         """Vérifie les indicateurs de honeypot"""
         score = 0
@@ -273,15 +511,16 @@ class AdvancedSecurityChecker:
     def _check_holders(self, token_data: Dict, result: Dict) -> float:
         """Vérifie la distribution des holders"""
         score = 0
+        # None = pas encore connu (calcul asynchrone en cours): pas de pénalité
         holders = token_data.get("holders", 0)
         
-        if holders < self.config.min_holders:
+        if holders is not None and holders < self.config.min_holders:
             score += 25
             result["warnings"].append(f"Peu de holders: {holders}")
         
         # Top holders concentration
         top10_percent = token_data.get("top10_holders_percent", 100)
-        if top10_percent > self.config.max_top10_holders_percent:
+        if top10_percent is not None and top10_percent > self.config.max_top10_holders_percent:
             score += 20
             result["warnings"].append(f"Top 10 holders: {top10_percent:.1f}%")
         
@@ -0,0 +1,264 @@
+"""
+🔻 Analysis Funnel - rejet précoce, étapes ordonnées par coût
+Une détection traverse les étapes de la moins chère à la plus chère; la
+première qui la rejette arrête tout. Les étapes coûteuses (simulation,
+scan des holders, analyse complète) ne voient que les survivants.
+"""
+
+import logging
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.deployer_index import DeployerIndex
+from core.rule_engine import RuleEngine, get_rule_engine
+from core.swap_simulator import SwapSimulator
+
+logger = logging.getLogger(__name__)
+
+# Un bytecode marqué est réexaminé après ce délai (le même template peut servir
+# à des lancements honnêtes une fois ses réglages changés)
+BAD_BYTECODE_TTL_DAYS = 7.0
+# Taxe de vente à partir de laquelle la vente est une confiscation
+CONFISCATORY_SELL_TAX = 90.0
+
+
+class FunnelContext:
+    """État d'une détection dans le funnel; les étapes y déposent leurs résultats"""
+
+    def __init__(self, detection: Dict):
+        self.detection = detection
+        self.token = detection["token_address"]
+        self.chain = detection["chain"]
+        self.results: Dict[str, object] = {}
+
+
+class FunnelStage:
+    """`cost` ordonne les étapes; `check` retourne une raison de rejet ou None"""
+
+    name = "base"
+    cost = 0
+
+    async def check(self, ctx: FunnelContext) -> Optional[str]:
+        raise NotImplementedError
+
+
+class BytecodeHashStage(FunnelStage):
+    """
+    Bytecode identique à un honeypot déjà confirmé (clones de scams).
+    Une ligne du fichier: "hash<TAB>timestamp du marquage"; les entrées expirent
+    après `ttl_days` (les lignes sans timestamp repartent pour un délai complet).
+    """
+
+    name = "bytecode_hash"
+    cost = 0
+
+    def __init__(self, path: str = "data/bad_bytecode_hashes.txt", ttl_days: float = BAD_BYTECODE_TTL_DAYS):
+        self.path = Path(path)
+        self.ttl = ttl_days * 86400
+        # hash -> date du marquage
+        self.bad_hashes: Dict[str, float] = {}
+        if self.path.exists():
+            now = time.time()
+            for line in self.path.read_text().splitlines():
+                parts = line.split()
+                if parts:
+                    self.bad_hashes[parts[0]] = float(parts[1]) if len(parts) > 1 else now
+            self._prune(now)
+            self._rewrite()
+
+    def _prune(self, now: float) -> bool:
+        expired = [h for h, marked_at in self.bad_hashes.items() if now - marked_at >= self.ttl]
+        for code_hash in expired:
+            del self.bad_hashes[code_hash]
+        return bool(expired)
+
+    def _rewrite(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text("".join(f"{h}\t{t:.0f}\n" for h, t in self.bad_hashes.items()))
+
+    def mark_bad(self, code_hash: Optional[str]):
+        if not code_hash or code_hash in self.bad_hashes:
+            return
+        now = time.time()
+        self.bad_hashes[code_hash] = now
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(f"{code_hash}\t{now:.0f}\n")
+
+    def unmark(self, code_hash: str):
+        """Revue manuelle: un faux positif est retiré tout de suite"""
+        if self.bad_hashes.pop(code_hash, None) is not None:
+            self._rewrite()
+
+    async def check(self, ctx: FunnelContext) -> Optional[str]:
+        code_hash = ctx.detection.get("bytecode_hash")
+        marked_at = self.bad_hashes.get(code_hash)
+        if marked_at is None:
+            return None
+        if time.time() - marked_at >= self.ttl:
+            del self.bad_hashes[code_hash]
+            self._rewrite()
+            return None
+        return "Known honeypot bytecode"
+
+
+class DeployerStage(FunnelStage):
+    """Déployeur (ou financeur) ayant déjà plusieurs rugs à son actif"""
+
+    name = "deployer"
+    cost = 1
+
+    def __init__(self, deployer_index: DeployerIndex):
+        self.index = deployer_index
+
+    async def check(self, ctx: FunnelContext) -> Optional[str]:
+        deployer = ctx.detection.get("deployer") or self.index.deployer_of(ctx.chain, ctx.token)
+        if self.index.is_known_scammer(ctx.chain, deployer):
+            return f"Known rugger deployer {deployer}"
+        return None
+
+
+class RulesStage(FunnelStage):
+    """Règles statiques sur les champs de la détection (config/rules.json)"""
+
+    name = "static_rules"
+    cost = 2
+
+    def __init__(self, ruleset: str = "funnel_static", rule_engine: Optional[RuleEngine] = None):
+        self.ruleset = ruleset
+        self.rules = rule_engine or get_rule_engine()
+
+    async def check(self, ctx: FunnelContext) -> Optional[str]:
+        result = self.rules.evaluate(self.ruleset, ctx.detection)
+        return None if result["passed"] else result["message"]
+
+
+class SimulationStage(FunnelStage):
+    """Achat/vente simulés (un aller-retour RPC); le résultat reste en cache pour l'analyse"""
+
+    name = "simulation"
+    cost = 10
+
+    def __init__(self, simulator: SwapSimulator, bytecode_stage: Optional[BytecodeHashStage] = None,
+                 max_buy_tax: float = 10, max_sell_tax: float = 15):
+        self.simulator = simulator
+        self.bytecode_stage = bytecode_stage
+        self.max_buy_tax = max_buy_tax
+        self.max_sell_tax = max_sell_tax
+
+    async def check(self, ctx: FunnelContext) -> Optional[str]:
+        result = await self.simulator.simulate(ctx.token, ctx.chain, ctx.detection.get("dex"))
+        if not result:
+            # Simulation indisponible: l'analyse complète tranchera
+            return None
+        ctx.results["simulation"] = result
+
+        if result.get("is_honeypot") or not result.get("can_sell"):
+            # Seul un achat réussi suivi d'une vente bloquée (ou confisquée) signe
+            # le bytecode: un achat qui revert est normal avant l'ouverture du trading
+            confiscated = not result.get("can_sell") or result.get("sell_tax", 0) >= CONFISCATORY_SELL_TAX
+            if self.bytecode_stage and result.get("can_buy") and confiscated:
+                self.bytecode_stage.mark_bad(result.get("code_hash"))
+            return f"Honeypot: {result.get('reason', 'sell failed')}"
+        if result.get("buy_tax", 0) > self.max_buy_tax:
+            return f"Buy tax {result['buy_tax']:.1f}% > {self.max_buy_tax}%"
+        if result.get("sell_tax", 0) > self.max_sell_tax:
+            return f"Sell tax {result['sell_tax']:.1f}% > {self.max_sell_tax}%"
+        return None
+
+
+class FullAnalysisStage(FunnelStage):
+    """Pipeline complet d'indicateurs (holders, swaps, deployer, LP) + ML"""
+
+    name = "full_analysis"
+    cost = 100
+
+    def __init__(self, analyzer, max_rug_risk: Optional[float] = None):
+        self.analyzer = analyzer
+        # None: l'analyse ne rejette pas, les recommandations décident
+        self.max_rug_risk = max_rug_risk
+
+    async def check(self, ctx: FunnelContext) -> Optional[str]:
+        analysis = await self.analyzer.analyze(ctx.token, ctx.chain, ctx.detection.get("pair_address"),
+                                               ctx.detection)
+        ctx.results["analysis"] = analysis
+        if self.max_rug_risk is not None and analysis.get("rug_risk_score", 0) >= self.max_rug_risk:
+            return f"Rug risk {analysis['rug_risk_score']:.0f} >= {self.max_rug_risk}"
+        return None
+
+
+class AnalysisFunnel:
+    def __init__(self, stages: List[FunnelStage]):
+        self.stages = sorted(stages, key=lambda s: s.cost)
+        self.stats: Dict[str, Dict] = {
+            s.name: {"entered": 0, "passed": 0, "rejected": 0, "errors": 0, "total_ms": 0.0, "reasons": Counter()}
+            for s in self.stages
+        }
+
+    async def run(self, detection: Dict) -> Dict:
+        """
+        {"passed", "rejected_by", "reason", "stages": [...], "results": {...}}.
+        Une étape en erreur laisse passer (l'infrastructure ne doit pas rejeter un token).
+        """
+        ctx = FunnelContext(detection)
+        trace = []
+
+        for stage in self.stages:
+            stats = self.stats[stage.name]
+            stats["entered"] += 1
+            start = time.perf_counter()
+            try:
+                reason = await stage.check(ctx)
+                status = "rejected" if reason else "passed"
+            except Exception as e:
+                reason, status = None, "error"
+                stats["errors"] += 1
+                logger.debug(f"Funnel stage {stage.name} failed for {ctx.token}: {e}")
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            stats["total_ms"] += elapsed_ms
+            trace.append({"stage": stage.name, "status": status, "ms": round(elapsed_ms, 1)})
+
+            if reason:
+                stats["rejected"] += 1
+                stats["reasons"][reason.split(":")[0]] += 1
+                return {"passed": False, "rejected_by": stage.name, "reason": reason,
+                        "stages": trace, "results": ctx.results}
+            stats["passed"] += 1
+
+        return {"passed": True, "rejected_by": None, "reason": None, "stages": trace, "results": ctx.results}
+
+    def get_stats(self) -> Dict:
+        return {
+            name: {
+                **{k: v for k, v in s.items() if k != "reasons"},
+                "avg_ms": round(s["total_ms"] / s["entered"], 2) if s["entered"] else 0,
+                "top_reasons": dict(s["reasons"].most_common(5)),
+            }
+            for name, s in self.stats.items()
+        }
+
+
+def build_default_funnel(config: Dict, analyzer, simulator: SwapSimulator,
+                         deployer_index: Optional[DeployerIndex] = None) -> AnalysisFunnel:
+    """
+    Étapes par défaut. config["FUNNEL_STAGES"] restreint la liste (noms) et
+    config["FUNNEL_COSTS"] permet de réordonner sans toucher au code.
+    """
+    bytecode_stage = BytecodeHashStage(config.get("BAD_BYTECODE_PATH", "data/bad_bytecode_hashes.txt"),
+                                       ttl_days=config.get("BAD_BYTECODE_TTL_DAYS", BAD_BYTECODE_TTL_DAYS))
+    stages: List[FunnelStage] = [bytecode_stage, RulesStage()]
+    if deployer_index:
+        stages.append(DeployerStage(deployer_index))
+    stages.append(SimulationStage(simulator, bytecode_stage,
+                                  max_buy_tax=config.get("MAX_BUY_TAX", 10),
+                                  max_sell_tax=config.get("MAX_SELL_TAX", 15)))
+    stages.append(FullAnalysisStage(analyzer))
+
+    enabled = config.get("FUNNEL_STAGES")
+    if enabled:
+        stages = [s for s in stages if s.name in enabled]
+    for stage in stages:
+        stage.cost = config.get("FUNNEL_COSTS", {}).get(stage.name, stage.cost)
+    return AnalysisFunnel(stages)
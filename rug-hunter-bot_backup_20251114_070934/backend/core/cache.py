@@ -0,0 +1,97 @@
+"""Bounded LRU cache with per-entry TTL"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache LRU borné en taille, avec expiration par entrée.
+    ttl=None signifie "pas d'expiration" (LRU pur).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Lecture sans effet sur l'ordre LRU ni sur les statistiques"""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = _MISSING):
+        if ttl is _MISSING:
+            ttl = self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        """Temps restant avant expiration (None si absent ou sans TTL)"""
+        entry = self._data.get(key)
+        if entry is None or entry[1] is None:
+            return None
+        return entry[1] - time.monotonic()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        self._data.clear()
+
+    def keys(self):
+        return list(self._data.keys())
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and (entry[1] is None or time.monotonic() < entry[1])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (self.hits / lookups * 100) if lookups else 0.0,
+        }
@@ -0,0 +1,447 @@
+"""
+🗂️ Deployer Index - réputation locale des déployeurs
+deployer -> tokens lancés -> issue (rug / vivant, liquidité max).
+Persisté en SQLite, servi depuis la mémoire: une lecture est un accès dict.
+
+Le "deployer" est l'émetteur de la transaction qui crée la paire (en pratique
+le wallet qui lance le token et ajoute la liquidité).
+"""
+
+import asyncio
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from core.detector import DEX_FACTORIES, NATIVE_PRICES, WRAPPED_NATIVE
+from core.evm_abi import SELECTORS
+from core.http_client import HTTPClient, get_http_client
+
+logger = logging.getLogger(__name__)
+
+PAIR_CREATED_TOPIC = "0x0d3648bd0f6ba80134a33ba9275ac585d9d315f0ad8355cddefde31afa28d0e9"
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+
+# Liquidité tombée sous 10% de son maximum: token considéré comme rug
+RUG_LIQUIDITY_RATIO = 0.10
+# Déployeur bloqué à partir de N rugs, ou N rugs dans l'entourage du même financeur
+SCAMMER_MIN_RUGS = 2
+# Au-delà de N déployeurs financés, le financeur est un hub (hot wallet d'exchange,
+# bridge): ses wallets n'ont rien en commun, sauf s'il a lui-même déployé des tokens
+MAX_FUNDER_FANOUT = 5
+
+BACKFILL_CHUNK_BLOCKS = 2_000
+RPC_BATCH_SIZE = 100
+REFRESH_INTERVAL_SECONDS = 600
+# Seuls les tokens récents sont relus (un rug se joue dans les premiers jours);
+# les plus anciens gardent leur dernière issue connue
+REFRESH_WINDOW_HOURS = 72
+REFRESH_PAGE_SIZE = 500
+BLOCK_TIMES = {"ETH": 12, "BSC": 3}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    chain TEXT NOT NULL,
+    token TEXT NOT NULL,
+    pair TEXT,
+    dex TEXT,
+    deployer TEXT NOT NULL,
+    block INTEGER,
+    created_at REAL,
+    max_liquidity_usd REAL DEFAULT 0,
+    last_liquidity_usd REAL DEFAULT 0,
+    rugged INTEGER DEFAULT 0,
+    updated_at REAL,
+    PRIMARY KEY (chain, token)
+);
+CREATE INDEX IF NOT EXISTS idx_tokens_deployer ON tokens (chain, deployer);
+CREATE TABLE IF NOT EXISTS funders (
+    chain TEXT NOT NULL,
+    deployer TEXT NOT NULL,
+    funder TEXT NOT NULL,
+    PRIMARY KEY (chain, deployer)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+UPDATE_LIQUIDITY_SQL = (
+    "UPDATE tokens SET max_liquidity_usd = ?, last_liquidity_usd = ?, rugged = ?, updated_at = ? "
+    "WHERE chain = ? AND token = ?"
+)
+
+
+def _hex(value) -> str:
+    """Normalise HexBytes (web3) et chaînes JSON-RPC en hex '0x...' minuscule"""
+    if isinstance(value, str):
+        return value.lower()
+    return "0x" + bytes(value).hex()
+
+
+class DeployerIndex:
+    """
+    Index en mémoire (agrégats par déployeur et par financeur) adossé à SQLite.
+    Construit une fois par `backfill` sur les logs PairCreated historiques,
+    puis tenu à jour par le détecteur (`record_receipt`) et `refresh_outcomes`.
+    """
+
+    def __init__(self, path: str = "data/deployer_index.db", http_client: Optional[HTTPClient] = None,
+                 min_rugs: int = SCAMMER_MIN_RUGS, max_funder_fanout: int = MAX_FUNDER_FANOUT,
+                 refresh_window_hours: float = REFRESH_WINDOW_HOURS):
+        self.path = path
+        self.refresh_window = refresh_window_hours * 3600
+        self.http = http_client or get_http_client()
+        self.min_rugs = min_rugs
+        self.max_funder_fanout = max_funder_fanout
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        # Connexion dédiée aux écritures du rafraîchissement (thread, hors boucle)
+        self._writer: Optional[sqlite3.Connection] = None
+
+        # (chaîne, token) -> ligne; (chaîne, deployer) -> agrégats
+        self.tokens: Dict[Tuple[str, str], Dict] = {}
+        self.deployers: Dict[Tuple[str, str], Dict] = {}
+        self.funders: Dict[Tuple[str, str], str] = {}
+        self.funded: Dict[Tuple[str, str], Set[str]] = {}
+        self.running = False
+        self.stats = {"lookups": 0, "blocked": 0, "recorded": 0, "refreshed": 0, "refresh_errors": 0}
+
+        self._load()
+
+    def _load(self):
+        for row in self.db.execute("SELECT * FROM tokens"):
+            self._index_token(dict(row))
+        for row in self.db.execute("SELECT chain, deployer, funder FROM funders"):
+            self._index_funder(row["chain"], row["deployer"], row["funder"])
+        logger.info(f"🗂️ Deployer index loaded: {len(self.tokens)} tokens, {len(self.deployers)} deployers")
+
+    def _index_token(self, row: Dict):
+        key = (row["chain"], row["token"])
+        previous = self.tokens.get(key)
+        agg = self.deployers.setdefault((row["chain"], row["deployer"]), {
+            "tokens": set(), "rugged": 0, "max_liquidity_usd": 0.0, "first_block": None,
+        })
+        if previous and previous["deployer"] == row["deployer"]:
+            agg["rugged"] -= previous["rugged"]
+        agg["tokens"].add(row["token"])
+        agg["rugged"] += row["rugged"]
+        agg["max_liquidity_usd"] = max(agg["max_liquidity_usd"], row["max_liquidity_usd"] or 0.0)
+        if row.get("block") and (agg["first_block"] is None or row["block"] < agg["first_block"]):
+            agg["first_block"] = row["block"]
+        self.tokens[key] = row
+
+    def _index_funder(self, chain: str, deployer: str, funder: str):
+        self.funders[(chain, deployer)] = funder
+        self.funded.setdefault((chain, funder), set()).add(deployer)
+
+    # ------------------------------------------------------------------
+    # Lectures (mémoire uniquement)
+    # ------------------------------------------------------------------
+
+    def deployer_of(self, chain: str, token_address: str) -> Optional[str]:
+        row = self.tokens.get((chain, token_address.lower()))
+        return row["deployer"] if row else None
+
+    def reputation(self, chain: str, deployer: str, exclude_token: Optional[str] = None) -> Dict:
+        """Historique du déployeur (et des wallets financés par le même financeur)"""
+        self.stats["lookups"] += 1
+        deployer = deployer.lower()
+        agg = self.deployers.get((chain, deployer)) or {
+            "tokens": set(), "rugged": 0, "max_liquidity_usd": 0.0, "first_block": None,
+        }
+        tokens, rugged = len(agg["tokens"]), agg["rugged"]
+        if exclude_token and exclude_token.lower() in agg["tokens"]:
+            tokens -= 1
+            rugged -= self.tokens[(chain, exclude_token.lower())]["rugged"]
+
+        funder = self.funders.get((chain, deployer))
+        funded = self.funded.get((chain, funder), set()) if funder else set()
+        funder_is_hub = self._is_hub(chain, funder, funded)
+        siblings = set() if funder_is_hub else funded - {deployer}
+        sibling_rugs = sum(self.deployers[(chain, d)]["rugged"] for d in siblings if (chain, d) in self.deployers)
+
+        return {
+            "tokens": tokens,
+            "rugged": rugged,
+            "alive": tokens - rugged,
+            "rug_rate": rugged / tokens if tokens else 0.0,
+            "max_liquidity_usd": agg["max_liquidity_usd"],
+            "first_block": agg["first_block"],
+            "funder": funder,
+            "funder_is_hub": funder_is_hub,
+            "sibling_deployers": len(siblings),
+            "sibling_rugs": sibling_rugs,
+        }
+
+    def _is_hub(self, chain: str, funder: Optional[str], funded: Set[str]) -> bool:
+        """Financeur trop partagé pour relier ses wallets (un déployeur reste un lien étroit)"""
+        if not funder or (chain, funder) in self.deployers:
+            return False
+        return len(funded) > self.max_funder_fanout
+
+    def is_known_scammer(self, chain: str, deployer: Optional[str]) -> bool:
+        if not deployer:
+            return False
+        rep = self.reputation(chain, deployer)
+        blocked = rep["rugged"] >= self.min_rugs or rep["sibling_rugs"] >= self.min_rugs
+        self.stats["blocked"] += blocked
+        return blocked
+
+    # ------------------------------------------------------------------
+    # Écritures
+    # ------------------------------------------------------------------
+
+    def record_token(self, chain: str, token_address: str, pair_address: str, deployer: str,
+                     block: Optional[int] = None, dex: Optional[str] = None,
+                     liquidity_usd: float = 0.0, commit: bool = True):
+        token = token_address.lower()
+        existing = self.tokens.get((chain, token))
+        row = {
+            "chain": chain, "token": token, "pair": pair_address.lower(), "dex": dex,
+            "deployer": deployer.lower(), "block": block,
+            "created_at": existing["created_at"] if existing else time.time(),
+            "max_liquidity_usd": max(liquidity_usd, existing["max_liquidity_usd"] if existing else 0.0),
+            "last_liquidity_usd": liquidity_usd or (existing["last_liquidity_usd"] if existing else 0.0),
+            "rugged": existing["rugged"] if existing else 0,
+            "updated_at": time.time(),
+        }
+        self._index_token(row)
+        self.db.execute(
+            "INSERT OR REPLACE INTO tokens VALUES (:chain, :token, :pair, :dex, :deployer, :block, :created_at, "
+            ":max_liquidity_usd, :last_liquidity_usd, :rugged, :updated_at)", row
+        )
+        if commit:
+            self.db.commit()
+        self.stats["recorded"] += 1
+
+    def record_funder(self, chain: str, deployer: str, funder: str):
+        deployer, funder = deployer.lower(), funder.lower()
+        if self.funders.get((chain, deployer)) == funder:
+            return
+        self._index_funder(chain, deployer, funder)
+        self.db.execute("INSERT OR REPLACE INTO funders VALUES (?, ?, ?)", (chain, deployer, funder))
+        self.db.commit()
+
+    def _apply_liquidity(self, chain: str, token_address: str, liquidity_usd: float) -> Optional[tuple]:
+        """Met à jour l'index en mémoire; retourne les paramètres de l'UPDATE SQL"""
+        row = self.tokens.get((chain, token_address.lower()))
+        if row is None:
+            return None
+        row = dict(row)
+        row["max_liquidity_usd"] = max(row["max_liquidity_usd"] or 0.0, liquidity_usd)
+        row["last_liquidity_usd"] = liquidity_usd
+        # Un rug reste un rug, même si quelqu'un remet un peu de liquidité
+        row["rugged"] = int(row["rugged"] or liquidity_usd < row["max_liquidity_usd"] * RUG_LIQUIDITY_RATIO)
+        row["updated_at"] = time.time()
+        self._index_token(row)
+        return (row["max_liquidity_usd"], liquidity_usd, row["rugged"], row["updated_at"], chain, row["token"])
+
+    def update_liquidity(self, chain: str, token_address: str, liquidity_usd: float, commit: bool = True):
+        params = self._apply_liquidity(chain, token_address, liquidity_usd)
+        if params is None:
+            return
+        self.db.execute(UPDATE_LIQUIDITY_SQL, params)
+        if commit:
+            self.db.commit()
+
+    def _write_liquidity(self, updates: List[tuple]):
+        """Exécuté dans un thread: une page de mises à jour, une transaction"""
+        if self._writer is None:
+            self._writer = sqlite3.connect(self.path, check_same_thread=False)
+        with self._writer:
+            self._writer.executemany(UPDATE_LIQUIDITY_SQL, updates)
+
+    def record_receipt(self, chain: str, dex: str, token_address: str, pair_address: str,
+                       receipt: Dict, commit: bool = True) -> Optional[str]:
+        """
+        Enregistre un token depuis le reçu de la transaction PairCreated
+        (web3 ou JSON-RPC brut). La liquidité initiale vient du Sync de la paire
+        dans la même transaction (addLiquidityETH crée la paire).
+        """
+        deployer = receipt.get("from")
+        if not deployer:
+            return None
+        deployer = _hex(deployer)
+        pair = pair_address.lower()
+        native_is_token0 = WRAPPED_NATIVE.get(chain, "").lower() < token_address.lower()
+
+        liquidity_usd = 0.0
+        for log in receipt.get("logs") or []:
+            topics = log.get("topics") or []
+            if _hex(log.get("address", "")) != pair or not topics or _hex(topics[0]) != SYNC_TOPIC:
+                continue
+            data = _hex(log.get("data") or "0x")[2:]
+            reserve0, reserve1 = int(data[:64], 16), int(data[64:128], 16)
+            native = reserve0 if native_is_token0 else reserve1
+            liquidity_usd = 2 * native / 10 ** 18 * NATIVE_PRICES.get(chain, 2000)
+
+        block = receipt.get("blockNumber")
+        block = int(block, 16) if isinstance(block, str) else block
+        self.record_token(chain, token_address, pair, deployer, block=block, dex=dex,
+                          liquidity_usd=liquidity_usd, commit=commit)
+        return deployer
+
+    def close(self):
+        self.running = False
+        self.db.commit()
+        self.db.close()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    # ------------------------------------------------------------------
+    # Construction historique et mise à jour des issues
+    # ------------------------------------------------------------------
+
+    async def _rpc_batch(self, rpc_url: str, calls: List[Tuple[str, list]]) -> List:
+        results = []
+        for i in range(0, len(calls), RPC_BATCH_SIZE):
+            chunk = calls[i:i + RPC_BATCH_SIZE]
+            resp = await self.http.post_rpc(rpc_url, json=[
+                {"jsonrpc": "2.0", "id": j, "method": method, "params": params}
+                for j, (method, params) in enumerate(chunk)
+            ])
+            if resp.status != 200 or not isinstance(resp.data, list):
+                raise RuntimeError(f"RPC batch failed ({resp.status})")
+            by_id = {item.get("id"): item.get("result") for item in resp.data}
+            results.extend(by_id.get(j) for j in range(len(chunk)))
+        return results
+
+    async def backfill(self, chain: str, rpc_url: str, from_block: Optional[int] = None,
+                       to_block: Optional[int] = None, chunk_blocks: int = BACKFILL_CHUNK_BLOCKS) -> int:
+        """
+        Scan des logs PairCreated des factories connues. La progression est
+        enregistrée: un scan interrompu reprend au dernier bloc traité.
+        """
+        weth = WRAPPED_NATIVE.get(chain, "").lower()
+        factories = {address.lower(): dex for dex, address in DEX_FACTORIES.get(chain, {}).items()}
+        if not weth or not factories:
+            return 0
+
+        progress_key = f"backfill:{chain}"
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (progress_key,)).fetchone()
+        if from_block is None:
+            from_block = int(row["value"]) + 1 if row else 0
+        if to_block is None:
+            resp = await self.http.post_rpc(rpc_url, json={"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber", "params": []})
+            to_block = int(resp.data["result"], 16)
+
+        recorded = 0
+        for start in range(from_block, to_block + 1, chunk_blocks):
+            end = min(start + chunk_blocks - 1, to_block)
+            resp = await self.http.post_rpc(rpc_url, json={
+                "jsonrpc": "2.0", "id": 1, "method": "eth_getLogs",
+                "params": [{"address": list(factories), "topics": [PAIR_CREATED_TOPIC],
+                            "fromBlock": hex(start), "toBlock": hex(end)}]
+            })
+            if resp.status != 200 or not isinstance(resp.data, dict) or "error" in resp.data:
+                raise RuntimeError(f"eth_getLogs {start}-{end} failed ({resp.status})")
+
+            pairs = []
+            for log in resp.data.get("result") or []:
+                token0 = "0x" + log["topics"][1][-40:]
+                token1 = "0x" + log["topics"][2][-40:]
+                if weth not in (token0, token1):
+                    continue
+                token = token1 if token0 == weth else token0
+                pair = "0x" + log["data"][26:66]
+                pairs.append((factories.get(log["address"].lower()), token, pair, log["transactionHash"]))
+
+            receipts = await self._rpc_batch(rpc_url, [("eth_getTransactionReceipt", [p[3]]) for p in pairs])
+            for (dex, token, pair, _), receipt in zip(pairs, receipts):
+                if receipt and self.record_receipt(chain, dex, token, pair, receipt, commit=False):
+                    recorded += 1
+
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (progress_key, str(end)))
+            self.db.commit()
+            logger.info(f"🗂️ {chain} backfill {start}-{end}: {len(pairs)} pairs")
+
+        return recorded
+
+    async def _latest_block(self, rpc_url: str) -> int:
+        resp = await self.http.post_rpc(rpc_url, json={"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber",
+                                                       "params": []})
+        if resp.status != 200 or not isinstance(resp.data, dict) or "result" not in resp.data:
+            raise RuntimeError(f"eth_blockNumber failed ({resp.status})")
+        return int(resp.data["result"], 16)
+
+    async def refresh_outcomes(self, chain: str, rpc_url: str, tokens: Optional[Iterable[str]] = None,
+                               page_size: int = REFRESH_PAGE_SIZE, all_tokens: bool = False) -> int:
+        """
+        Relit les réserves des paires encore vivantes et marque les rugs.
+        Sans `tokens`: seulement les tokens créés dans la fenêtre récente
+        (`all_tokens` pour tout l'index, construction hors ligne).
+        Traité par pages (un lot RPC, une transaction écrite hors boucle): une
+        page en échec est sautée sans perdre les autres.
+        """
+        if tokens is not None:
+            tokens = {t.lower() for t in tokens}
+            rows = [row for (c, token), row in self.tokens.items()
+                    if c == chain and not row["rugged"] and row.get("pair") and token in tokens]
+        elif all_tokens:
+            rows = [row for (c, _), row in self.tokens.items() if c == chain and not row["rugged"] and row.get("pair")]
+        else:
+            min_block = await self._latest_block(rpc_url) - int(self.refresh_window / BLOCK_TIMES.get(chain, 12))
+            rows = [row for (c, _), row in self.tokens.items()
+                    if c == chain and not row["rugged"] and row.get("pair") and (row.get("block") or 0) >= min_block]
+        if not rows:
+            return 0
+
+        weth = WRAPPED_NATIVE.get(chain, "").lower()
+        native_usd = NATIVE_PRICES.get(chain, 2000)
+        refreshed = 0
+        for start in range(0, len(rows), page_size):
+            page = rows[start:start + page_size]
+            try:
+                results = await self._rpc_batch(rpc_url, [
+                    ("eth_call", [{"to": row["pair"], "data": "0x" + SELECTORS["getReserves"]}, "latest"])
+                    for row in page
+                ])
+            except Exception as e:
+                self.stats["refresh_errors"] += 1
+                logger.warning(f"Deployer index refresh page {start}-{start + len(page)} on {chain} failed: {e}")
+                continue
+
+            updates = []
+            for row, result in zip(page, results):
+                if not result or len(result) < 130:
+                    continue
+                reserve0, reserve1 = int(result[2:66], 16), int(result[66:130], 16)
+                native = reserve0 if weth < row["token"] else reserve1
+                params = self._apply_liquidity(chain, row["token"], 2 * native / 10 ** 18 * native_usd)
+                if params:
+                    updates.append(params)
+            if updates:
+                await asyncio.to_thread(self._write_liquidity, updates)
+            refreshed += len(page)
+
+        self.stats["refreshed"] += refreshed
+        return refreshed
+
+    async def run(self, rpc_manager, chains: Optional[List[str]] = None):
+        self.running = True
+        chains = chains or list(DEX_FACTORIES)
+        while self.running:
+            for chain in chains:
+                rpc_url = rpc_manager.get(chain)
+                if not rpc_url:
+                    continue
+                try:
+                    await self.refresh_outcomes(chain, rpc_url)
+                except Exception as e:
+                    logger.error(f"Deployer index refresh error on {chain}: {e}")
+            await asyncio.sleep(REFRESH_INTERVAL_SECONDS)
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats["tokens"] = len(self.tokens)
+        stats["deployers"] = len(self.deployers)
+        stats["rugged"] = sum(row["rugged"] for row in self.tokens.values())
+        return stats
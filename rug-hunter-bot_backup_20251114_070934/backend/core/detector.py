@@ -1,5 +1,6 @@
 """Multi-Chain Real-Time Token Detector - AMÉLIORÉ avec tous les liens"""
 import asyncio
+import hashlib
 import logging
 from web3 import Web3
 from web3.exceptions import BlockNotFound
@@ -7,6 +8,8 @@ from typing import List, Dict
 from datetime import datetime
 import time
 
+from core.rule_engine import get_rule_engine
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -69,7 +72,8 @@ NATIVE_PRICES = {
 
 
 class MultiChainDetector:
-    def __init__(self, chains: List[str], rpc_manager, config: dict):
+    def __init__(self, chains: List[str], rpc_manager, config: dict, deployer_index=None,
+                 lp_lock_analyzer=None, rule_engine=None):
         self.chains = chains
         self.rpc_manager = rpc_manager
         self.config = config
@@ -82,6 +86,10 @@ class MultiChainDetector:
         self.scan_interval = config.get("SCAN_INTERVAL_SECONDS", 3)
         self.connection_errors = {}
         self.total_detections = 0
+        # DeployerIndex optionnel: filtre les déployeurs connus avant toute analyse
+        self.deployer_index = deployer_index
+        self.lp_lock_analyzer = lp_lock_analyzer
+        self.rules = rule_engine or get_rule_engine()
         
     def _get_web3(self, chain: str) -> Web3:
         if chain not in self.web3_connections:
@@ -214,13 +222,30 @@ class MultiChainDetector:
             
             self.detected_tokens.add(token_id)
             
+            deployer = None
+            if self.deployer_index:
+                receipt = w3.eth.get_transaction_receipt(event['transactionHash'])
+                deployer = self.deployer_index.record_receipt(chain, dex, new_token, pair_address, receipt)
+                if self.deployer_index.is_known_scammer(chain, deployer):
+                    logger.info(f"⛔ Token skipped: known rugger deployer {deployer}")
+                    return
+            
             # Récupérer TOUTES les infos + GÉNÉRER TOUS LES LIENS
             token_info = await self._get_complete_token_info(chain, new_token, pair_address, dex, w3)
+            if deployer:
+                self.deployer_index.update_liquidity(chain, new_token, token_info.get("liquidity_usd", 0))
             
             if not await self._should_analyze(token_info):
                 logger.info(f"⏭️ Token filtered: {token_info.get('symbol', '???')} - Liquidity: ${token_info.get('liquidity_usd', 0):,.0f}")
                 return
             
+            # Analyse des verrous LP seulement pour les tokens retenus (appels RPC/explorer)
+            if self.lp_lock_analyzer:
+                lp_lock = await self.lp_lock_analyzer.analyze(chain, pair_address)
+                if lp_lock:
+                    token_info["lp_locked"] = lp_lock["lp_locked"]
+                    token_info["lp_lock_duration_days"] = lp_lock["lp_lock_duration_days"]
+            
             # Générer TOUS les liens directs
             links = self._generate_all_links(chain, new_token, pair_address)
             
@@ -235,6 +260,11 @@ class MultiChainDetector:
                 "links": links,  # ← NOUVEAU : Tous les liens
                 **token_info
             }
+            if deployer:
+                detection_event["deployer"] = deployer
+                detection_event["deployer_reputation"] = self.deployer_index.reputation(
+                    chain, deployer, exclude_token=new_token
+                )
             
             self.total_detections += 1
             await self.event_queue.put(detection_event)
@@ -467,26 +497,23 @@ class MultiChainDetector:
             market_cap_usd = total_supply_float * token_price_usd
             
             # Sécurité (analyse bytecode)
-            bytecode = w3.eth.get_code(Web3.to_checksum_address(token_address)).hex()
+            code = w3.eth.get_code(Web3.to_checksum_address(token_address))
+            bytecode = code.hex()
+            # Même empreinte que SwapSimulator (sha256 du hex "0x...")
+            bytecode_hash = hashlib.sha256(("0x" + bytes(code).hex()).encode()).hexdigest()
             has_mint = 'mint' in bytecode.lower() or '40c10f19' in bytecode
             has_pause = 'pause' in bytecode.lower() or '8456cb59' in bytecode
             has_blacklist = any(x in bytecode.lower() for x in ['blacklist', 'block', 'banned'])
             has_proxy = 'delegatecall' in bytecode.lower()
             
-            # Calcul du score de risque
-            risk_score = 0
-            if not ownership_renounced:
-                risk_score += 20
-            if has_mint:
-                risk_score += 15
-            if has_blacklist:
-                risk_score += 25
-            if owner_balance_pct > 20:
-                risk_score += 15
-            if liquidity_usd < 10000:
-                risk_score += 15
-            elif liquidity_usd < 5000:
-                risk_score += 10
+            # Calcul du score de risque (règles "detection_risk" de config/rules.json)
+            risk_score = int(self.rules.evaluate("detection_risk", {
+                "ownership_renounced": ownership_renounced,
+                "has_mint_function": has_mint,
+                "has_blacklist": has_blacklist,
+                "owner_balance_percent": owner_balance_pct,
+                "liquidity_usd": liquidity_usd,
+            })["score"])
             
             return {
                 "name": name,
@@ -507,6 +534,7 @@ class MultiChainDetector:
                 "has_pause_function": has_pause,
                 "has_blacklist": has_blacklist,
                 "has_proxy": has_proxy,
+                "bytecode_hash": bytecode_hash,
                 "risk_score": min(risk_score, 100),
                 "contract_verified": False,
                 "lp_locked": False,
@@ -0,0 +1,196 @@
+"""DexScreener Client - lookups groupés, cache des paires et budget de requêtes partagé"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from core.cache import TTLCache
+from core.http_client import HTTPClient, get_http_client
+
+logger = logging.getLogger(__name__)
+
+DEXSCREENER_API = "https://api.dexscreener.com"
+
+# /latest/dex/tokens accepte jusqu'à 30 adresses séparées par des virgules
+MAX_ADDRESSES_PER_REQUEST = 30
+
+# Limite publique DexScreener: 300 requêtes/minute sur les endpoints pairs/tokens/search
+DEFAULT_REQUESTS_PER_MINUTE = 300
+
+
+def _normalize(address: str) -> str:
+    """Les adresses EVM sont insensibles à la casse, pas les adresses Solana"""
+    return address.lower() if address.startswith("0x") else address
+
+
+class TokenBucket:
+    """Limiteur de débit: `rate` jetons par seconde, rafale max `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waits = 0
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                self.waits += 1
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class DexScreenerClient:
+    """
+    Client DexScreener partagé par le chemin Solana et l'enrichissement EVM:
+    - les lookups concurrents sont regroupés (max 30 adresses par requête)
+    - les paires sont cachées par adresse avec un TTL court
+    - toutes les requêtes passent par le même token bucket
+    """
+
+    def __init__(self, http_client: Optional[HTTPClient] = None, batch_window_ms: float = 20,
+                 cache_ttl: float = 10.0, empty_ttl: float = 3.0, cache_size: int = 5000,
+                 requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE):
+        self.http = http_client or get_http_client()
+        self.batch_window = batch_window_ms / 1000
+        # Un token sans paire aujourd'hui peut en avoir une dans quelques secondes
+        self.cache_ttl = cache_ttl
+        self.empty_ttl = empty_ttl
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.limiter = TokenBucket(rate=requests_per_minute / 60, capacity=max(1, requests_per_minute // 20))
+
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._flush_handle = None
+
+        self.stats = {
+            "requests": 0,
+            "addresses_requested": 0,
+            "lookups_coalesced": 0,
+            "errors": 0,
+        }
+
+    async def get_pairs(self, address: str) -> List[Dict]:
+        """Toutes les paires connues d'un token (liste vide si aucune)"""
+        key = _normalize(address)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        if key in self._pending:
+            self.stats["lookups_coalesced"] += 1
+            self._pending[key].append(future)
+        else:
+            self._pending[key] = [future]
+
+        self._schedule_flush(loop)
+        return await future
+
+    async def get_pair(self, address: str, chain_id: Optional[str] = None) -> Optional[Dict]:
+        """Paire principale d'un token: celle où il est baseToken, la plus liquide"""
+        pairs = await self.get_pairs(address)
+        key = _normalize(address)
+        candidates = [
+            p for p in pairs
+            if _normalize(p.get("baseToken", {}).get("address", "")) == key
+            and (chain_id is None or p.get("chainId") == chain_id)
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda p: float((p.get("liquidity") or {}).get("usd") or 0))
+
+    async def search(self, query: str) -> List[Dict]:
+        """/latest/dex/search (même budget de requêtes que les lookups)"""
+        await self.limiter.acquire()
+        self.stats["requests"] += 1
+        resp = await self.http.get(f"{DEXSCREENER_API}/latest/dex/search", params={"q": query})
+        if resp.status != 200 or not isinstance(resp.data, dict):
+            self.stats["errors"] += 1
+            return []
+        return resp.data.get("pairs") or []
+
+    def _schedule_flush(self, loop):
+        if len(self._pending) >= MAX_ADDRESSES_PER_REQUEST:
+            if self._flush_handle:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            loop.create_task(self._flush())
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(
+                self.batch_window, lambda: loop.create_task(self._flush())
+            )
+
+    async def _flush(self):
+        """Envoie les lookups en attente par lots de 30 adresses"""
+        self._flush_handle = None
+
+        while self._pending:
+            keys = list(self._pending)[:MAX_ADDRESSES_PER_REQUEST]
+            waiters = {k: self._pending.pop(k) for k in keys}
+
+            try:
+                pairs_by_address = await self._fetch_tokens(keys)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"DexScreener batch error ({len(keys)} tokens): {e}")
+                for futures in waiters.values():
+                    for f in futures:
+                        if not f.done():
+                            f.set_exception(e)
+                continue
+
+            for key in keys:
+                pairs = pairs_by_address.get(key, [])
+                self.cache.set(key, pairs, ttl=self.cache_ttl if pairs else self.empty_ttl)
+                for f in waiters[key]:
+                    if not f.done():
+                        f.set_result(pairs)
+
+    async def _fetch_tokens(self, keys: List[str]) -> Dict[str, List[Dict]]:
+        """Un appel /latest/dex/tokens/{a,b,c} réparti par adresse"""
+        await self.limiter.acquire()
+        self.stats["requests"] += 1
+        self.stats["addresses_requested"] += len(keys)
+
+        resp = await self.http.get(f"{DEXSCREENER_API}/latest/dex/tokens/{','.join(keys)}")
+        if resp.status != 200:
+            raise RuntimeError(f"HTTP {resp.status}")
+
+        pairs_by_address: Dict[str, List[Dict]] = {}
+        wanted = set(keys)
+        for pair in (resp.data or {}).get("pairs") or []:
+            for side in ("baseToken", "quoteToken"):
+                address = _normalize((pair.get(side) or {}).get("address", ""))
+                if address in wanted:
+                    pairs_by_address.setdefault(address, []).append(pair)
+        return pairs_by_address
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats["pending"] = len(self._pending)
+        stats["rate_limit_waits"] = self.limiter.waits
+        stats["avg_batch_size"] = (
+            stats["addresses_requested"] / stats["requests"] if stats["requests"] else 0
+        )
+        stats["cache"] = self.cache.get_stats()
+        return stats
+
+
+_shared_client: Optional[DexScreenerClient] = None
+
+
+def get_dexscreener_client() -> DexScreenerClient:
+    """Client partagé: un seul budget de requêtes pour tout le process"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = DexScreenerClient()
+    return _shared_client
@@ -0,0 +1,131 @@
+"""Encodage ABI minimal pour les appels JSON-RPC bruts (sans passer par web3)"""
+from typing import List, Tuple
+
+# Sélecteurs de fonctions (4 premiers octets du keccak256 de la signature)
+SELECTORS = {
+    "balanceOf": "70a08231",
+    "approve": "095ea7b3",
+    "transfer": "a9059cbb",
+    "totalSupply": "18160ddd",
+    "owner": "8da5cb5b",
+    "token0": "0dfe1681",
+    "getReserves": "0902f1ac",
+    "factory": "c45a0155",
+    "getAmountsOut": "d06ca61f",
+    "swapExactETHForTokensSupportingFeeOnTransferTokens": "b6f9de95",
+    "swapExactTokensForTokensSupportingFeeOnTransferTokens": "5c11d795",
+    "aggregate3": "82ad56cb",
+    # Lockers de LP
+    "getNumLocksForToken": "1f2a1d2f",
+    "tokenLocks": "ccebfa3f",
+    "getDepositsByTokenAddress": "86f65a22",
+    "lockedToken": "bb941cff",
+    "getLocksForToken": "332f26d7",
+}
+
+# Multicall3: même adresse sur ETH et BSC
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+MAX_UINT256 = 2 ** 256 - 1
+
+
+def _word(value: int) -> str:
+    return format(value, "064x")
+
+
+def _address_word(address: str) -> str:
+    return address.lower().replace("0x", "").rjust(64, "0")
+
+
+def encode_call(function: str, args: List[Tuple[str, object]] = ()) -> str:
+    """
+    Encode un appel: args est une liste de (type, valeur) avec type parmi
+    "uint256", "address", "bool", "address[]" et "bytes".
+    """
+    head, tail = [], []
+    head_size = 32 * len(args)
+
+    for arg_type, value in args:
+        if arg_type == "address":
+            head.append(_address_word(value))
+        elif arg_type == "bool":
+            head.append(_word(1 if value else 0))
+        elif arg_type == "uint256":
+            head.append(_word(int(value)))
+        elif arg_type in ("address[]", "bytes"):
+            head.append(_word(head_size + sum(len(t) for t in tail) // 2))
+            tail.append(_encode_dynamic(arg_type, value))
+        else:
+            raise ValueError(f"Unsupported ABI type: {arg_type}")
+
+    return "0x" + SELECTORS[function] + "".join(head) + "".join(tail)
+
+
+def _encode_dynamic(arg_type: str, value) -> str:
+    if arg_type == "address[]":
+        return _word(len(value)) + "".join(_address_word(a) for a in value)
+    raw = value.replace("0x", "")
+    padded = raw.ljust((len(raw) + 63) // 64 * 64, "0")
+    return _word(len(raw) // 2) + padded
+
+
+def words(return_data: str) -> List[int]:
+    """Découpe des données de retour en mots de 32 octets"""
+    raw = (return_data or "0x")[2:] if (return_data or "").startswith("0x") else (return_data or "")
+    return [int(raw[i:i + 64], 16) for i in range(0, len(raw) - len(raw) % 64, 64)]
+
+
+def decode_uint(return_data: str, index: int = 0) -> int:
+    values = words(return_data)
+    return values[index] if len(values) > index else 0
+
+
+def decode_address(return_data: str, index: int = 0) -> str:
+    return "0x" + format(decode_uint(return_data, index), "040x")
+
+
+def decode_uint_array(return_data: str) -> List[int]:
+    """Décode un uint256[] retourné seul (offset, longueur, éléments)"""
+    values = words(return_data)
+    if len(values) < 2:
+        return []
+    start = values[0] // 32
+    length = values[start]
+    return values[start + 1:start + 1 + length]
+
+
+def encode_aggregate3(calls: List[Tuple[str, bool, str]]) -> str:
+    """Encode Multicall3.aggregate3 pour une liste de (cible, allowFailure, callData)"""
+    encoded = []
+    for target, allow_failure, call_data in calls:
+        data = call_data.replace("0x", "")
+        padded = data.ljust((len(data) + 63) // 64 * 64, "0")
+        encoded.append(_address_word(target) + _word(1 if allow_failure else 0) + _word(0x60)
+                       + _word(len(data) // 2) + padded)
+
+    offsets, position = [], 32 * len(encoded)
+    for item in encoded:
+        offsets.append(_word(position))
+        position += len(item) // 2
+    return "0x" + SELECTORS["aggregate3"] + _word(0x20) + _word(len(encoded)) + "".join(offsets) + "".join(encoded)
+
+
+def decode_aggregate3(return_data: str) -> List[Tuple[bool, str]]:
+    """Décode le Result[] (success, returnData) d'aggregate3"""
+    raw = (return_data or "0x")[2:]
+    if len(raw) < 128:
+        return []
+
+    def word(byte_offset: int) -> int:
+        return int(raw[byte_offset * 2:byte_offset * 2 + 64], 16)
+
+    array_start = word(0)
+    length = word(array_start)
+    results = []
+    for i in range(length):
+        item = array_start + 32 + word(array_start + 32 + 32 * i)
+        success = bool(word(item))
+        data_start = item + word(item + 32)
+        size = word(data_start)
+        results.append((success, "0x" + raw[(data_start + 32) * 2:(data_start + 32 + size) * 2]))
+    return results
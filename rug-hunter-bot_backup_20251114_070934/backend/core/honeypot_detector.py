@@ -1,72 +1,132 @@
 """Advanced Honeypot Detector - VERSION CORRIGÉE"""
 import asyncio
 import logging
-import aiohttp
-from typing import Dict
+from typing import Dict, Optional
+
+from core.cache import TTLCache
+from core.http_client import get_http_client
+from core.swap_simulator import SwapSimulator
 
 logger = logging.getLogger(__name__)
 
+# Durée de validité (secondes) d'un résultat vérifié. Tous les champs viennent de
+# la même simulation et sont relus ensemble: la plus volatile (les taxes, qui
+# peuvent changer après le lancement) fixe la durée de l'entrée entière.
+DEFAULT_RESULT_TTL = 60.0
+
+# Échec de vérification: court, pour ne pas marteler un service instable
+DEFAULT_FAILURE_TTL = 15.0
+
+
 class HoneypotDetector:
-    def __init__(self, rpc_manager):
+    def __init__(self, rpc_manager, simulator: Optional[SwapSimulator] = None,
+                 cache_size: int = 5000, result_ttl: float = DEFAULT_RESULT_TTL,
+                 failure_ttl: float = DEFAULT_FAILURE_TTL):
         self.rpc_manager = rpc_manager
-        self.cache = {}
-        
-    async def is_honeypot(self, token_address: str, chain: str, pair_address: str = None) -> Dict:
-        """✅ CORRIGÉ: Utilise Honeypot.is API pour VRAIE détection"""
-        cache_key = f"{chain}:{token_address}"
-        
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        
+        self.http = get_http_client()
+        self.simulator = simulator or SwapSimulator(rpc_manager)
+
+        self.result_ttl = result_ttl
+        self.failure_ttl = failure_ttl
+        self.cache = TTLCache(maxsize=cache_size, ttl=None)
+
+        # Un seul appel en vol par token: les appelants concurrents partagent le résultat
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.stats = {"coalesced": 0, "failures_cached": 0, "negative_hits": 0}
+
+    def _ttl_for(self, result: Dict) -> float:
+        return self.result_ttl if result.get("verified") else self.failure_ttl
+
+    async def is_honeypot(self, token_address: str, chain: str, pair_address: str = None,
+                          dex: str = None) -> Dict:
+        """Simulation locale achat/vente en priorité, Honeypot.is en secours"""
+        cache_key = f"{chain}:{token_address.lower()}"
+
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            if not cached.get("verified"):
+                self.stats["negative_hits"] += 1
+            return cached
+
+        task = self._in_flight.get(cache_key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._check(token_address, chain, dex))
+            self._in_flight[cache_key] = task
+            task.add_done_callback(lambda _t, k=cache_key: self._in_flight.pop(k, None))
+        else:
+            self.stats["coalesced"] += 1
+
+        result = await asyncio.shield(task)
+        # Première tâche terminée: le résultat est mis en cache une seule fois
+        if cache_key not in self.cache:
+            if not result.get("verified"):
+                self.stats["failures_cached"] += 1
+            self.cache.set(cache_key, result, ttl=self._ttl_for(result))
+        return result
+
+    async def _check(self, token_address: str, chain: str, dex: Optional[str]) -> Dict:
+        # 1. Simulation locale (un seul aller-retour RPC). Le cache ci-dessus fait
+        # foi: on ne le superpose pas à celui du simulateur, sinon un résultat déjà
+        # vieux repartirait pour une durée complète
+        simulated = await self.simulator.simulate(token_address, chain, dex, use_cache=False)
+        if simulated:
+            return simulated
+
+        # 2. Honeypot.is
         try:
             chain_id = {"ETH": 1, "BSC": 56}.get(chain, 1)
-            
-            async with aiohttp.ClientSession() as session:
-                url = "https://api.honeypot.is/v2/IsHoneypot"
-                params = {
-                    "address": token_address,
-                    "chainID": chain_id
+
+            url = "https://api.honeypot.is/v2/IsHoneypot"
+            params = {
+                "address": token_address,
+                "chainID": chain_id
+            }
+
+            resp = await self.http.get(url, params=params, timeout=15)
+            if resp.status == 200:
+                data = resp.data
+
+                simulation = data.get("simulationResult", {})
+                honeypot_result = data.get("honeypotResult", {})
+
+                return {
+                    "is_honeypot": honeypot_result.get("isHoneypot", False),
+                    "can_buy": simulation.get("buyGas", 0) > 0,
+                    "can_sell": simulation.get("sellGas", 0) > 0,
+                    "buy_tax": simulation.get("buyTax", 0),
+                    "sell_tax": simulation.get("sellTax", 0),
+                    "buy_gas": simulation.get("buyGas", 0),
+                    "sell_gas": simulation.get("sellGas", 0),
+                    "liquidity_removable": False,
+                    "reason": "Verified via Honeypot.is API",
+                    "verified": True,
+                    "source": "honeypot.is"
                 }
-                
-                timeout = aiohttp.ClientTimeout(total=15)
-                async with session.get(url, params=params, timeout=timeout) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        
-                        simulation = data.get("simulationResult", {})
-                        honeypot_result = data.get("honeypotResult", {})
-                        
-                        result = {
-                            "is_honeypot": honeypot_result.get("isHoneypot", False),
-                            "can_buy": simulation.get("buyGas", 0) > 0,
-                            "can_sell": simulation.get("sellGas", 0) > 0,
-                            "buy_tax": simulation.get("buyTax", 0),
-                            "sell_tax": simulation.get("sellTax", 0),
-                            "buy_gas": simulation.get("buyGas", 0),
-                            "sell_gas": simulation.get("sellGas", 0),
-                            "liquidity_removable": False,
-                            "reason": "Verified via Honeypot.is API"
-                        }
-                        
-                        self.cache[cache_key] = result
-                        return result
-        
+
         except Exception as e:
             logger.error(f"Honeypot API error: {e}")
-        
-        # Fallback si API échoue
+
+        # Aucune vérification possible: on considère le token comme non vendable
         return {
-            "is_honeypot": False,
-            "can_buy": True,
-            "can_sell": True,
+            "is_honeypot": True,
+            "can_buy": False,
+            "can_sell": False,
             "buy_tax": 0,
             "sell_tax": 0,
             "buy_gas": 0,
             "sell_gas": 0,
             "liquidity_removable": False,
-            "reason": "Could not verify - API unavailable",
-            "warning": "Proceed with extreme caution"
+            "verified": False,
+            "source": "fallback",
+            "reason": "Could not verify - simulation and API unavailable"
         }
-    
+
     def clear_cache(self):
         self.cache.clear()
+
+    def get_stats(self) -> Dict:
+        stats = self.cache.get_stats()
+        stats.update(self.stats)
+        stats["in_flight"] = len(self._in_flight)
+        stats["simulator"] = self.simulator.get_stats()
+        return stats
@@ -0,0 +1,267 @@
+"""Shared Async HTTP Client - pools par host, retries, cache TTL et métriques"""
+import asyncio
+import json as jsonlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+import aiohttp
+
+from core.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HostPolicy:
+    """Politique de connexion pour un host"""
+    timeout: float = 10.0
+    retries: int = 2
+    backoff: float = 0.5  # secondes, doublé à chaque tentative
+    max_connections: int = 20
+    retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+
+
+DEFAULT_POLICY = HostPolicy()
+
+# Rejouables sans effet de bord: les autres (POST) ne sont retentés que sur demande
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+HOST_POLICIES = {
+    "api.dexscreener.com": HostPolicy(timeout=5.0, retries=2, max_connections=10),
+    "api.honeypot.is": HostPolicy(timeout=10.0, retries=1, max_connections=10),
+    "token.jup.ag": HostPolicy(timeout=20.0, retries=1, max_connections=5),
+    "api.raydium.io": HostPolicy(timeout=30.0, retries=1, max_connections=5),
+    "frontend-api.pump.fun": HostPolicy(timeout=5.0, retries=1, max_connections=10),
+    "discord.com": HostPolicy(timeout=10.0, retries=1, max_connections=5),
+    "api.telegram.org": HostPolicy(timeout=10.0, retries=1, max_connections=5),
+}
+
+# TTL de cache par endpoint: (host, préfixe de chemin, secondes). GET uniquement.
+CACHE_RULES: List[Tuple[str, str, float]] = [
+    # /latest/dex/tokens est caché par adresse dans DexScreenerClient
+    ("api.dexscreener.com", "/latest/dex/search", 3.0),
+    ("token.jup.ag", "/all", 300.0),
+    ("token.jup.ag", "/token/", 600.0),
+    ("api.raydium.io", "/v2/main/pairs", 20.0),
+]
+
+
+class HTTPResponse:
+    """Réponse déjà lue (le corps est décodé avant de rendre la connexion au pool)"""
+
+    __slots__ = ("status", "data", "headers", "from_cache")
+
+    def __init__(self, status: int, data: Any, headers: Dict = None, from_cache: bool = False):
+        self.status = status
+        self.data = data
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+
+class HostMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.status_counts: Dict[int, int] = {}
+        self.total_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+
+    def record(self, status: Optional[int], latency_ms: float):
+        self.requests += 1
+        self.total_latency_ms += latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        if status is None:
+            self.errors += 1
+        else:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def to_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "status_counts": dict(self.status_counts),
+            "avg_latency_ms": round(self.total_latency_ms / self.requests, 1) if self.requests else 0,
+            "max_latency_ms": round(self.max_latency_ms, 1),
+        }
+
+
+class HTTPClient:
+    """
+    Client HTTP unique pour tous les appels sortants du backend:
+    - une session (pool de connexions + cache DNS) par host
+    - timeout et retries selon la politique du host
+    - cache des réponses GET avec TTL par endpoint
+    - métriques par host
+    """
+
+    def __init__(self, host_policies: Dict[str, HostPolicy] = None,
+                 cache_rules: List[Tuple[str, str, float]] = None, cache_size: int = 2048,
+                 dns_cache_ttl: int = 300):
+        self.host_policies = dict(HOST_POLICIES)
+        self.host_policies.update(host_policies or {})
+        self.cache_rules = list(cache_rules if cache_rules is not None else CACHE_RULES)
+        self.cache = TTLCache(maxsize=cache_size, ttl=None)
+        self.dns_cache_ttl = dns_cache_ttl
+        self.sessions: Dict[str, aiohttp.ClientSession] = {}
+        self.metrics: Dict[str, HostMetrics] = {}
+
+    def policy_for(self, host: str) -> HostPolicy:
+        return self.host_policies.get(host, DEFAULT_POLICY)
+
+    def set_policy(self, host: str, policy: HostPolicy):
+        self.host_policies[host] = policy
+
+    def session_for(self, url: str) -> aiohttp.ClientSession:
+        """Session poolée du host de l'URL (aussi utilisable pour ws_connect)"""
+        host = urlsplit(url).netloc
+        session = self.sessions.get(host)
+        if session is None or session.closed:
+            policy = self.policy_for(host)
+            connector = aiohttp.TCPConnector(
+                limit=policy.max_connections,
+                limit_per_host=policy.max_connections,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            self.sessions[host] = session
+        return session
+
+    def _cache_ttl(self, host: str, path: str) -> Optional[float]:
+        for rule_host, prefix, ttl in self.cache_rules:
+            if host == rule_host and path.startswith(prefix):
+                return ttl
+        return None
+
+    async def get(self, url: str, params: Dict = None, headers: Dict = None,
+                  cache_ttl: Optional[float] = None, **kwargs) -> HTTPResponse:
+        return await self.request("GET", url, params=params, headers=headers,
+                                  cache_ttl=cache_ttl, **kwargs)
+
+    async def post(self, url: str, json: Any = None, headers: Dict = None, **kwargs) -> HTTPResponse:
+        return await self.request("POST", url, json=json, headers=headers, **kwargs)
+
+    async def post_rpc(self, url: str, json: Any = None, headers: Dict = None, **kwargs) -> HTTPResponse:
+        """POST JSON-RPC en lecture (eth_call, getLogs, getMultipleAccounts...): retenté comme un GET"""
+        return await self.request("POST", url, json=json, headers=headers, idempotent=True, **kwargs)
+
+    async def request(self, method: str, url: str, params: Dict = None, json: Any = None,
+                      headers: Dict = None, cache_ttl: Optional[float] = None,
+                      timeout: Optional[float] = None, retries: Optional[int] = None,
+                      idempotent: Optional[bool] = None) -> HTTPResponse:
+        """
+        Exécute une requête selon la politique du host.
+        Lève la dernière exception si toutes les tentatives échouent sur erreur réseau;
+        une réponse HTTP non-2xx est retournée telle quelle.
+        Seules les méthodes idempotentes sont retentées par défaut: un POST
+        (webhook, message) n'est rejoué qu'avec idempotent=True (lectures JSON-RPC).
+        """
+        parts = urlsplit(url)
+        host = parts.netloc
+        policy = self.policy_for(host)
+        metrics = self.metrics.setdefault(host, HostMetrics())
+
+        cache_key = None
+        if method == "GET":
+            ttl = cache_ttl if cache_ttl is not None else self._cache_ttl(host, parts.path)
+            if ttl:
+                cache_key = url + ("?" + urlencode(sorted(params.items())) if params else "")
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    metrics.cache_hits += 1
+                    return HTTPResponse(cached.status, cached.data, cached.headers, from_cache=True)
+
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempts = (retries if retries is not None else policy.retries) + 1 if idempotent else 1
+        client_timeout = aiohttp.ClientTimeout(total=timeout or policy.timeout)
+        session = self.session_for(url)
+        last_error: Optional[Exception] = None
+        response = None
+
+        for attempt in range(attempts):
+            if attempt > 0:
+                metrics.retries += 1
+                delay = policy.backoff * (2 ** (attempt - 1))
+                if response is not None and response.status == 429:
+                    delay = max(delay, _retry_after(response.headers))
+                await asyncio.sleep(delay)
+
+            start = time.perf_counter()
+            try:
+                async with session.request(method, url, params=params, json=json,
+                                           headers=headers, timeout=client_timeout) as resp:
+                    text = await resp.text()
+                    try:
+                        data = jsonlib.loads(text) if text else None
+                    except ValueError:
+                        data = text
+                    response = HTTPResponse(resp.status, data, dict(resp.headers))
+                metrics.record(response.status, (time.perf_counter() - start) * 1000)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                metrics.record(None, (time.perf_counter() - start) * 1000)
+                last_error = e
+                response = None
+                logger.debug(f"HTTP {method} {host} attempt {attempt + 1}/{attempts} failed: {e}")
+                continue
+
+            if response.status in policy.retry_statuses and attempt < attempts - 1:
+                continue
+            break
+
+        if response is None:
+            raise last_error or RuntimeError(f"HTTP {method} {url} failed")
+
+        if cache_key and response.ok:
+            self.cache.set(cache_key, response, ttl=ttl)
+
+        return response
+
+    def get_metrics(self) -> Dict:
+        return {
+            "hosts": {host: m.to_dict() for host, m in self.metrics.items()},
+            "cache": self.cache.get_stats(),
+            "open_sessions": sum(1 for s in self.sessions.values() if not s.closed),
+        }
+
+    async def close(self):
+        for session in self.sessions.values():
+            if not session.closed:
+                await session.close()
+        self.sessions.clear()
+
+
+def _retry_after(headers: Dict) -> float:
+    try:
+        return float(headers.get("Retry-After", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+_shared_client: Optional[HTTPClient] = None
+
+
+def get_http_client() -> HTTPClient:
+    """Client partagé par tout le process"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = HTTPClient()
+    return _shared_client
+
+
+async def close_http_client():
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.close()
+        _shared_client = None
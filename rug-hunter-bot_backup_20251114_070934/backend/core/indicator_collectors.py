@@ -0,0 +1,512 @@
+"""Collecteurs d'indicateurs EVM (contrat, holders, swaps, deployer, LP, simulation)"""
+import logging
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from core.deployer_index import DeployerIndex
+from core.detector import NATIVE_PRICES, WRAPPED_NATIVE
+from core.evm_abi import decode_address, encode_call
+from core.indicators import IndicatorCollector, IndicatorContext, IndicatorPipeline
+from core.lp_lock_analyzer import LPLockAnalyzer
+from core.swap_flow import SwapFlowEngine
+from core.swap_simulator import SwapSimulator
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+SWAP_TOPIC = "0xd78ad95fa46c994b6551d0da85fc275fe613ce37657fb8d5e3d130840159d822"
+OWNERSHIP_TRANSFERRED_TOPIC = "0x8be0079c531659141344cd1fd0a4f28419497f9722a3daafe3b4186f6b6457e0"
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+DEAD_ADDRESS = "0x000000000000000000000000000000000000dead"
+BURN_ADDRESSES = {ZERO_ADDRESS, DEAD_ADDRESS}
+
+# Temps de bloc moyen (secondes) et fenêtre de recherche des logs du token
+BLOCK_TIMES = {"ETH": 12, "BSC": 3}
+LOG_LOOKBACK_BLOCKS = {"ETH": 1_500, "BSC": 6_000}
+SWAP_WINDOW_SECONDS = 300
+
+EXPLORER_APIS = {
+    "ETH": ("https://api.etherscan.io/api", "ETHERSCAN_API_KEY"),
+    "BSC": ("https://api.bscscan.com/api", "BSCSCAN_API_KEY"),
+}
+
+# Sélecteurs repérés dans le dispatcher du bytecode
+MINT_SELECTORS = {"40c10f19", "a0712d68"}                      # mint(address,uint256), mint(uint256)
+PAUSE_SELECTORS = {"8456cb59"}                                  # pause()
+BLACKLIST_SELECTORS = {
+    "f9f92be4",  # blacklist(address)
+    "44337ea1",  # addToBlacklist(address)
+    "153b0d1e",  # setBlacklist(address,bool)
+    "455a4396",  # blacklistAddress(address,bool)
+    "d34628cc",  # addBots(address[])
+    "b515566a",  # setBots(address[])
+}
+ADMIN_SELECTORS = MINT_SELECTORS | PAUSE_SELECTORS | BLACKLIST_SELECTORS | {
+    "3f4ba83a",  # unpause()
+    "52f7c988",  # setFee(uint256,uint256)
+    "0b78f9c0",  # setFees(uint256,uint256)
+    "061c82d0",  # setTaxFeePercent(uint256)
+    "dc1052e2",  # setBuyTax(uint256)
+    "8cd09d50",  # setSellTax(uint256)
+    "6db79437",  # updateFees(uint256,uint256)
+    "ec28438a",  # setMaxTxAmount(uint256)
+    "d543dbeb",  # setMaxTxPercent(uint256)
+    "ea1644d5",  # setMaxWalletSize(uint256)
+    "437823ec",  # excludeFromFee(address)
+    "c2e5ec04",  # setTradingEnabled(bool)
+    "8a8c523c",  # enableTrading()
+    "c9567bf9",  # openTrading()
+    "3659cfe6",  # upgradeTo(address)
+    "3ccfd60b",  # withdraw()
+}
+
+OP_PUSH1, OP_PUSH4, OP_PUSH32 = 0x60, 0x63, 0x7f
+OP_DELEGATECALL, OP_SELFDESTRUCT = 0xf4, 0xff
+
+
+def scan_bytecode(code_hex: str) -> Dict:
+    """Désassemble le bytecode: sélecteurs PUSH4 et opcodes sensibles (hors données PUSH)"""
+    code = bytes.fromhex(code_hex[2:] if code_hex.startswith("0x") else code_hex)
+    # Métadonnées CBOR de solc en fin de code (longueur sur les 2 derniers octets): pas du code
+    if len(code) > 2:
+        metadata_len = int.from_bytes(code[-2:], "big") + 2
+        if metadata_len < len(code):
+            code = code[:-metadata_len]
+    selectors: Set[str] = set()
+    opcodes: Set[int] = set()
+
+    i = 0
+    while i < len(code):
+        op = code[i]
+        if OP_PUSH1 <= op <= OP_PUSH32:
+            size = op - OP_PUSH1 + 1
+            if op == OP_PUSH4:
+                selectors.add(code[i + 1:i + 5].hex())
+            i += size + 1
+            continue
+        opcodes.add(op)
+        i += 1
+
+    return {"selectors": selectors, "opcodes": opcodes, "size": len(code)}
+
+
+def _topic_address(topic: str) -> str:
+    return "0x" + topic[-40:].lower()
+
+
+async def _explorer(ctx: IndicatorContext, **params) -> Optional[list]:
+    """Appel API Etherscan/BscScan (None si pas de clé ou réponse vide)"""
+    url, key_name = EXPLORER_APIS.get(ctx.chain, (None, None))
+    api_key = ctx.config.get(key_name) if key_name else None
+    if not url or not api_key:
+        return None
+    resp = await ctx.http.get(url, params={**params, "apikey": api_key}, cache_ttl=300)
+    if resp.status != 200 or not isinstance(resp.data, dict) or resp.data.get("status") != "1":
+        return None
+    return resp.data.get("result")
+
+
+async def _token_transfers(ctx: IndicatorContext) -> List[Dict]:
+    """Logs Transfer du token depuis un peu avant la création de la paire (partagés)"""
+    async def fetch():
+        latest = await ctx.block_number()
+        creation = ctx.detection.get("block_number") or latest
+        start = max(0, min(creation, latest) - LOG_LOOKBACK_BLOCKS.get(ctx.chain, 1_500))
+        return await ctx.rpc("eth_getLogs", [{
+            "address": ctx.token,
+            "topics": [TRANSFER_TOPIC],
+            "fromBlock": hex(start),
+            "toBlock": hex(latest),
+        }]) or []
+    return await ctx.shared("token_transfers", fetch)
+
+
+async def _owner(ctx: IndicatorContext) -> Optional[str]:
+    """Owner du token: celui de la détection sinon owner() (partagé)"""
+    owner = ctx.detection.get("owner_address")
+    if owner and owner != "N/A":
+        return owner.lower()
+
+    async def fetch():
+        # Pas d'owner() (revert) ou RPC en échec: la tâche est partagée entre
+        # collecteurs, une exception ici les ferait tous échouer
+        try:
+            result = await ctx.rpc("eth_call", [{"to": ctx.token, "data": encode_call("owner")}, "latest"])
+        except Exception as e:
+            logger.debug(f"owner() unavailable for {ctx.token}: {e}")
+            return None
+        return decode_address(result) if result and result != "0x" else None
+    return await ctx.shared("owner", fetch)
+
+
+# ============================================================================
+# COLLECTEURS
+# ============================================================================
+
+class MarketCollector(IndicatorCollector):
+    """Liquidité, prix et âge: déjà calculés par le détecteur, aucun appel RPC"""
+
+    name = "market"
+    fields = ("liquidity_eth", "liquidity_usd", "market_cap_usd", "price_usd",
+              "total_supply", "age_minutes", "pair_creation_block")
+    deadline = 0.5
+
+    async def collect(self, ctx: IndicatorContext) -> Dict:
+        d = ctx.detection
+        detected_at = d.get("detection_time")
+        age_seconds = d.get("age_seconds", 0) + (time.time() - detected_at if detected_at else 0)
+        return {
+            "liquidity_eth": d.get("liquidity_native"),
+            "liquidity_usd": d.get("liquidity_usd"),
+            "market_cap_usd": d.get("market_cap_usd"),
+            "price_usd": d.get("price_usd"),
+            "total_supply": d.get("total_supply"),
+            "age_minutes": age_seconds / 60 if detected_at else None,
+            "pair_creation_block": d.get("block_number"),
+        }
+
+
+class ContractCollector(IndicatorCollector):
+    """Analyse du bytecode (dispatcher et opcodes) et du code source vérifié"""
+
+    name = "contract"
+    fields = ("ownership_renounced", "has_mint_function", "has_pause_function",
+              "has_blacklist_function", "has_proxy_pattern", "has_selfdestruct",
+              "admin_functions_count", "bytecode_suspicious", "contract_verified",
+              "compiler_version_recent", "external_calls_safe", "reentrancy_protected")
+    deadline = 3.0
+
+    async def collect(self, ctx: IndicatorContext) -> Dict:
+        code = await ctx.shared("code", lambda: ctx.rpc("eth_getCode", [ctx.token, "latest"]))
+        if not code or code == "0x":
+            return {}
+
+        scan = scan_bytecode(code)
+        selectors = scan["selectors"]
+        has_blacklist = bool(selectors & BLACKLIST_SELECTORS)
+        has_proxy = OP_DELEGATECALL in scan["opcodes"]
+        has_selfdestruct = OP_SELFDESTRUCT in scan["opcodes"]
+
+        owner = await _owner(ctx)
+        values = {
+            "ownership_renounced": owner in BURN_ADDRESSES if owner else ctx.detection.get("ownership_renounced"),
+            "has_mint_function": bool(selectors & MINT_SELECTORS),
+            "has_pause_function": bool(selectors & PAUSE_SELECTORS),
+            "has_blacklist_function": has_blacklist,
+            "has_proxy_pattern": has_proxy,
+            "has_selfdestruct": has_selfdestruct,
+            "admin_functions_count": len(selectors & ADMIN_SELECTORS),
+            # Un proxy minimal cache la logique; selfdestruct/blacklist sont des red flags directs
+            "bytecode_suspicious": has_selfdestruct or has_blacklist or (has_proxy and scan["size"] < 1_000),
+        }
+
+        source = await _explorer(ctx, module="contract", action="getsourcecode", address=ctx.token)
+        if source:
+            info = source[0]
+            text = info.get("SourceCode") or ""
+            values["contract_verified"] = bool(text)
+            if text:
+                version = (info.get("CompilerVersion") or "").lstrip("v")
+                values["compiler_version_recent"] = version.startswith("0.8")
+                values["reentrancy_protected"] = "nonReentrant" in text
+                values["external_calls_safe"] = "delegatecall" not in text and ".call{value" not in text
+
+        return values
+
+
+class HoldersCollector(IndicatorCollector):
+    """Balances reconstruites depuis les logs Transfer (tokens récents uniquement)"""
+
+    name = "holders"
+    fields = ("holder_count", "top10_holders_percent", "burned_percent",
+              "circulating_supply", "owner_balance_percent")
+    deadline = 4.0
+
+    async def collect(self, ctx: IndicatorContext) -> Dict:
+        logs = await _token_transfers(ctx)
+        balances: Dict[str, int] = defaultdict(int)
+        minted = 0
+
+        for log in logs:
+            topics = log.get("topics", [])
+            if len(topics) < 3:
+                continue
+            sender, receiver = _topic_address(topics[1]), _topic_address(topics[2])
+            amount = int(log.get("data", "0x0") or "0x0", 16)
+            if sender == ZERO_ADDRESS:
+                minted += amount
+            else:
+                balances[sender] -= amount
+            balances[receiver] += amount
+
+        total_supply = ctx.detection.get("total_supply") or minted
+        values = {"owner_balance_percent": ctx.detection.get("owner_balance_percent")}
+
+        # Mint hors de la fenêtre de logs: balances incomplètes, rien de fiable à publier
+        if not total_supply or minted < total_supply * 0.99:
+            return values
+
+        burned = sum(balances.get(a, 0) for a in BURN_ADDRESSES)
+        excluded = BURN_ADDRESSES | ({ctx.pair} if ctx.pair else set())
+        holders = sorted(
+            (b for a, b in balances.items() if b > 0 and a not in excluded), reverse=True
+        )
+
+        owner = await _owner(ctx)
+        if values["owner_balance_percent"] is None and owner:
+            values["owner_balance_percent"] = balances.get(owner, 0) / total_supply * 100
+
+        values.update({
+            "holder_count": len(holders),
+            "top10_holders_percent": sum(holders[:10]) / total_supply * 100,
+            "burned_percent": burned / total_supply * 100,
+            "circulating_supply": total_supply - burned,
+        })
+        return values
+
+
+class SwapsCollector(IndicatorCollector):
+    """Flux de swaps de la paire: 5 dernières minutes + premiers blocs (bots)"""
+
+    name = "swaps"
+    fields = ("volume_5min_usd", "buy_count_5min", "sell_count_5min", "unique_buyers_5min",
+              "price_change_5min_percent", "price_volatility_5min", "largest_buy_usd",
+              "largest_sell_usd", "whale_buys_count", "whale_sells_count",
+              "bot_wallets_detected", "coordinated_buying_detected", "owner_sells_post_launch")
+    deadline = 3.0
+
+    # Un swap "whale" pèse au moins 2% de la liquidité (min 500$)
+    WHALE_LIQUIDITY_SHARE = 0.02
+    WHALE_MIN_USD = 500
+    # Achats dans les N premiers blocs après la création de la paire: bots de lancement
+    SNIPE_BLOCKS = 2
+
+    def __init__(self, flow_engine: Optional[SwapFlowEngine] = None):
+        self.flow_engine = flow_engine
+
+    async def collect(self, ctx: IndicatorContext) -> Dict:
+        weth = WRAPPED_NATIVE.get(ctx.chain, "").lower()
+        if not ctx.pair or not weth:
+            return {}
+
+        latest = await ctx.block_number()
+        window_blocks = SWAP_WINDOW_SECONDS // BLOCK_TIMES.get(ctx.chain, 12)
+        creation = ctx.detection.get("block_number") or latest - window_blocks
+
+        # Paire suivie par le moteur de flux: fenêtres déjà agrégées, pas de getLogs
+        if self.flow_engine and self.flow_engine.is_warm(ctx.pair):
+            values = self.flow_engine.features(ctx.pair)
+            values.update(await self._owner_sells(ctx, creation))
+            return values
+        start = max(min(creation, latest - window_blocks), latest - LOG_LOOKBACK_BLOCKS.get(ctx.chain, 1_500))
+
+        logs = await ctx.rpc("eth_getLogs", [{
+            "address": ctx.pair, "topics": [SWAP_TOPIC],
+            "fromBlock": hex(start), "toBlock": hex(latest),
+        }]) or []
+
+        swaps = self._decode_swaps(logs, native_is_token0=weth < ctx.token,
+                                   decimals=ctx.detection.get("decimals", 18))
+        native_usd = NATIVE_PRICES.get(ctx.chain, 2000)
+        whale_usd = max(self.WHALE_MIN_USD,
+                        (ctx.detection.get("liquidity_usd") or 0) * self.WHALE_LIQUIDITY_SHARE)
+
+        window = [s for s in swaps if s["block"] >= latest - window_blocks]
+        buys = [s for s in window if s["is_buy"]]
+        sells = [s for s in window if not s["is_buy"]]
+        prices = [s["price"] for s in window if s["price"] > 0]
+        changes = [(b - a) / a * 100 for a, b in zip(prices, prices[1:])]
+
+        buyers_per_block: Dict[int, Set[str]] = defaultdict(set)
+        for s in swaps:
+            if s["is_buy"]:
+                buyers_per_block[s["block"]].add(s["to"])
+        snipers = set()
+        for block, buyers in buyers_per_block.items():
+            if block <= creation + self.SNIPE_BLOCKS:
+                snipers |= buyers
+
+        values = {
+            "volume_5min_usd": sum(s["native"] for s in window) * native_usd,
+            "buy_count_5min": len(buys),
+            "sell_count_5min": len(sells),
+            "unique_buyers_5min": len({s["to"] for s in buys}),
+            "price_change_5min_percent": (prices[-1] - prices[0]) / prices[0] * 100 if len(prices) > 1 else 0.0,
+            "price_volatility_5min": statistics.pstdev(changes) if len(changes) > 1 else 0.0,
+            "largest_buy_usd": max((s["native"] for s in buys), default=0) * native_usd,
+            "largest_sell_usd": max((s["native"] for s in sells), default=0) * native_usd,
+            "whale_buys_count": sum(1 for s in buys if s["native"] * native_usd >= whale_usd),
+            "whale_sells_count": sum(1 for s in sells if s["native"] * native_usd >= whale_usd),
+            "bot_wallets_detected": len(snipers),
+            "coordinated_buying_detected": any(len(b) >= 3 for b in buyers_per_block.values()),
+        }
+
+        values.update(await self._owner_sells(ctx, creation))
+        return values
+
+    @staticmethod
+    async def _owner_sells(ctx: IndicatorContext, creation: int) -> Dict:
+        owner = await _owner(ctx)
+        if not owner or owner in BURN_ADDRESSES:
+            return {}
+        transfers = await _token_transfers(ctx)
+        return {"owner_sells_post_launch": any(
+            len(t.get("topics", [])) >= 3
+            and _topic_address(t["topics"][1]) == owner
+            and _topic_address(t["topics"][2]) == ctx.pair
+            and int(t.get("blockNumber", "0x0"), 16) > creation
+            for t in transfers
+        )}
+
+    @staticmethod
+    def _decode_swaps(logs: List[Dict], native_is_token0: bool, decimals: int) -> List[Dict]:
+        swaps = []
+        for log in logs:
+            data = log.get("data", "0x")[2:]
+            if len(data) < 256 or len(log.get("topics", [])) < 3:
+                continue
+            a0_in, a1_in, a0_out, a1_out = (int(data[i:i + 64], 16) for i in range(0, 256, 64))
+            if native_is_token0:
+                native_in, native_out, token_in, token_out = a0_in, a0_out, a1_in, a1_out
+            else:
+                native_in, native_out, token_in, token_out = a1_in, a1_out, a0_in, a0_out
+
+            is_buy = native_in > 0 and token_out > 0
+            native = (native_in if is_buy else native_out) / 10 ** 18
+            tokens = (token_out if is_buy else token_in) / 10 ** decimals
+            swaps.append({
+                "block": int(log.get("blockNumber", "0x0"), 16),
+                "to": _topic_address(log["topics"][2]),
+                "is_buy": is_buy,
+                "native": native,
+                "price": native / tokens if tokens else 0.0,
+            })
+        return swaps
+
+
+class DeployerCollector(IndicatorCollector):
+    """Deployer (via l'explorer), balances natives et transferts d'ownership"""
+
+    name = "deployer"
+    fields = ("deployer_address_age", "deployer_previous_tokens", "owner_is_deployer",
+              "owner_eth_balance", "contract_eth_balance", "ownership_transfers_count",
+              "suspicious_wallet_funding")
+    deadline = 4.0
+
+    def __init__(self, deployer_index: Optional[DeployerIndex] = None):
+        self.deployer_index = deployer_index
+
+    async def collect(self, ctx: IndicatorContext) -> Dict:
+        owner = await _owner(ctx)
+        latest = await ctx.block_number()
+        start = max(0, (ctx.detection.get("block_number") or latest) - LOG_LOOKBACK_BLOCKS.get(ctx.chain, 1_500))
+
+        calls = [
+            ("eth_getBalance", [ctx.token, "latest"]),
+            ("eth_getLogs", [{"address": ctx.token, "topics": [OWNERSHIP_TRANSFERRED_TOPIC],
+                              "fromBlock": hex(start), "toBlock": hex(latest)}]),
+        ]
+        if owner:
+            calls.append(("eth_getBalance", [owner, "latest"]))
+        results = await ctx.rpc_batch(calls)
+
+        values = {}
+        if results[0] is not None:
+            values["contract_eth_balance"] = int(results[0], 16) / 10 ** 18
+        if results[1] is not None:
+            # Le premier événement est l'attribution initiale dans le constructeur
+            values["ownership_transfers_count"] = max(0, len(results[1]) - 1)
+        if owner and results[2] is not None:
+            values["owner_eth_balance"] = int(results[2], 16) / 10 ** 18
+
+        # Déployeur connu de l'index (détecteur ou scan historique): pas d'appel explorer
+        index = self.deployer_index
+        deployer = ctx.detection.get("deployer") or (index.deployer_of(ctx.chain, ctx.token) if index else None)
+        if not deployer:
+            creation = await _explorer(ctx, module="contract", action="getcontractcreation",
+                                       contractaddresses=ctx.token)
+            if not creation:
+                return values
+            deployer = creation[0].get("contractCreator", "").lower()
+
+        if owner:
+            values["owner_is_deployer"] = deployer == owner
+        if index:
+            values["deployer_previous_tokens"] = index.reputation(ctx.chain, deployer, exclude_token=ctx.token)["tokens"]
+
+        first_txs = await _explorer(ctx, module="account", action="txlist", address=deployer,
+                                    startblock=0, endblock=99999999, page=1, offset=1, sort="asc")
+        if first_txs:
+            first = first_txs[0]
+            age_days = (time.time() - int(first.get("timeStamp", 0))) / 86400
+            values["deployer_address_age"] = age_days
+            # Wallet créé pour le lancement: financé il y a moins d'un jour
+            values["suspicious_wallet_funding"] = age_days < 1 and first.get("to", "").lower() == deployer
+            if index and first.get("to", "").lower() == deployer and first.get("from"):
+                index.record_funder(ctx.chain, deployer, first["from"])
+
+        return values
+
+
+class LPLockCollector(IndicatorCollector):
+    """LP brûlés et verrouillés (Unicrypt, Team.Finance, PinkLock) via un multicall"""
+
+    name = "lp_lock"
+    fields = ("lp_locked", "lp_lock_duration_days")
+    deadline = 2.0
+
+    def __init__(self, analyzer: Optional[LPLockAnalyzer] = None):
+        self.analyzer = analyzer
+
+    async def collect(self, ctx: IndicatorContext) -> Dict:
+        if not ctx.pair or not self.analyzer:
+            return {}
+        result = await self.analyzer.analyze(ctx.chain, ctx.pair)
+        if not result:
+            return {}
+        return {"lp_locked": result["lp_locked"], "lp_lock_duration_days": result["lp_lock_duration_days"]}
+
+
+class SimulationCollector(IndicatorCollector):
+    """Taxes et gas réels via la simulation achat/vente"""
+
+    name = "simulation"
+    fields = ("can_buy", "can_sell", "buy_gas_used", "sell_gas_used",
+              "buy_tax_real", "sell_tax_real", "slippage_tolerance")
+    deadline = 4.0
+
+    def __init__(self, simulator: SwapSimulator):
+        self.simulator = simulator
+
+    async def collect(self, ctx: IndicatorContext) -> Dict:
+        result = await self.simulator.simulate(ctx.token, ctx.chain, ctx.detection.get("dex"))
+        if not result:
+            return {}
+        return {
+            "can_buy": result["can_buy"],
+            "can_sell": result["can_sell"],
+            "buy_gas_used": result["buy_gas"],
+            "sell_gas_used": result["sell_gas"],
+            "buy_tax_real": result["buy_tax"],
+            "sell_tax_real": result["sell_tax"],
+            # Slippage nécessaire pour passer achat + vente (taxes + 2% de marge)
+            "slippage_tolerance": result["buy_tax"] + result["sell_tax"] + 2,
+        }
+
+
+def build_default_pipeline(simulator: SwapSimulator, deadlines: Optional[Dict[str, float]] = None,
+                           flow_engine: Optional[SwapFlowEngine] = None,
+                           deployer_index: Optional[DeployerIndex] = None,
+                           lp_lock_analyzer: Optional[LPLockAnalyzer] = None) -> IndicatorPipeline:
+    return IndicatorPipeline([
+        MarketCollector(),
+        ContractCollector(),
+        HoldersCollector(),
+        SwapsCollector(flow_engine),
+        DeployerCollector(deployer_index),
+        LPLockCollector(lp_lock_analyzer),
+        SimulationCollector(simulator),
+    ], deadlines=deadlines)
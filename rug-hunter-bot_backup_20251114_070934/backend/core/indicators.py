@@ -0,0 +1,169 @@
+"""
+📐 Indicator Pipeline - collecteurs indépendants et concurrents
+Chaque collecteur déclare les champs qu'il remplit et a sa propre deadline;
+le rapport final liste les champs qui n'ont pas pu être remplis et pourquoi.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from core.http_client import HTTPClient, get_http_client
+
+logger = logging.getLogger(__name__)
+
+
+class IndicatorContext:
+    """
+    Données partagées par les collecteurs d'une même analyse:
+    la détection (déjà récupérée par le détecteur) et un mémo des
+    lectures RPC communes (une seule requête même si plusieurs collecteurs la demandent).
+    """
+
+    def __init__(self, token_address: str, chain: str, rpc_url: str,
+                 pair_address: Optional[str] = None, detection: Optional[Dict] = None,
+                 http_client: Optional[HTTPClient] = None, config: Optional[Dict] = None):
+        self.token = token_address.lower()
+        self.chain = chain
+        self.rpc_url = rpc_url
+        self.pair = (pair_address or (detection or {}).get("pair_address") or "").lower() or None
+        self.detection = detection or {}
+        self.http = http_client or get_http_client()
+        self.config = config or {}
+        self._shared: Dict[str, asyncio.Task] = {}
+        self.rpc_calls = 0
+
+    def shared(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Awaitable[Any]:
+        """Résultat mémorisé: la première demande lance `factory`, les suivantes l'attendent"""
+        task = self._shared.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._shared[key] = task
+        return asyncio.shield(task)
+
+    async def rpc(self, method: str, params: list) -> Any:
+        self.rpc_calls += 1
+        resp = await self.http.post_rpc(self.rpc_url, json={
+            "jsonrpc": "2.0", "id": 1, "method": method, "params": params
+        })
+        if resp.status != 200 or not isinstance(resp.data, dict):
+            raise RuntimeError(f"{method} HTTP {resp.status}")
+        if "error" in resp.data:
+            raise RuntimeError(f"{method}: {resp.data['error'].get('message')}")
+        return resp.data.get("result")
+
+    async def rpc_batch(self, calls: List[tuple]) -> List[Any]:
+        """Plusieurs appels (method, params) en un seul aller-retour; None en cas d'erreur"""
+        if not calls:
+            return []
+        self.rpc_calls += 1
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        resp = await self.http.post_rpc(self.rpc_url, json=payload)
+        if resp.status != 200 or not isinstance(resp.data, list):
+            raise RuntimeError(f"RPC batch HTTP {resp.status}")
+        by_id = {item.get("id"): item for item in resp.data}
+        return [by_id.get(i, {}).get("result") for i in range(len(calls))]
+
+    async def block_number(self) -> int:
+        result = await self.shared("block_number", lambda: self.rpc("eth_blockNumber", []))
+        return int(result, 16)
+
+    def cleanup(self):
+        for task in self._shared.values():
+            if not task.done():
+                task.cancel()
+
+
+class IndicatorCollector:
+    """Base des collecteurs: `fields` liste les indicateurs remplis, `deadline` en secondes"""
+
+    name = "base"
+    fields: tuple = ()
+    deadline = 3.0
+
+    async def collect(self, ctx: IndicatorContext) -> Dict:
+        raise NotImplementedError
+
+
+class IndicatorPipeline:
+    """Exécute les collecteurs en parallèle, chacun borné par sa deadline"""
+
+    def __init__(self, collectors: List[IndicatorCollector], deadlines: Optional[Dict[str, float]] = None):
+        self.collectors = collectors
+        self.deadlines = deadlines or {}
+        self.stats: Dict[str, Dict] = {
+            c.name: {"runs": 0, "timeouts": 0, "errors": 0, "total_ms": 0.0, "missing_fields": 0, "skipped": 0}
+            for c in collectors
+        }
+
+    @property
+    def fields(self) -> List[str]:
+        return [f for c in self.collectors for f in c.fields]
+
+    async def run(self, ctx: IndicatorContext, needed: Optional[Set[str]] = None) -> Dict:
+        """
+        Retourne {"indicators": {...}, "report": {...}}.
+        Un champ absent de "indicators" n'a pas pu être collecté; le rapport
+        indique par collecteur le statut et les champs manquants.
+        `needed`: champs utiles (modèle actif + analyse); un collecteur qui n'en
+        remplit aucun n'est pas lancé et ses champs sont listés dans "skipped".
+        """
+        collectors = [c for c in self.collectors if needed is None or needed.intersection(c.fields)]
+        results = await asyncio.gather(*(self._run_one(c, ctx) for c in collectors))
+        ctx.cleanup()
+
+        indicators: Dict[str, Any] = {}
+        report = {"collectors": {}, "missing": [], "skipped": [], "rpc_calls": ctx.rpc_calls}
+
+        for collector in self.collectors:
+            if collector not in collectors:
+                self.stats[collector.name]["skipped"] += 1
+                report["collectors"][collector.name] = {"status": "skipped", "ms": 0.0, "missing": []}
+                report["skipped"].extend(collector.fields)
+
+        for collector, (status, values, elapsed_ms, error) in zip(collectors, results):
+            values = {k: v for k, v in (values or {}).items() if v is not None}
+            missing = [f for f in collector.fields if f not in values]
+            indicators.update(values)
+
+            report["collectors"][collector.name] = {
+                "status": status,
+                "ms": round(elapsed_ms, 1),
+                "missing": missing,
+                **({"error": error} if error else {}),
+            }
+            report["missing"].extend(missing)
+            self.stats[collector.name]["missing_fields"] += len(missing)
+
+        return {"indicators": indicators, "report": report}
+
+    async def _run_one(self, collector: IndicatorCollector, ctx: IndicatorContext):
+        stats = self.stats[collector.name]
+        stats["runs"] += 1
+        deadline = self.deadlines.get(collector.name, collector.deadline)
+        start = time.perf_counter()
+
+        try:
+            values = await asyncio.wait_for(collector.collect(ctx), timeout=deadline)
+            status, error = "ok", None
+        except asyncio.TimeoutError:
+            values, status, error = None, "timeout", f"deadline {deadline}s exceeded"
+            stats["timeouts"] += 1
+        except Exception as e:
+            values, status, error = None, "error", str(e)
+            stats["errors"] += 1
+            logger.debug(f"Collector {collector.name} failed for {ctx.token}: {e}")
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        stats["total_ms"] += elapsed_ms
+        return status, values, elapsed_ms, error
+
+    def get_stats(self) -> Dict:
+        return {
+            name: {**s, "avg_ms": round(s["total_ms"] / s["runs"], 1) if s["runs"] else 0}
+            for name, s in self.stats.items()
+        }
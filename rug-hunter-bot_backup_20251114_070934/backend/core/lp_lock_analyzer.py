@@ -0,0 +1,229 @@
+"""
+🔒 LP Lock Analyzer - LP brûlés et verrouillés (Unicrypt, Team.Finance, PinkLock)
+Toutes les lectures d'une paire passent par un seul Multicall3.aggregate3;
+le résultat reste en cache jusqu'au prochain Transfer du token LP.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from core.cache import TTLCache
+from core.evm_abi import (MULTICALL3_ADDRESS, decode_aggregate3, decode_uint, decode_uint_array,
+                          encode_aggregate3, encode_call, words)
+from core.http_client import HTTPClient, get_http_client
+
+logger = logging.getLogger(__name__)
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+DEAD_ADDRESS = "0x000000000000000000000000000000000000dead"
+
+LOCKERS = {
+    "ETH": {
+        "unicrypt": "0x663A5C229c09b049E36dCc11a9B0d4a8Eb9db214",
+        "team_finance": "0xE2fE530C047f2d85298b07D9333C05737f1435fB",
+        "pinklock": "0x71B5759d73262FBb223956913ecF4ecC51057641",
+    },
+    "BSC": {
+        "unicrypt": "0xC765bddB93b0D1c1A88282BA0fa6B2d00E3e0c83",
+        "team_finance": "0x0C89C0407775dd89b12918B9c0aa42Bf96518820",
+        "pinklock": "0x407993575c91ce7643a4d4cCACc9A98c36eE1BBE",
+    },
+}
+
+# Nombre de verrous lus par locker (les index hors bornes échouent sans bloquer le multicall)
+UNICRYPT_MAX_LOCKS = 5
+PINKLOCK_MAX_LOCKS = 10
+TEAM_FINANCE_MAX_DEPOSITS = 10
+
+# Part de LP brûlée ou verrouillée à partir de laquelle la liquidité est considérée bloquée
+LOCKED_SHARE_THRESHOLD = 0.95
+BURNED_LOCK_DAYS = 36500
+
+# Paires hors du moteur de flux: pas de Transfer observé, le cache expire quand même
+DEFAULT_CACHE_TTL = 300
+
+
+class LPLockAnalyzer:
+    def __init__(self, rpc_manager, http_client: Optional[HTTPClient] = None,
+                 cache_ttl: float = DEFAULT_CACHE_TTL, cache_size: int = 5000):
+        self.rpc_manager = rpc_manager
+        self.http = http_client or get_http_client()
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.stats = {"multicalls": 0, "followups": 0, "invalidations": 0, "errors": 0}
+
+    def invalidate(self, chain: str, pair_address: str):
+        """Appelé sur un Transfer du token LP (lock, unlock, burn, retrait)"""
+        if self.cache.pop(f"{chain}:{pair_address.lower()}") is not None:
+            self.stats["invalidations"] += 1
+
+    async def analyze(self, chain: str, pair_address: str) -> Optional[Dict]:
+        key = f"{chain}:{pair_address.lower()}"
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._in_flight.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._analyze(chain, pair_address.lower()))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._in_flight.pop(k, None))
+
+        result = await asyncio.shield(task)
+        if result is not None and key not in self.cache:
+            self.cache.set(key, result)
+        return result
+
+    async def _multicall(self, rpc_url: str, calls: List[Tuple[str, str]]) -> List[Tuple[bool, str]]:
+        resp = await self.http.post_rpc(rpc_url, json={
+            "jsonrpc": "2.0", "id": 1, "method": "eth_call",
+            "params": [{"to": MULTICALL3_ADDRESS,
+                        "data": encode_aggregate3([(target, True, data) for target, data in calls])}, "latest"]
+        })
+        if resp.status != 200 or not isinstance(resp.data, dict) or "result" not in resp.data:
+            raise RuntimeError(f"multicall failed ({resp.status})")
+        return decode_aggregate3(resp.data["result"])
+
+    async def _analyze(self, chain: str, pair: str) -> Optional[Dict]:
+        rpc_url = self.rpc_manager.get(chain)
+        if not rpc_url:
+            return None
+        lockers = {name: address.lower() for name, address in LOCKERS.get(chain, {}).items()}
+
+        calls = [
+            (pair, encode_call("totalSupply")),
+            (pair, encode_call("balanceOf", [("address", DEAD_ADDRESS)])),
+            (pair, encode_call("balanceOf", [("address", ZERO_ADDRESS)])),
+        ]
+        calls += [(pair, encode_call("balanceOf", [("address", address)])) for address in lockers.values()]
+        record_calls: Dict[str, Tuple[int, int]] = {}
+
+        def add(name: str, items: List[Tuple[str, str]]):
+            record_calls[name] = (len(calls), len(items))
+            calls.extend(items)
+
+        if "unicrypt" in lockers:
+            add("unicrypt", [(lockers["unicrypt"], encode_call("tokenLocks", [("address", pair), ("uint256", i)]))
+                             for i in range(UNICRYPT_MAX_LOCKS)])
+        if "team_finance" in lockers:
+            add("team_finance", [(lockers["team_finance"],
+                                  encode_call("getDepositsByTokenAddress", [("address", pair)]))])
+        if "pinklock" in lockers:
+            add("pinklock", [(lockers["pinklock"], encode_call(
+                "getLocksForToken", [("address", pair), ("uint256", 0), ("uint256", PINKLOCK_MAX_LOCKS - 1)]))])
+
+        try:
+            results = await self._multicall(rpc_url, calls)
+            self.stats["multicalls"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.debug(f"LP lock multicall failed for {pair}: {e}")
+            return None
+
+        def value(i: int) -> int:
+            ok, data = results[i] if i < len(results) else (False, "0x")
+            return decode_uint(data) if ok else 0
+
+        total = value(0)
+        if not total:
+            return None
+        burned = value(1) + value(2)
+        balances = {name: value(3 + i) for i, name in enumerate(lockers)}
+
+        now = time.time()
+        locks = []
+        if "unicrypt" in record_calls:
+            start, count = record_calls["unicrypt"]
+            for ok, data in results[start:start + count]:
+                fields = words(data) if ok else []
+                # (lockDate, amount, initialAmount, unlockDate, lockID, owner)
+                if len(fields) >= 4 and fields[1]:
+                    locks.append({"locker": "unicrypt", "amount": fields[1], "unlock_time": fields[3]})
+        if "pinklock" in record_calls:
+            start, _ = record_calls["pinklock"]
+            ok, data = results[start]
+            if ok:
+                locks.extend(self._decode_pinklock(data))
+        if "team_finance" in record_calls:
+            start, _ = record_calls["team_finance"]
+            ok, data = results[start]
+            deposit_ids = decode_uint_array(data)[-TEAM_FINANCE_MAX_DEPOSITS:] if ok else []
+            if deposit_ids:
+                locks.extend(await self._team_finance_locks(rpc_url, lockers["team_finance"], deposit_ids))
+
+        # Un verrou ne compte que tant qu'il court, et jamais au-delà du solde du locker
+        active = [lock for lock in locks if lock["unlock_time"] > now]
+        locked = 0
+        for name, balance in balances.items():
+            locked += min(balance, sum(lock["amount"] for lock in active if lock["locker"] == name))
+
+        burned_share = burned / total
+        locked_share = locked / total
+        is_locked = burned_share + locked_share >= LOCKED_SHARE_THRESHOLD
+        if burned_share >= LOCKED_SHARE_THRESHOLD:
+            duration_days = BURNED_LOCK_DAYS
+        elif is_locked and active:
+            # Durée garantie: jusqu'au premier déverrouillage
+            duration_days = (min(lock["unlock_time"] for lock in active) - now) / 86400
+        else:
+            duration_days = 0.0
+
+        return {
+            "lp_locked": is_locked,
+            "lp_lock_duration_days": duration_days,
+            "lp_burned_percent": burned_share * 100,
+            "lp_locked_percent": locked_share * 100,
+            "lockers": {name: balance / total * 100 for name, balance in balances.items() if balance},
+            "locks": [
+                {**lock, "percent": lock["amount"] / total * 100} for lock in active
+            ],
+        }
+
+    @staticmethod
+    def _decode_pinklock(data: str) -> List[Dict]:
+        """
+        Lock[] de PinkLock V2: (id, token, owner, amount, lockDate, tgeDate, tgeBps,
+        cycle, cycleBps, unlockedAmount, description). Chaque élément contient une
+        string: le tableau est une suite d'offsets.
+        """
+        values = words(data)
+        if len(values) < 2:
+            return []
+        start = values[0] // 32
+        length = values[start] if start < len(values) else 0
+        locks = []
+        for i in range(length):
+            item = start + 1 + values[start + 1 + i] // 32
+            fields = values[item:item + 10]
+            if len(fields) < 10:
+                break
+            amount = fields[3] - fields[9]
+            if amount > 0:
+                locks.append({"locker": "pinklock", "amount": amount, "unlock_time": fields[5]})
+        return locks
+
+    async def _team_finance_locks(self, rpc_url: str, locker: str, deposit_ids: List[int]) -> List[Dict]:
+        """Seconde lecture: les ids de dépôts ne sont connus qu'après le premier multicall"""
+        try:
+            results = await self._multicall(rpc_url, [
+                (locker, encode_call("lockedToken", [("uint256", deposit_id)])) for deposit_id in deposit_ids
+            ])
+            self.stats["followups"] += 1
+        except Exception as e:
+            logger.debug(f"Team.Finance lookup failed: {e}")
+            return []
+
+        locks = []
+        for ok, data in results:
+            fields = words(data) if ok else []
+            # (tokenAddress, withdrawalAddress, tokenAmount, unlockTime, withdrawn)
+            if len(fields) >= 5 and not fields[4] and fields[2]:
+                locks.append({"locker": "team_finance", "amount": fields[2], "unlock_time": fields[3]})
+        return locks
+
+    def get_stats(self) -> Dict:
+        stats = self.cache.get_stats()
+        stats.update(self.stats)
+        return stats
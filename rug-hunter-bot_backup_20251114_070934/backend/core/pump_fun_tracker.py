@@ -0,0 +1,292 @@
+"""
+🎢 Pump.fun Bonding Curve Tracker
+Garde en mémoire l'état des bonding curves des mints Pump.fun récents
+et émet un événement quand une curve approche de la migration vers Raydium
+"""
+
+import asyncio
+import base64
+import bisect
+import json
+import logging
+import struct
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from core.solana_account_loader import SolanaAccountLoader
+
+logger = logging.getLogger(__name__)
+
+PUMP_FUN_PROGRAM = "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
+
+# Layout BondingCurve (Anchor): discriminator(8) | virtual_token_reserves u64 |
+# virtual_sol_reserves u64 | real_token_reserves u64 | real_sol_reserves u64 |
+# token_total_supply u64 | complete bool
+BONDING_CURVE_LAYOUT = struct.Struct("<8sQQQQQ?")
+
+# Réserve réelle de tokens au lancement (793.1M tokens, 6 décimales).
+# La curve migre vers Raydium quand cette réserve tombe à zéro.
+INITIAL_REAL_TOKEN_RESERVES = 793_100_000_000_000
+
+LAMPORTS_PER_SOL = 1_000_000_000
+
+
+def parse_bonding_curve(data: bytes) -> Optional[Dict]:
+    """Décode un compte BondingCurve brut"""
+    if len(data) < BONDING_CURVE_LAYOUT.size:
+        return None
+
+    (_disc, virtual_token, virtual_sol, real_token,
+     real_sol, total_supply, complete) = BONDING_CURVE_LAYOUT.unpack_from(data, 0)
+
+    remaining = min(1.0, real_token / INITIAL_REAL_TOKEN_RESERVES)
+    return {
+        "virtual_token_reserves": virtual_token,
+        "virtual_sol_reserves": virtual_sol,
+        "real_token_reserves": real_token,
+        "real_sol_reserves": real_sol,
+        "token_total_supply": total_supply,
+        "complete": complete,
+        # 0.0 = vient de lancer, 1.0 = prête à migrer
+        "progress": 1.0 if complete else 1.0 - remaining,
+        "price_sol": (virtual_sol / virtual_token) / 1000 if virtual_token else 0,
+        "real_sol": real_sol / LAMPORTS_PER_SOL,
+    }
+
+
+class PumpFunCurveTracker:
+    """
+    État en mémoire des bonding curves Pump.fun.
+
+    Un index trié (distance à la graduation, mint) permet de répondre en
+    O(log n) à "quels tokens sont à moins de X% de la migration".
+    Les mises à jour viennent soit de polls groupés (getMultipleAccounts via
+    le loader partagé), soit d'abonnements accountSubscribe.
+    """
+
+    def __init__(self, account_loader: SolanaAccountLoader, max_tracked: int = 5000,
+                 poll_interval: float = 2.0, alert_thresholds: List[float] = None,
+                 ws_url: Optional[str] = None, max_queued_events: int = 1000):
+        self.loader = account_loader
+        self.max_tracked = max_tracked
+        self.poll_interval = poll_interval
+        # Seuils de progression déclenchant un événement (une seule fois par mint)
+        self.alert_thresholds = sorted(alert_thresholds or [0.90, 0.95])
+        self.ws_url = ws_url
+
+        # Borné: sans consommateur, les événements les plus anciens sont abandonnés
+        self.event_queue = asyncio.Queue(maxsize=max_queued_events)
+        self.curves: "OrderedDict[str, Dict]" = OrderedDict()  # mint -> état
+        self.curve_to_mint: Dict[str, str] = {}
+        self._index: List[tuple] = []  # trié par (1 - progress, mint)
+        self.running = False
+
+        self.stats = {"updates": 0, "events": 0, "evicted": 0, "graduated": 0, "dropped_events": 0}
+
+    # ------------------------------------------------------------------
+    # Enregistrement
+    # ------------------------------------------------------------------
+
+    def track(self, mint: str, bonding_curve: str, metadata: Optional[Dict] = None):
+        """Commence le suivi d'une curve (idempotent)"""
+        if not mint or not bonding_curve or mint in self.curves:
+            return
+
+        self.curves[mint] = {
+            "mint": mint,
+            "bonding_curve": bonding_curve,
+            "progress": None,
+            "alerted": set(),
+            "added_at": time.time(),
+            "updated_at": None,
+            "metadata": metadata or {},
+        }
+        self.curve_to_mint[bonding_curve] = mint
+
+        while len(self.curves) > self.max_tracked:
+            oldest = next(iter(self.curves))
+            self.untrack(oldest)
+            self.stats["evicted"] += 1
+
+    def untrack(self, mint: str):
+        state = self.curves.pop(mint, None)
+        if not state:
+            return
+        self.curve_to_mint.pop(state["bonding_curve"], None)
+        self._remove_from_index(mint, state["progress"])
+
+    # ------------------------------------------------------------------
+    # Mises à jour
+    # ------------------------------------------------------------------
+
+    def apply_account_data(self, bonding_curve: str, data: bytes):
+        """Applique un nouvel état de compte (poll ou notification websocket)"""
+        mint = self.curve_to_mint.get(bonding_curve)
+        if not mint:
+            return
+
+        parsed = parse_bonding_curve(data)
+        if not parsed:
+            return
+
+        state = self.curves[mint]
+        old_progress = state["progress"]
+        if old_progress != parsed["progress"]:
+            self._remove_from_index(mint, old_progress)
+            bisect.insort(self._index, (1.0 - parsed["progress"], mint))
+
+        state.update(parsed)
+        state["updated_at"] = time.time()
+        self.stats["updates"] += 1
+
+        self._check_thresholds(state)
+
+    def _remove_from_index(self, mint: str, progress: Optional[float]):
+        if progress is None:
+            return
+        key = (1.0 - progress, mint)
+        i = bisect.bisect_left(self._index, key)
+        if i < len(self._index) and self._index[i] == key:
+            del self._index[i]
+
+    def _check_thresholds(self, state: Dict):
+        progress = state["progress"]
+
+        if state.get("complete"):
+            self._emit("CURVE_COMPLETE", state)
+            self.stats["graduated"] += 1
+            # La curve a migré: plus rien à suivre
+            self.untrack(state["mint"])
+            return
+
+        for threshold in self.alert_thresholds:
+            if progress >= threshold and threshold not in state["alerted"]:
+                state["alerted"].add(threshold)
+                self._emit("CURVE_NEAR_MIGRATION", state, threshold=threshold)
+
+    def _emit(self, event_type: str, state: Dict, **extra):
+        event = {
+            "type": event_type,
+            "mint": state["mint"],
+            "bonding_curve": state["bonding_curve"],
+            "progress": state["progress"],
+            "real_sol": state.get("real_sol", 0),
+            "price_sol": state.get("price_sol", 0),
+            "timestamp": time.time(),
+            **extra,
+        }
+        if self.event_queue.full():
+            self.event_queue.get_nowait()
+            self.stats["dropped_events"] += 1
+        self.event_queue.put_nowait(event)
+        self.stats["events"] += 1
+        logger.info(f"🎢 {event_type}: {state['mint']} ({state['progress'] * 100:.1f}%)")
+
+    # ------------------------------------------------------------------
+    # Requêtes
+    # ------------------------------------------------------------------
+
+    def near_graduation(self, within: float = 0.10) -> List[str]:
+        """Mints dont la progression est à moins de `within` de la migration"""
+        end = bisect.bisect_right(self._index, (within, "\uffff"))
+        return [mint for _, mint in self._index[:end]]
+
+    def get_state(self, mint: str) -> Optional[Dict]:
+        return self.curves.get(mint)
+
+    # ------------------------------------------------------------------
+    # Sources de mises à jour
+    # ------------------------------------------------------------------
+
+    async def poll_loop(self):
+        """Relit toutes les curves suivies (lots de 100 via le loader)"""
+        self.running = True
+        logger.info("🎢 Pump.fun curve tracker started (poll mode)")
+
+        while self.running:
+            try:
+                curves = [s["bonding_curve"] for s in self.curves.values()]
+                if curves:
+                    accounts = await self.loader.get_accounts(curves)
+                    for curve, account in zip(curves, accounts):
+                        if account and account["owner"] == PUMP_FUN_PROGRAM:
+                            self.apply_account_data(curve, account["data"])
+                await asyncio.sleep(self.poll_interval)
+            except Exception as e:
+                logger.error(f"Curve poll error: {e}")
+                await asyncio.sleep(self.poll_interval * 2)
+
+    async def subscribe_loop(self):
+        """Abonnements accountSubscribe sur le websocket RPC"""
+        if not self.ws_url:
+            return await self.poll_loop()
+
+        self.running = True
+        logger.info("🎢 Pump.fun curve tracker started (websocket mode)")
+
+        while self.running:
+            try:
+                session = await self.loader.get_session()
+                async with session.ws_connect(self.ws_url, heartbeat=30) as ws:
+                    await self._run_subscriptions(ws)
+            except Exception as e:
+                logger.error(f"Curve websocket error: {e}")
+                await asyncio.sleep(5)
+
+    async def _run_subscriptions(self, ws):
+        request_to_curve: Dict[int, str] = {}
+        subscription_to_curve: Dict[int, str] = {}
+        subscribed = set()
+        next_id = 1
+
+        while self.running:
+            # Abonner les nouvelles curves
+            for state in list(self.curves.values()):
+                curve = state["bonding_curve"]
+                if curve in subscribed:
+                    continue
+                await ws.send_str(json.dumps({
+                    "jsonrpc": "2.0",
+                    "id": next_id,
+                    "method": "accountSubscribe",
+                    "params": [curve, {"encoding": "base64", "commitment": "confirmed"}]
+                }))
+                request_to_curve[next_id] = curve
+                subscribed.add(curve)
+                next_id += 1
+
+            try:
+                msg = await ws.receive(timeout=1.0)
+            except asyncio.TimeoutError:
+                continue
+
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                if msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    return
+                continue
+
+            data = json.loads(msg.data)
+            if "id" in data and "result" in data:
+                curve = request_to_curve.pop(data["id"], None)
+                if curve:
+                    subscription_to_curve[data["result"]] = curve
+            elif data.get("method") == "accountNotification":
+                params = data.get("params", {})
+                curve = subscription_to_curve.get(params.get("subscription"))
+                value = params.get("result", {}).get("value") or {}
+                if curve and value.get("data"):
+                    self.apply_account_data(curve, base64.b64decode(value["data"][0]))
+
+    def stop(self):
+        self.running = False
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats["tracked"] = len(self.curves)
+        stats["indexed"] = len(self._index)
+        stats["queued_events"] = self.event_queue.qsize()
+        stats["mode"] = "websocket" if self.ws_url else "poll"
+        return stats
@@ -0,0 +1,241 @@
+"""
+📏 Rule Engine - seuils de sécurité et de trading déclaratifs
+Les règles (config/rules.json) sont compilées en une seule fonction Python par
+jeu de règles, avec sortie anticipée sur la première règle bloquante.
+Le fichier est relu à chaud dès que sa date de modification change.
+"""
+
+import ast
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = Path(__file__).parent.parent / "config" / "rules.json"
+
+# Fonctions utilisables dans les expressions
+SAFE_FUNCTIONS = {"abs": abs, "min": min, "max": max, "len": len, "round": round}
+
+ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod, ast.FloorDiv, ast.Pow,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn, ast.Is, ast.IsNot,
+    ast.IfExp, ast.Call, ast.Name, ast.Load, ast.Constant, ast.Tuple, ast.List, ast.Set,
+)
+
+
+class RuleError(ValueError):
+    pass
+
+
+class _NameRewriter(ast.NodeTransformer):
+    """Nom -> p['NOM'] pour un paramètre, v['nom'] pour une valeur évaluée"""
+
+    def __init__(self, params: Dict[str, Any]):
+        self.params = params
+
+    def visit_Name(self, node: ast.Name):
+        if node.id in SAFE_FUNCTIONS:
+            return node
+        source = "p" if node.id in self.params else "v"
+        return ast.copy_location(
+            ast.Subscript(value=ast.Name(id=source, ctx=ast.Load()), slice=ast.Constant(node.id), ctx=ast.Load()),
+            node,
+        )
+
+
+def _compile_expression(expr: str, params: Dict[str, Any]) -> str:
+    try:
+        tree = ast.parse(expr, mode="eval")
+    except SyntaxError as e:
+        raise RuleError(f"Invalid expression '{expr}': {e}")
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise RuleError(f"Forbidden syntax in '{expr}': {type(node).__name__}")
+        if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name) and node.func.id in SAFE_FUNCTIONS):
+            raise RuleError(f"Forbidden call in '{expr}'")
+    tree = ast.fix_missing_locations(_NameRewriter(params).visit(tree))
+    return ast.unparse(tree.body)
+
+
+class RuleSet:
+    """
+    Jeu de règles compilé. Une règle "block" fait échouer l'évaluation (sortie
+    immédiate); une règle "points" ajoute au score. Une erreur d'évaluation
+    (valeur manquante...) déclenche les règles bloquantes: on échoue fermé.
+    """
+
+    def __init__(self, name: str, spec: Dict):
+        self.name = name
+        self.params: Dict[str, Any] = dict(spec.get("params", {}))
+        self.defaults: Dict[str, Any] = dict(spec.get("defaults", {}))
+
+        rules = spec.get("rules", [])
+        # Règles bloquantes d'abord: le score n'a de sens que si rien ne bloque
+        self.rules: List[Dict] = [r for r in rules if r.get("block")] + [r for r in rules if not r.get("block")]
+        for i, rule in enumerate(self.rules):
+            if "name" not in rule or "when" not in rule:
+                raise RuleError(f"{name}: rule #{i} needs 'name' and 'when'")
+
+        self.hits = [0] * len(self.rules)
+        self.errors = [0] * len(self.rules)
+        self.elapsed_ns = [0] * len(self.rules)
+        self.evaluations = 0
+        self._evaluate = self._compile()
+
+    def _compile(self) -> Callable:
+        lines = [
+            "def _evaluate(v, p, hits, errors, elapsed, now):",
+            "    score = 0.0",
+            "    fired = []",
+            "    t = now()",
+        ]
+        for i, rule in enumerate(self.rules):
+            condition = _compile_expression(rule["when"], self.params)
+            failed = "True" if rule.get("block") else "False"
+            lines += [
+                "    try:",
+                f"        hit = bool({condition})",
+                "    except Exception:",
+                f"        errors[{i}] += 1",
+                f"        hit = {failed}",
+                "    t2 = now()",
+                f"    elapsed[{i}] += t2 - t",
+                "    t = t2",
+                "    if hit:",
+                f"        hits[{i}] += 1",
+                f"        fired.append({i})",
+            ]
+            if rule.get("block"):
+                lines.append(f"        return {i}, score, fired")
+            else:
+                lines.append(f"        score += {float(rule.get('points', 0))!r}")
+        lines.append("    return None, score, fired")
+
+        namespace = {"__builtins__": {}, "bool": bool, "Exception": Exception, **SAFE_FUNCTIONS}
+        exec(compile("\n".join(lines), f"<rules:{self.name}>", "exec"), namespace)
+        return namespace["_evaluate"]
+
+    def _message(self, index: int, values: Dict, params: Dict) -> str:
+        rule = self.rules[index]
+        template = rule.get("message", rule["name"])
+        try:
+            return template.format_map({**params, **values})
+        except (KeyError, ValueError, IndexError):
+            return template
+
+    def evaluate(self, values: Dict, params: Optional[Dict] = None) -> Dict:
+        params = {**self.params, **params} if params else self.params
+        values = {**self.defaults, **values} if self.defaults else values
+        self.evaluations += 1
+
+        blocked, score, fired = self._evaluate(values, params, self.hits, self.errors,
+                                               self.elapsed_ns, time.perf_counter_ns)
+        return {
+            "passed": blocked is None,
+            "blocked_by": self.rules[blocked]["name"] if blocked is not None else None,
+            "message": self._message(blocked, values, params) if blocked is not None else "OK",
+            "score": score,
+            "fired": [self.rules[i]["name"] for i in fired],
+        }
+
+    def messages(self, result: Dict, values: Dict, params: Optional[Dict] = None,
+                 tag: Optional[str] = None) -> List[str]:
+        """Messages lisibles des règles déclenchées (construits à la demande), filtrés par "tag" """
+        params = {**self.params, **params} if params else self.params
+        index = {rule["name"]: i for i, rule in enumerate(self.rules)}
+        return [self._message(index[name], {**self.defaults, **values}, params) for name in result["fired"]
+                if tag is None or self.rules[index[name]].get("tag") == tag]
+
+    def get_stats(self) -> Dict:
+        return {
+            "evaluations": self.evaluations,
+            "rules": {
+                rule["name"]: {
+                    "hits": self.hits[i],
+                    "errors": self.errors[i],
+                    "avg_us": round(self.elapsed_ns[i] / self.evaluations / 1000, 3) if self.evaluations else 0,
+                }
+                for i, rule in enumerate(self.rules)
+            },
+        }
+
+
+class RuleEngine:
+    """Charge config/rules.json et le recompile quand le fichier change"""
+
+    def __init__(self, path: Optional[str] = None, check_interval: float = 1.0):
+        self.path = Path(path) if path else DEFAULT_RULES_PATH
+        self.check_interval = check_interval
+        self.rulesets: Dict[str, RuleSet] = {}
+        self._mtime: Optional[float] = None
+        self._last_check = 0.0
+        self.reloads = 0
+        self.reload_errors = 0
+        self.reload()
+
+    def reload(self) -> bool:
+        """Recompile tout le fichier; en cas d'erreur les règles actuelles restent en place"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+            with open(self.path, encoding="utf-8") as f:
+                spec = json.load(f)
+            rulesets = {name: RuleSet(name, body) for name, body in spec.get("rulesets", {}).items()}
+        except (OSError, ValueError) as e:
+            self.reload_errors += 1
+            logger.error(f"❌ Rules not reloaded from {self.path}: {e}")
+            return False
+
+        self.rulesets = rulesets
+        self._mtime = mtime
+        self.reloads += 1
+        logger.info(f"📏 Rules loaded: {', '.join(rulesets)} ({self.path.name})")
+        return True
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return
+        if mtime != self._mtime:
+            # Mémorisé avant la relecture: un fichier invalide n'est retenté qu'à sa prochaine modification
+            self._mtime = mtime
+            self.reload()
+
+    def evaluate(self, ruleset: str, values: Dict, params: Optional[Dict] = None) -> Dict:
+        self._maybe_reload()
+        rules = self.rulesets.get(ruleset)
+        if rules is None:
+            raise RuleError(f"Unknown ruleset: {ruleset}")
+        return rules.evaluate(values, params)
+
+    def get(self, ruleset: str) -> Optional[RuleSet]:
+        self._maybe_reload()
+        return self.rulesets.get(ruleset)
+
+    def get_stats(self) -> Dict:
+        return {
+            "path": str(self.path),
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "rulesets": {name: rules.get_stats() for name, rules in self.rulesets.items()},
+        }
+
+
+_rule_engine: Optional[RuleEngine] = None
+
+
+def get_rule_engine() -> RuleEngine:
+    """Moteur partagé (config/rules.json)"""
+    global _rule_engine
+    if _rule_engine is None:
+        _rule_engine = RuleEngine()
+    return _rule_engine
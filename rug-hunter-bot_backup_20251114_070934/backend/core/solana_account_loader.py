@@ -0,0 +1,221 @@
+"""Solana Account Loader - Lectures groupées via getMultipleAccounts"""
+import asyncio
+import base64
+import logging
+import struct
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from core.http_client import HTTPClient, get_http_client
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PROGRAM = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+TOKEN_2022_PROGRAM = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
+
+# Limite imposée par le RPC Solana pour getMultipleAccounts
+MAX_ACCOUNTS_PER_REQUEST = 100
+
+# Layout SPL Mint (82 octets, identique pour Token-2022 hors extensions):
+# COption<Pubkey> mint_authority | u64 supply | u8 decimals | bool is_initialized | COption<Pubkey> freeze_authority
+SPL_MINT_LAYOUT = struct.Struct("<I32sQBBI32s")
+SPL_MINT_SIZE = SPL_MINT_LAYOUT.size
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def b58encode(raw: bytes) -> str:
+    """Encode des octets en base58 (format des clés publiques Solana)"""
+    value = int.from_bytes(raw, "big")
+    encoded = ""
+    while value:
+        value, remainder = divmod(value, 58)
+        encoded = _B58_ALPHABET[remainder] + encoded
+    leading_zeros = len(raw) - len(raw.lstrip(b"\x00"))
+    return "1" * leading_zeros + encoded
+
+
+def parse_mint_account(data: bytes) -> Optional[Dict]:
+    """Décode un compte SPL Mint brut (sans passer par jsonParsed)"""
+    if len(data) < SPL_MINT_SIZE:
+        return None
+
+    (mint_auth_tag, mint_auth, supply, decimals,
+     is_initialized, freeze_auth_tag, freeze_auth) = SPL_MINT_LAYOUT.unpack_from(data, 0)
+
+    return {
+        "mint_authority": b58encode(mint_auth) if mint_auth_tag == 1 else None,
+        "supply": supply,
+        "decimals": decimals,
+        "is_initialized": bool(is_initialized),
+        "freeze_authority": b58encode(freeze_auth) if freeze_auth_tag == 1 else None,
+    }
+
+
+class SolanaAccountLoader:
+    """
+    Regroupe les lectures de comptes de toutes les analyses concurrentes
+    en requêtes getMultipleAccounts (max 100 clés) sur une session partagée
+    """
+
+    def __init__(self, rpc_url: str = "https://api.mainnet-beta.solana.com",
+                 batch_window_ms: float = 10, max_batch_size: int = MAX_ACCOUNTS_PER_REQUEST,
+                 cache_ttl_seconds: float = 2.0, cache_size: int = 2048,
+                 http_client: Optional[HTTPClient] = None):
+        self.rpc_url = rpc_url
+        self.http = http_client or get_http_client()
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = min(max_batch_size, MAX_ACCOUNTS_PER_REQUEST)
+
+        # Cache très court: évite de relire le même mint deux fois dans une même analyse
+        self.cache_ttl = cache_ttl_seconds
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._flush_handle = None
+
+        self.stats = {
+            "requests": 0,
+            "accounts_requested": 0,
+            "accounts_coalesced": 0,
+            "cache_hits": 0,
+            "errors": 0,
+        }
+
+    async def get_session(self):
+        """Session poolée du client HTTP partagé pour le host RPC"""
+        return self.http.session_for(self.rpc_url)
+
+    async def get_account(self, pubkey: str) -> Optional[Dict]:
+        """
+        Retourne {"owner", "lamports", "data"} pour un compte, ou None s'il n'existe pas.
+        L'appel est mis en file et envoyé avec les autres lectures en attente.
+        """
+        cached = self._cache.get(pubkey)
+        if cached and time.monotonic() - cached[0] < self.cache_ttl:
+            self.stats["cache_hits"] += 1
+            return cached[1]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        if pubkey in self._pending:
+            self.stats["accounts_coalesced"] += 1
+            self._pending[pubkey].append(future)
+        else:
+            self._pending[pubkey] = [future]
+
+        self._schedule_flush(loop)
+        return await future
+
+    async def get_accounts(self, pubkeys: List[str]) -> List[Optional[Dict]]:
+        """Lit plusieurs comptes (regroupés dans le même lot si possible)"""
+        return await asyncio.gather(*(self.get_account(p) for p in pubkeys))
+
+    async def get_mint(self, mint_address: str) -> Optional[Dict]:
+        """Lit et décode un compte SPL Mint"""
+        account = await self.get_account(mint_address)
+        if not account or account["owner"] not in (TOKEN_PROGRAM, TOKEN_2022_PROGRAM):
+            return None
+        return parse_mint_account(account["data"])
+
+    def _schedule_flush(self, loop):
+        if len(self._pending) >= self.max_batch_size:
+            if self._flush_handle:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            loop.create_task(self._flush())
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(
+                self.batch_window, lambda: loop.create_task(self._flush())
+            )
+
+    async def _flush(self):
+        """Envoie les lectures en attente par lots de max_batch_size"""
+        self._flush_handle = None
+
+        while self._pending:
+            keys = list(self._pending)[:self.max_batch_size]
+            waiters = {k: self._pending.pop(k) for k in keys}
+
+            try:
+                accounts = await self._fetch_multiple(keys)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"getMultipleAccounts error ({len(keys)} keys): {e}")
+                for futures in waiters.values():
+                    for f in futures:
+                        if not f.done():
+                            f.set_exception(e)
+                continue
+
+            now = time.monotonic()
+            for key, account in zip(keys, accounts):
+                self._cache[key] = (now, account)
+                self._cache.move_to_end(key)
+                for f in waiters[key]:
+                    if not f.done():
+                        f.set_result(account)
+
+            # Aucun appelant ne doit rester suspendu, même sur une réponse incomplète
+            for futures in waiters.values():
+                for f in futures:
+                    if not f.done():
+                        f.set_result(None)
+
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def _fetch_multiple(self, keys: List[str]) -> List[Optional[Dict]]:
+        """Un appel getMultipleAccounts en encodage base64"""
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getMultipleAccounts",
+            "params": [keys, {"encoding": "base64", "commitment": "confirmed"}]
+        }
+
+        self.stats["requests"] += 1
+        self.stats["accounts_requested"] += len(keys)
+
+        resp = await self.http.post_rpc(self.rpc_url, json=payload)
+        if resp.status != 200:
+            raise RuntimeError(f"HTTP {resp.status}")
+        data = resp.data
+        if not isinstance(data, dict):
+            raise RuntimeError("Invalid getMultipleAccounts response")
+
+        if "error" in data:
+            raise RuntimeError(data["error"].get("message", "RPC error"))
+
+        values = (data.get("result") or {}).get("value")
+        if not isinstance(values, list) or len(values) != len(keys):
+            # Réponse tronquée: on n'associe pas des comptes aux mauvaises clés
+            raise RuntimeError(f"getMultipleAccounts returned {len(values) if isinstance(values, list) else 'no'} "
+                               f"accounts for {len(keys)} keys")
+        accounts = []
+        for value in values:
+            if value is None:
+                accounts.append(None)
+                continue
+            raw, _encoding = value.get("data", ["", "base64"])
+            accounts.append({
+                "owner": value.get("owner"),
+                "lamports": value.get("lamports", 0),
+                "data": base64.b64decode(raw),
+            })
+        return accounts
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats["pending"] = len(self._pending)
+        stats["avg_batch_size"] = (
+            stats["accounts_requested"] / stats["requests"] if stats["requests"] else 0
+        )
+        return stats
+
+    async def close(self):
+        """Les connexions appartiennent au client HTTP partagé: rien à fermer ici"""
+        self._cache.clear()
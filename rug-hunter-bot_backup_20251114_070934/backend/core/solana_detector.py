@@ -4,11 +4,16 @@ Surveille Raydium, Jupiter et Pump.fun pour détecter les nouveaux tokens SOL
 """
 
 import asyncio
-import aiohttp
 import logging
 from typing import Dict, Optional, List
 from datetime import datetime, timedelta
 
+from core.dexscreener_client import DexScreenerClient, get_dexscreener_client
+from core.http_client import HTTPClient, get_http_client
+from core.solana_account_loader import SolanaAccountLoader
+from core.solana_holders import SolanaHolderAnalytics
+from core.pump_fun_tracker import PumpFunCurveTracker
+
 logger = logging.getLogger(__name__)
 
 class SolanaTokenDetector:
@@ -20,10 +25,23 @@ class SolanaTokenDetector:
     - Orca (DEX)
     """
     
-    def __init__(self, rpc_url: str = "https://api.mainnet-beta.solana.com"):
+    def __init__(self, rpc_url: str = "https://api.mainnet-beta.solana.com",
+                 account_loader: Optional[SolanaAccountLoader] = None,
+                 holder_analytics: Optional[SolanaHolderAnalytics] = None,
+                 http_client: Optional[HTTPClient] = None,
+                 dexscreener: Optional[DexScreenerClient] = None,
+                 pump_fun_tracker: Optional[PumpFunCurveTracker] = None,
+                 max_queued_detections: int = 1000):
         self.rpc_url = rpc_url
-        self.session = None
+        self.http = http_client or get_http_client()
+        self.dexscreener = dexscreener or get_dexscreener_client()
+        self.account_loader = account_loader or SolanaAccountLoader(rpc_url, http_client=self.http)
+        self.holder_analytics = holder_analytics or SolanaHolderAnalytics(self.account_loader)
+        self.pump_fun_tracker = pump_fun_tracker or PumpFunCurveTracker(self.account_loader)
         self.seen_tokens = set()
+        # Détections prêtes, consommées par la boucle de traitement (borné: les plus anciennes sont abandonnées)
+        self.event_queue = asyncio.Queue(maxsize=max_queued_detections)
+        self.dropped_detections = 0
         
         # Adresses des programmes Solana importants
         self.RAYDIUM_PROGRAM = "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8"
@@ -31,24 +49,30 @@ class SolanaTokenDetector:
         self.PUMP_FUN_PROGRAM = "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
         self.ORCA_PROGRAM = "9W959DqEETiGZocYWCQPaJ6sBmUzgfxXfqGeTEdp3aQP"
         
-    async def get_session(self):
-        """Obtient ou crée une session aiohttp"""
-        if self.session is None:
-            self.session = aiohttp.ClientSession()
-        return self.session
-    
     async def start_detection(self):
-        """Démarre la détection multi-sources"""
+        """
+        Démarre la détection multi-sources: chaque moniteur (générateur async)
+        alimente event_queue. Le tracker Pump.fun et le rafraîchissement des
+        holders tournent dans leurs propres tâches (lifespan).
+        """
         logger.info("🌟 Starting Solana detection...")
         
-        tasks = [
+        monitors = [
             self.monitor_raydium(),
             self.monitor_jupiter(),
             self.monitor_pump_fun(),
-            self.monitor_dexscreener()
+            self.monitor_dexscreener(),
         ]
         
-        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*(self._drain(monitor) for monitor in monitors), return_exceptions=True)
+    
+    async def _drain(self, monitor):
+        """Pousse les détections d'un moniteur dans event_queue"""
+        async for token_data in monitor:
+            if self.event_queue.full():
+                self.event_queue.get_nowait()
+                self.dropped_detections += 1
+            self.event_queue.put_nowait(token_data)
     
     async def monitor_raydium(self):
         """Surveille les nouvelles paires sur Raydium"""
@@ -100,6 +124,9 @@ class SolanaTokenDetector:
                 new_launches = await self._fetch_pump_fun_launches()
                 
                 for launch in new_launches:
+                    # Suivi de la bonding curve jusqu'à la migration Raydium
+                    self.pump_fun_tracker.track(launch.get("mint"), launch.get("bonding_curve"), launch)
+                    
                     if launch["mint"] not in self.seen_tokens:
                         self.seen_tokens.add(launch["mint"])
                         token_data = await self.analyze_token(launch["mint"], "PUMP_FUN")
@@ -117,29 +144,23 @@ class SolanaTokenDetector:
         """Surveille DexScreener pour nouveaux tokens SOL"""
         while True:
             try:
-                session = await self.get_session()
-                url = "https://api.dexscreener.com/latest/dex/search?q=SOL"
+                pairs = await self.dexscreener.search("SOL")
                 
-                async with session.get(url) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        pairs = data.get("pairs", [])
+                for pair in pairs:
+                    if pair.get("chainId") == "solana":
+                        token_address = pair.get("baseToken", {}).get("address")
                         
-                        for pair in pairs:
-                            if pair.get("chainId") == "solana":
-                                token_address = pair.get("baseToken", {}).get("address")
-                                
-                                if token_address and token_address not in self.seen_tokens:
-                                    # Vérifier que c'est récent (< 30 min)
-                                    created_at = pair.get("pairCreatedAt")
-                                    if created_at:
-                                        created_time = datetime.fromtimestamp(created_at / 1000)
-                                        if datetime.now() - created_time < timedelta(minutes=30):
-                                            self.seen_tokens.add(token_address)
-                                            token_data = await self.analyze_token(token_address, "DEXSCREENER")
-                                            
-                                            if token_data:
-                                                yield token_data
+                        if token_address and token_address not in self.seen_tokens:
+                            # Vérifier que c'est récent (< 30 min)
+                            created_at = pair.get("pairCreatedAt")
+                            if created_at:
+                                created_time = datetime.fromtimestamp(created_at / 1000)
+                                if datetime.now() - created_time < timedelta(minutes=30):
+                                    self.seen_tokens.add(token_address)
+                                    token_data = await self.analyze_token(token_address, "DEXSCREENER")
+                                    
+                                    if token_data:
+                                        yield token_data
                 
                 await asyncio.sleep(5)
                 
@@ -196,8 +217,8 @@ class SolanaTokenDetector:
                 "price_change_1h": trading_data.get("price_change_1h", 0),
                 
                 # Holders
-                "holders": holders_data.get("count", 0),
-                "top10_holders_percent": holders_data.get("top10_percent", 100),
+                "holders": holders_data.get("count"),
+                "top10_holders_percent": holders_data.get("top10_percent"),
                 
                 # Sécurité
                 "freeze_authority": security_check.get("freeze_authority"),
@@ -225,24 +246,23 @@ class SolanaTokenDetector:
     async def _fetch_raydium_new_pairs(self) -> List[Dict]:
         """Récupère les nouvelles paires Raydium"""
         try:
-            session = await self.get_session()
             url = "https://api.raydium.io/v2/main/pairs"
             
-            async with session.get(url) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    # Filtrer les paires récentes (< 30 min)
-                    recent_pairs = []
-                    for pair in data:
-                        created = pair.get("poolOpenTime", 0)
-                        if created > 0:
-                            created_time = datetime.fromtimestamp(created)
-                            if datetime.now() - created_time < timedelta(minutes=30):
-                                recent_pairs.append({
-                                    "mint": pair.get("baseMint"),
-                                    "pair_address": pair.get("ammId")
-                                })
-                    return recent_pairs
+            resp = await self.http.get(url)
+            if resp.status == 200:
+                data = resp.data
+                # Filtrer les paires récentes (< 30 min)
+                recent_pairs = []
+                for pair in data:
+                    created = pair.get("poolOpenTime", 0)
+                    if created > 0:
+                        created_time = datetime.fromtimestamp(created)
+                        if datetime.now() - created_time < timedelta(minutes=30):
+                            recent_pairs.append({
+                                "mint": pair.get("baseMint"),
+                                "pair_address": pair.get("ammId")
+                            })
+                return recent_pairs
         except Exception as e:
             logger.error(f"Raydium fetch error: {e}")
         return []
@@ -250,14 +270,13 @@ class SolanaTokenDetector:
     async def _fetch_jupiter_new_tokens(self) -> List[Dict]:
         """Récupère les nouveaux tokens via Jupiter"""
         try:
-            session = await self.get_session()
             url = "https://token.jup.ag/all"
             
-            async with session.get(url) as resp:
-                if resp.status == 200:
-                    tokens = await resp.json()
-                    # Retourner tokens récents basé sur tags
-                    return [t for t in tokens if "new" in t.get("tags", [])][:50]
+            resp = await self.http.get(url)
+            if resp.status == 200:
+                tokens = resp.data
+                # Retourner tokens récents basé sur tags
+                return [t for t in tokens if "new" in t.get("tags", [])][:50]
         except Exception as e:
             logger.error(f"Jupiter fetch error: {e}")
         return []
@@ -265,13 +284,13 @@ class SolanaTokenDetector:
     async def _fetch_pump_fun_launches(self) -> List[Dict]:
         """Récupère les nouveaux lancements Pump.fun"""
         try:
-            session = await self.get_session()
             url = "https://frontend-api.pump.fun/coins/latest"
             
-            async with session.get(url) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    return data[:20]  # Les 20 plus récents
+            resp = await self.http.get(url)
+            if resp.status == 200:
+                data = resp.data
+                # Tout le lot: tronquer perdait des lancements en rafale
+                return data if isinstance(data, list) else [data]
         except Exception as e:
             logger.error(f"Pump.fun fetch error: {e}")
         return []
@@ -279,33 +298,20 @@ class SolanaTokenDetector:
     async def _get_token_metadata(self, token_address: str) -> Optional[Dict]:
         """Récupère les métadonnées d'un token"""
         try:
-            session = await self.get_session()
-            
             # Essayer Jupiter Token List d'abord
             url = f"https://token.jup.ag/token/{token_address}"
-            async with session.get(url) as resp:
-                if resp.status == 200:
-                    return await resp.json()
-            
-            # Sinon, RPC call pour les métadonnées on-chain
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "getAccountInfo",
-                "params": [token_address, {"encoding": "jsonParsed"}]
-            }
+            resp = await self.http.get(url)
+            if resp.status == 200:
+                return resp.data
             
-            async with session.post(self.rpc_url, json=payload) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    account_data = data.get("result", {}).get("value", {}).get("data", {})
-                    if "parsed" in account_data:
-                        info = account_data["parsed"].get("info", {})
-                        return {
-                            "symbol": info.get("symbol", "UNKNOWN"),
-                            "name": info.get("name", "Unknown"),
-                            "decimals": info.get("decimals", 9)
-                        }
+            # Sinon, lecture du compte mint on-chain (groupée)
+            mint = await self.account_loader.get_mint(token_address)
+            if mint:
+                return {
+                    "symbol": "UNKNOWN",
+                    "name": "Unknown",
+                    "decimals": mint["decimals"]
+                }
         except Exception as e:
             logger.error(f"Metadata fetch error: {e}")
         
@@ -314,44 +320,33 @@ class SolanaTokenDetector:
     async def _get_liquidity_data(self, token_address: str) -> Dict:
         """Récupère les données de liquidité"""
         try:
-            session = await self.get_session()
-            
-            # DexScreener pour liquidité
-            url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
-            async with session.get(url) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    pairs = data.get("pairs", [])
-                    if pairs:
-                        pair = pairs[0]
-                        return {
-                            "liquidity_usd": float(pair.get("liquidity", {}).get("usd", 0)),
-                            "liquidity_sol": float(pair.get("liquidity", {}).get("base", 0))
-                        }
+            # DexScreener pour liquidité (lookup groupé et caché)
+            pair = await self.dexscreener.get_pair(token_address, chain_id="solana")
+            if pair:
+                return {
+                    "liquidity_usd": float(pair.get("liquidity", {}).get("usd", 0)),
+                    "liquidity_sol": float(pair.get("liquidity", {}).get("base", 0))
+                }
         except Exception as e:
             logger.error(f"Liquidity fetch error: {e}")
         
         return {"liquidity_usd": 0, "liquidity_sol": 0}
     
     async def _get_holders_data(self, token_address: str) -> Dict:
-        """Récupère les données des holders"""
+        """
+        Récupère les données des holders depuis le cache de l'analyse holders.
+        Premier passage: valeurs inconnues (None), le calcul tourne en fond.
+        """
         try:
-            # Utiliser Helius ou autre service d'indexation
-            # Pour l'instant, retourner des valeurs par défaut
-            return {
-                "count": 0,
-                "top10_percent": 100
-            }
+            return await self.holder_analytics.get_holders(token_address)
         except Exception as e:
             logger.error(f"Holders fetch error: {e}")
         
-        return {"count": 0, "top10_percent": 100}
+        return {"count": None, "top10_percent": None}
     
     async def _get_token_age(self, token_address: str) -> int:
         """Calcule l'âge du token en minutes"""
         try:
-            session = await self.get_session()
-            
             # Récupérer la première signature (création)
             payload = {
                 "jsonrpc": "2.0",
@@ -360,18 +355,18 @@ class SolanaTokenDetector:
                 "params": [token_address, {"limit": 1000}]
             }
             
-            async with session.post(self.rpc_url, json=payload) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    signatures = data.get("result", [])
-                    if signatures:
-                        # La dernière signature est la plus ancienne
-                        oldest_sig = signatures[-1]
-                        timestamp = oldest_sig.get("blockTime", 0)
-                        if timestamp:
-                            created_time = datetime.fromtimestamp(timestamp)
-                            age = datetime.now() - created_time
-                            return int(age.total_seconds() / 60)
+            resp = await self.http.post_rpc(self.rpc_url, json=payload)
+            if resp.status == 200:
+                data = resp.data
+                signatures = data.get("result", [])
+                if signatures:
+                    # La dernière signature est la plus ancienne
+                    oldest_sig = signatures[-1]
+                    timestamp = oldest_sig.get("blockTime", 0)
+                    if timestamp:
+                        created_time = datetime.fromtimestamp(timestamp)
+                        age = datetime.now() - created_time
+                        return int(age.total_seconds() / 60)
         except Exception as e:
             logger.error(f"Age fetch error: {e}")
         
@@ -380,26 +375,13 @@ class SolanaTokenDetector:
     async def _check_token_security(self, token_address: str) -> Dict:
         """Vérifie la sécurité du token (authorities)"""
         try:
-            session = await self.get_session()
-            
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "getAccountInfo",
-                "params": [token_address, {"encoding": "jsonParsed"}]
-            }
-            
-            async with session.post(self.rpc_url, json=payload) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    account_data = data.get("result", {}).get("value", {}).get("data", {})
-                    if "parsed" in account_data:
-                        info = account_data["parsed"].get("info", {})
-                        return {
-                            "freeze_authority": info.get("freezeAuthority"),
-                            "mint_authority": info.get("mintAuthority"),
-                            "is_mutable": bool(info.get("mintAuthority"))
-                        }
+            mint = await self.account_loader.get_mint(token_address)
+            if mint:
+                return {
+                    "freeze_authority": mint["freeze_authority"],
+                    "mint_authority": mint["mint_authority"],
+                    "is_mutable": bool(mint["mint_authority"])
+                }
         except Exception as e:
             logger.error(f"Security check error: {e}")
         
@@ -412,23 +394,16 @@ class SolanaTokenDetector:
     async def _get_trading_data(self, token_address: str) -> Dict:
         """Récupère les données de trading"""
         try:
-            session = await self.get_session()
-            
-            # DexScreener pour trading data
-            url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
-            async with session.get(url) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    pairs = data.get("pairs", [])
-                    if pairs:
-                        pair = pairs[0]
-                        return {
-                            "price_usd": float(pair.get("priceUsd", 0)),
-                            "price_sol": float(pair.get("priceNative", 0)),
-                            "market_cap_usd": float(pair.get("fdv", 0)),
-                            "volume_24h": float(pair.get("volume", {}).get("h24", 0)),
-                            "price_change_1h": float(pair.get("priceChange", {}).get("h1", 0))
-                        }
+            # DexScreener pour trading data (même lookup que la liquidité)
+            pair = await self.dexscreener.get_pair(token_address, chain_id="solana")
+            if pair:
+                return {
+                    "price_usd": float(pair.get("priceUsd", 0)),
+                    "price_sol": float(pair.get("priceNative", 0)),
+                    "market_cap_usd": float(pair.get("fdv", 0)),
+                    "volume_24h": float(pair.get("volume", {}).get("h24", 0)),
+                    "price_change_1h": float(pair.get("priceChange", {}).get("h1", 0))
+                }
         except Exception as e:
             logger.error(f"Trading data fetch error: {e}")
         
@@ -442,8 +417,7 @@ class SolanaTokenDetector:
     
     async def close(self):
         """Ferme la session"""
-        if self.session:
-            await self.session.close()
+        await self.account_loader.close()
 
 
 # ============================================================================
@@ -459,6 +433,10 @@ class SolanaHoneypotDetector:
     - Ownership renonciation
     """
     
+    def __init__(self, detector: Optional[SolanaTokenDetector] = None):
+        # Un seul détecteur (et donc une seule session) pour tous les checks
+        self.detector = detector or SolanaTokenDetector()
+    
     async def check_token(self, token_address: str) -> Dict:
         """
         Vérifie si un token Solana est un honeypot
@@ -474,7 +452,7 @@ class SolanaHoneypotDetector:
         }
         
         try:
-            detector = SolanaTokenDetector()
+            detector = self.detector
             
             # Check 1: Freeze authority
             security = await detector._check_token_security(token_address)
@@ -494,7 +472,11 @@ class SolanaHoneypotDetector:
             
             # Check 3: Holders distribution
             holders = await detector._get_holders_data(token_address)
-            if holders.get("top10_percent", 100) > 80:
+            top10_percent = holders.get("top10_percent")
+            if top10_percent is None:
+                # Distribution pas encore calculée: ni pénalité ni check validé
+                pass
+            elif top10_percent > 80:
                 result["warnings"].append("Highly concentrated ownership - top 10 holders own >80%")
                 result["confidence"] -= 10
             else:
@@ -524,9 +506,10 @@ class SolanaHoneypotDetector:
                 result["is_honeypot"] = True
                 result["can_sell"] = False
             
-            await detector.close()
-            
         except Exception as e:
             logger.error(f"Solana honeypot check error: {e}")
         
         return result
+    
+    async def close(self):
+        await self.detector.close()
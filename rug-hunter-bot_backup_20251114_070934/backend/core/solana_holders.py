@@ -0,0 +1,228 @@
+"""
+👥 Analyse des Holders Solana
+Concentration top-N via getTokenLargestAccounts + supply du mint,
+nombre de holders optionnel via getProgramAccounts (memcmp)
+"""
+
+import asyncio
+import base64
+import logging
+import struct
+import time
+from typing import Dict, Optional, Set
+
+from core.cache import TTLCache
+from core.solana_account_loader import SolanaAccountLoader, TOKEN_PROGRAM, TOKEN_2022_PROGRAM
+
+logger = logging.getLogger(__name__)
+
+# Taille d'un compte SPL Token (hors extensions Token-2022)
+SPL_TOKEN_ACCOUNT_SIZE = 165
+# Offset du champ amount (u64) dans un compte token: mint(32) + owner(32)
+SPL_TOKEN_AMOUNT_OFFSET = 64
+
+UNKNOWN_HOLDERS = {
+    "count": None,
+    "top10_percent": None,
+    "largest_percent": None,
+    "status": "pending",
+}
+
+
+class SolanaHolderAnalytics:
+    """
+    Calcule la distribution des holders d'un mint Solana.
+    Les résultats sont servis depuis un cache borné et rafraîchis en tâche
+    de fond: la première alerte n'attend jamais le RPC.
+    Le rafraîchissement périodique ne concerne que les mints encore dans la
+    fenêtre d'analyse (max_age_seconds) ou épinglés (positions ouvertes), avec
+    au plus max_refresh_per_tick rafraîchissements par tick.
+    """
+
+    def __init__(self, account_loader: SolanaAccountLoader, top_n: int = 10,
+                 cache_size: int = 5000, refresh_interval: float = 60.0,
+                 enable_holder_count: bool = False, holder_count_interval: float = 300.0,
+                 max_concurrent_refresh: int = 4, max_age_seconds: float = 1800.0,
+                 max_refresh_per_tick: int = 20):
+        self.loader = account_loader
+        self.top_n = top_n
+        self.refresh_interval = refresh_interval
+        self.enable_holder_count = enable_holder_count
+        self.holder_count_interval = holder_count_interval
+        self.max_age_seconds = max_age_seconds
+        self.max_refresh_per_tick = max_refresh_per_tick
+        # Mints rafraîchis quel que soit leur âge (positions ouvertes)
+        self.pinned: Set[str] = set()
+
+        # mint -> snapshot (les mints les moins consultés sont évincés en premier)
+        self.cache = TTLCache(maxsize=cache_size, ttl=None)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrent_refresh)
+        self.running = False
+        self.stats = {"background_refreshes": 0, "skipped_old": 0, "deferred": 0}
+
+    def pin(self, mint: str):
+        """Garde le snapshot du mint à jour tant qu'une position est ouverte"""
+        self.pinned.add(mint)
+
+    def unpin(self, mint: str):
+        self.pinned.discard(mint)
+
+    def get_cached(self, mint: str) -> Optional[Dict]:
+        return self.cache.get(mint)
+
+    async def get_holders(self, mint: str, wait: float = 0.0) -> Dict:
+        """
+        Retourne le dernier snapshot connu et programme un rafraîchissement
+        s'il est absent ou périmé. wait > 0 permet d'attendre le premier calcul
+        au plus `wait` secondes.
+        """
+        snapshot = self.cache.get(mint)
+        if snapshot and time.time() - snapshot["updated_at"] < self.refresh_interval:
+            return snapshot
+
+        task = self._schedule_refresh(mint)
+        if wait > 0:
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), timeout=wait)
+            except Exception:
+                pass
+
+        return snapshot or dict(UNKNOWN_HOLDERS)
+
+    def _schedule_refresh(self, mint: str) -> asyncio.Task:
+        task = self._in_flight.get(mint)
+        if task is None or task.done():
+            task = asyncio.create_task(self.refresh(mint))
+            self._in_flight[mint] = task
+            task.add_done_callback(lambda _t, m=mint: self._in_flight.pop(m, None))
+        return task
+
+    async def refresh(self, mint: str) -> Dict:
+        """Recalcule la concentration (et le nombre de holders si activé)"""
+        async with self._semaphore:
+            previous = self.cache.peek(mint) or {}
+            try:
+                mint_account = await self.loader.get_mint(mint)
+                if not mint_account or mint_account["supply"] == 0:
+                    return previous or dict(UNKNOWN_HOLDERS)
+
+                amounts = await self._get_largest_amounts(mint)
+                supply = mint_account["supply"]
+
+                top_n = sum(amounts[:self.top_n])
+                snapshot = {
+                    "first_seen": previous.get("first_seen", time.time()),
+                    "count": previous.get("count"),
+                    "top10_percent": round(top_n / supply * 100, 2),
+                    "largest_percent": round(amounts[0] / supply * 100, 2) if amounts else 0.0,
+                    "largest_accounts": len(amounts),
+                    "supply": supply,
+                    "status": "ok",
+                    "updated_at": time.time(),
+                    "count_updated_at": previous.get("count_updated_at", 0),
+                }
+
+                # Le comptage complet est coûteux: fréquence plus faible
+                if self.enable_holder_count and \
+                        time.time() - snapshot["count_updated_at"] >= self.holder_count_interval:
+                    count = await self._count_holders(mint)
+                    if count is not None:
+                        snapshot["count"] = count
+                        snapshot["count_updated_at"] = time.time()
+
+                self.cache.set(mint, snapshot)
+                return snapshot
+
+            except Exception as e:
+                logger.error(f"Holders refresh error for {mint}: {e}")
+                return previous or dict(UNKNOWN_HOLDERS)
+
+    async def _get_largest_amounts(self, mint: str) -> list:
+        """Montants bruts des plus gros comptes token (max 20 côté RPC)"""
+        result = await self._rpc("getTokenLargestAccounts", [mint, {"commitment": "confirmed"}])
+        accounts = (result or {}).get("value", [])
+        return sorted((int(a.get("amount", 0)) for a in accounts), reverse=True)
+
+    async def _count_holders(self, mint: str) -> Optional[int]:
+        """Compte les comptes token non vides du mint via getProgramAccounts"""
+        account = await self.loader.get_account(mint)
+        if not account:
+            return None
+
+        filters = [{"memcmp": {"offset": 0, "bytes": mint}}]
+        if account["owner"] == TOKEN_PROGRAM:
+            filters.insert(0, {"dataSize": SPL_TOKEN_ACCOUNT_SIZE})
+        elif account["owner"] != TOKEN_2022_PROGRAM:
+            return None
+
+        result = await self._rpc("getProgramAccounts", [
+            account["owner"],
+            {
+                "encoding": "base64",
+                "filters": filters,
+                # Seul le champ amount nous intéresse
+                "dataSlice": {"offset": SPL_TOKEN_AMOUNT_OFFSET, "length": 8},
+            }
+        ])
+        if result is None:
+            return None
+
+        count = 0
+        for item in result:
+            raw = base64.b64decode(item["account"]["data"][0])
+            if len(raw) == 8 and struct.unpack("<Q", raw)[0] > 0:
+                count += 1
+        return count
+
+    async def _rpc(self, method: str, params: list):
+        payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        resp = await self.loader.http.post_rpc(self.loader.rpc_url, json=payload)
+        if resp.status != 200:
+            raise RuntimeError(f"{method} HTTP {resp.status}")
+        data = resp.data
+        if "error" in data:
+            raise RuntimeError(f"{method}: {data['error'].get('message')}")
+        return data.get("result")
+
+    def _due_for_refresh(self, now: float) -> list:
+        """Mints périmés encore utiles, les plus anciennement rafraîchis d'abord"""
+        due = []
+        for mint in self.cache.keys():
+            snapshot = self.cache.peek(mint)
+            if not snapshot or now - snapshot["updated_at"] < self.refresh_interval or mint in self._in_flight:
+                continue
+            if mint not in self.pinned and now - snapshot.get("first_seen", now) > self.max_age_seconds:
+                # Hors fenêtre d'analyse: servi tel quel, rafraîchi seulement à la demande
+                self.stats["skipped_old"] += 1
+                continue
+            due.append((snapshot["updated_at"], mint))
+        due.sort()
+        return [mint for _, mint in due]
+
+    async def run(self, tick_seconds: float = 5.0):
+        """Rafraîchit périodiquement les snapshots périmés, dans la limite du budget par tick"""
+        self.running = True
+        logger.info("👥 Holder analytics refresher started")
+
+        while self.running:
+            try:
+                due = self._due_for_refresh(time.time())
+                for mint in due[:self.max_refresh_per_tick]:
+                    self._schedule_refresh(mint)
+                self.stats["background_refreshes"] += min(len(due), self.max_refresh_per_tick)
+                self.stats["deferred"] += max(0, len(due) - self.max_refresh_per_tick)
+                await asyncio.sleep(tick_seconds)
+            except Exception as e:
+                logger.error(f"Holder refresher error: {e}")
+                await asyncio.sleep(tick_seconds)
+
+    def stop(self):
+        self.running = False
+
+    def get_stats(self) -> Dict:
+        stats = self.cache.get_stats()
+        stats.update(self.stats)
+        stats["in_flight"] = len(self._in_flight)
+        stats["pinned"] = len(self.pinned)
+        return stats
@@ -0,0 +1,419 @@
+"""
+🌊 Swap Flow Engine - fenêtres glissantes par paire depuis les logs Swap/Sync
+Les agrégats (volume, compteurs, acheteurs uniques, max, volatilité) sont
+maintenus à chaque swap: lire les features d'une paire est O(1).
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.detector import NATIVE_PRICES, WRAPPED_NATIVE
+from core.http_client import HTTPClient, get_http_client
+
+logger = logging.getLogger(__name__)
+
+SWAP_TOPIC = "0xd78ad95fa46c994b6551d0da85fc275fe613ce37657fb8d5e3d130840159d822"
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+BLOCK_TIMES = {"ETH": 12, "BSC": 3}
+POLL_INTERVALS = {"ETH": 2.0, "BSC": 1.0}
+
+# Nombre max d'adresses par requête eth_getLogs
+MAX_ADDRESSES_PER_QUERY = 500
+
+FLOW_FEATURES = (
+    "volume_5min_usd", "buy_count_5min", "sell_count_5min", "unique_buyers_5min",
+    "price_change_5min_percent", "price_volatility_5min", "largest_buy_usd",
+    "largest_sell_usd", "whale_buys_count", "whale_sells_count",
+    "bot_wallets_detected", "coordinated_buying_detected",
+)
+
+
+class PairFlow:
+    """Ring buffer numpy des swaps d'une paire + agrégats de la fenêtre courante"""
+
+    def __init__(self, chain: str, pair: str, token: str, decimals: int = 18,
+                 creation_block: Optional[int] = None, whale_native: float = 0.0,
+                 window_seconds: float = 300, capacity: int = 1024, snipe_blocks: int = 2):
+        self.chain = chain
+        self.pair = pair
+        self.token = token
+        self.decimals = decimals
+        self.native_is_token0 = WRAPPED_NATIVE.get(chain, "").lower() < token
+        self.creation_block = creation_block
+        self.whale_native = whale_native
+        self.window = window_seconds
+        self.snipe_blocks = snipe_blocks
+
+        # capacité puissance de 2: index = compteur & mask
+        self.capacity = 1 << max(4, (capacity - 1).bit_length())
+        self._mask = self.capacity - 1
+        self.ts = np.zeros(self.capacity, dtype=np.float64)
+        self.native = np.zeros(self.capacity, dtype=np.float64)
+        self.price = np.zeros(self.capacity, dtype=np.float64)
+        self.ret = np.zeros(self.capacity, dtype=np.float64)
+        self.is_buy = np.zeros(self.capacity, dtype=np.bool_)
+        self.block = np.zeros(self.capacity, dtype=np.int64)
+        self.buyer: List[Optional[str]] = [None] * self.capacity
+        self.head = 0
+        self.tail = 0
+
+        # Agrégats de la fenêtre
+        self.volume = 0.0
+        self.buys = 0
+        self.sells = 0
+        self.whale_buys = 0
+        self.whale_sells = 0
+        self.ret_sum = 0.0
+        self.ret_sq = 0.0
+        self.buyer_counts: Dict[str, int] = {}
+        self._max_buy = deque()   # (compteur, valeur) décroissant
+        self._max_sell = deque()
+        self._block_buyers: "OrderedDict[int, set]" = OrderedDict()
+        self.coordinated_blocks = 0
+        self.snipers: set = set()
+
+        self.reserve_native = 0.0
+        self.reserve_token = 0.0
+        # Prix spot après le dernier Sync, et prix d'exécution du dernier swap:
+        # le Sync d'un swap précède son log Swap, les rendements se calculent
+        # donc entre exécutions successives, jamais contre le spot
+        self.last_price = 0.0
+        self.last_exec_price = 0.0
+        self.warm = False
+        self.updated_at = time.time()
+        self.read_at = time.time()
+
+    def __len__(self) -> int:
+        return self.tail - self.head
+
+    def add_swap(self, ts: float, block: int, is_buy: bool, native: float, tokens: float, buyer: str):
+        if len(self) == self.capacity:
+            self._pop_head()
+
+        price = native / tokens if tokens else (self.last_exec_price or self.last_price)
+        previous = self.last_exec_price
+        ret = (price - previous) / previous if previous and price else 0.0
+        self.last_exec_price = price or previous
+
+        i = self.tail & self._mask
+        self.ts[i] = ts
+        self.block[i] = block
+        self.native[i] = native
+        self.price[i] = price
+        self.ret[i] = ret
+        self.is_buy[i] = is_buy
+        self.buyer[i] = buyer if is_buy else None
+
+        self.volume += native
+        self.ret_sum += ret
+        self.ret_sq += ret * ret
+        max_queue = self._max_buy if is_buy else self._max_sell
+        while max_queue and max_queue[-1][1] <= native:
+            max_queue.pop()
+        max_queue.append((self.tail, native))
+
+        if is_buy:
+            self.buys += 1
+            self.whale_buys += int(native >= self.whale_native)
+            self.buyer_counts[buyer] = self.buyer_counts.get(buyer, 0) + 1
+            block_set = self._block_buyers.setdefault(block, set())
+            if buyer not in block_set:
+                block_set.add(buyer)
+                if len(block_set) == 3:
+                    self.coordinated_blocks += 1
+            if self.creation_block is not None and block <= self.creation_block + self.snipe_blocks:
+                self.snipers.add(buyer)
+        else:
+            self.sells += 1
+            self.whale_sells += int(native >= self.whale_native)
+
+        self.tail += 1
+        self.updated_at = time.time()
+
+    def set_reserves(self, reserve0: int, reserve1: int):
+        native, token = (reserve0, reserve1) if self.native_is_token0 else (reserve1, reserve0)
+        self.reserve_native = native / 10 ** 18
+        self.reserve_token = token / 10 ** self.decimals
+        if self.reserve_token:
+            self.last_price = self.reserve_native / self.reserve_token
+        self.updated_at = time.time()
+
+    def _pop_head(self):
+        i = self.head & self._mask
+        native, ret = float(self.native[i]), float(self.ret[i])
+        self.volume -= native
+        self.ret_sum -= ret
+        self.ret_sq -= ret * ret
+
+        if self.is_buy[i]:
+            self.buys -= 1
+            self.whale_buys -= int(native >= self.whale_native)
+            buyer = self.buyer[i]
+            count = self.buyer_counts.get(buyer, 0) - 1
+            if count > 0:
+                self.buyer_counts[buyer] = count
+            else:
+                self.buyer_counts.pop(buyer, None)
+            self.buyer[i] = None
+            max_queue = self._max_buy
+        else:
+            self.sells -= 1
+            self.whale_sells -= int(native >= self.whale_native)
+            max_queue = self._max_sell
+
+        if max_queue and max_queue[0][0] == self.head:
+            max_queue.popleft()
+        self.head += 1
+
+    def expire(self, now: float):
+        cutoff = now - self.window
+        while self.head < self.tail and self.ts[self.head & self._mask] < cutoff:
+            self._pop_head()
+
+        # Blocs sortis de la fenêtre (les blocs arrivent dans l'ordre)
+        oldest_block = self.block[self.head & self._mask] if self.head < self.tail else None
+        while self._block_buyers:
+            block, buyers = next(iter(self._block_buyers.items()))
+            if oldest_block is not None and block >= oldest_block:
+                break
+            if len(buyers) >= 3:
+                self.coordinated_blocks -= 1
+            self._block_buyers.popitem(last=False)
+
+    def features(self, native_usd: float, now: Optional[float] = None) -> Dict:
+        self.expire(now or time.time())
+        self.read_at = time.time()
+
+        n = len(self)
+        first_price = float(self.price[self.head & self._mask]) if n else 0.0
+        last_price = float(self.price[(self.tail - 1) & self._mask]) if n else 0.0
+        if n > 1:
+            mean = self.ret_sum / n
+            volatility = math.sqrt(max(0.0, self.ret_sq / n - mean * mean)) * 100
+        else:
+            volatility = 0.0
+
+        return {
+            # max(0): dérive d'arrondi des soustractions successives
+            "volume_5min_usd": max(0.0, self.volume) * native_usd,
+            "buy_count_5min": self.buys,
+            "sell_count_5min": self.sells,
+            "unique_buyers_5min": len(self.buyer_counts),
+            "price_change_5min_percent": (last_price - first_price) / first_price * 100 if first_price else 0.0,
+            "price_volatility_5min": volatility,
+            "largest_buy_usd": (self._max_buy[0][1] if self._max_buy else 0.0) * native_usd,
+            "largest_sell_usd": (self._max_sell[0][1] if self._max_sell else 0.0) * native_usd,
+            "whale_buys_count": self.whale_buys,
+            "whale_sells_count": self.whale_sells,
+            "bot_wallets_detected": len(self.snipers),
+            "coordinated_buying_detected": self.coordinated_blocks > 0,
+        }
+
+
+class SwapFlowEngine:
+    """
+    Suit les logs Swap/Sync/Transfer de toutes les paires surveillées (un eth_getLogs
+    multi-adresses par chaîne et par bloc) et sert leurs features en O(1).
+    La mémoire est bornée: max_pairs paires, évincées par ancienneté d'usage.
+    """
+
+    # Un swap "whale" pèse au moins 2% de la liquidité native (min 500$)
+    WHALE_LIQUIDITY_SHARE = 0.02
+    WHALE_MIN_USD = 500
+
+    def __init__(self, rpc_manager, http_client: Optional[HTTPClient] = None,
+                 window_seconds: float = 300, capacity: int = 1024, max_pairs: int = 1000,
+                 idle_ttl: float = 1800, chains: Optional[List[str]] = None):
+        self.rpc_manager = rpc_manager
+        self.http = http_client or get_http_client()
+        self.window = window_seconds
+        self.capacity = capacity
+        self.max_pairs = max_pairs
+        self.idle_ttl = idle_ttl
+        self.chains = chains or list(POLL_INTERVALS)
+
+        self.pairs: "OrderedDict[str, PairFlow]" = OrderedDict()
+        self.last_blocks: Dict[str, int] = {}
+        self._needs_backfill: Dict[str, set] = {chain: set() for chain in self.chains}
+        self.running = False
+        # Callbacks (chaîne, paire) sur chaque Transfer du token LP (ex: cache des locks)
+        self.lp_transfer_listeners: List[Callable[[str, str], None]] = []
+        self.stats = {"swaps": 0, "syncs": 0, "lp_transfers": 0, "polls": 0, "evicted": 0, "errors": 0, "skipped_blocks": 0}
+
+    # ------------------------------------------------------------------
+    # Paires surveillées
+    # ------------------------------------------------------------------
+
+    def watch(self, chain: str, pair_address: str, token_address: str, decimals: int = 18,
+              creation_block: Optional[int] = None, liquidity_usd: float = 0.0):
+        pair = pair_address.lower()
+        if pair in self.pairs:
+            self.pairs.move_to_end(pair)
+            return
+
+        native_usd = NATIVE_PRICES.get(chain, 2000)
+        whale_usd = max(self.WHALE_MIN_USD, liquidity_usd * self.WHALE_LIQUIDITY_SHARE)
+        self.pairs[pair] = PairFlow(
+            chain, pair, token_address.lower(), decimals=decimals, creation_block=creation_block,
+            whale_native=whale_usd / native_usd, window_seconds=self.window, capacity=self.capacity,
+        )
+        self._needs_backfill.setdefault(chain, set()).add(pair)
+
+        while len(self.pairs) > self.max_pairs:
+            oldest, _ = self.pairs.popitem(last=False)
+            self.stats["evicted"] += 1
+            for pending in self._needs_backfill.values():
+                pending.discard(oldest)
+
+    def unwatch(self, pair_address: str):
+        pair = pair_address.lower()
+        self.pairs.pop(pair, None)
+        for pending in self._needs_backfill.values():
+            pending.discard(pair)
+
+    def is_warm(self, pair_address: Optional[str]) -> bool:
+        flow = self.pairs.get((pair_address or "").lower())
+        return bool(flow and flow.warm)
+
+    def features(self, pair_address: str) -> Optional[Dict]:
+        """Features de flux de la paire (None si elle n'est pas suivie)"""
+        flow = self.pairs.get(pair_address.lower())
+        if flow is None:
+            return None
+        return flow.features(NATIVE_PRICES.get(flow.chain, 2000))
+
+    # ------------------------------------------------------------------
+    # Ingestion des logs
+    # ------------------------------------------------------------------
+
+    def ingest(self, chain: str, logs: List[Dict], latest_block: int, now: Optional[float] = None):
+        now = now or time.time()
+        block_time = BLOCK_TIMES.get(chain, 12)
+
+        for log in logs:
+            flow = self.pairs.get(log.get("address", "").lower())
+            topics = log.get("topics") or []
+            if flow is None or not topics:
+                continue
+            data = (log.get("data") or "0x")[2:]
+            block = int(log.get("blockNumber", "0x0"), 16)
+
+            if topics[0] == TRANSFER_TOPIC:
+                self.stats["lp_transfers"] += 1
+                for listener in self.lp_transfer_listeners:
+                    listener(chain, flow.pair)
+            elif topics[0] == SYNC_TOPIC and len(data) >= 128:
+                flow.set_reserves(int(data[:64], 16), int(data[64:128], 16))
+                self.stats["syncs"] += 1
+            elif topics[0] == SWAP_TOPIC and len(data) >= 256 and len(topics) >= 3:
+                a0_in, a1_in, a0_out, a1_out = (int(data[i:i + 64], 16) for i in range(0, 256, 64))
+                if flow.native_is_token0:
+                    native_in, native_out, token_in, token_out = a0_in, a0_out, a1_in, a1_out
+                else:
+                    native_in, native_out, token_in, token_out = a1_in, a1_out, a0_in, a0_out
+                is_buy = native_in > 0 and token_out > 0
+                native = (native_in if is_buy else native_out) / 10 ** 18
+                tokens = (token_out if is_buy else token_in) / 10 ** flow.decimals
+                # Pas d'horodatage dans les logs: estimé depuis le bloc
+                ts = now - (latest_block - block) * block_time
+                flow.add_swap(ts, block, is_buy, native, tokens, "0x" + topics[2][-40:].lower())
+                self.stats["swaps"] += 1
+
+    async def _get_logs(self, chain: str, addresses: List[str], from_block: int, to_block: int) -> List[Dict]:
+        rpc_url = self.rpc_manager.get(chain)
+        logs = []
+        for i in range(0, len(addresses), MAX_ADDRESSES_PER_QUERY):
+            resp = await self.http.post_rpc(rpc_url, json={
+                "jsonrpc": "2.0", "id": 1, "method": "eth_getLogs",
+                "params": [{
+                    "address": addresses[i:i + MAX_ADDRESSES_PER_QUERY],
+                    "topics": [[SWAP_TOPIC, SYNC_TOPIC, TRANSFER_TOPIC]],
+                    "fromBlock": hex(from_block),
+                    "toBlock": hex(to_block),
+                }]
+            })
+            if resp.status != 200 or not isinstance(resp.data, dict) or "error" in resp.data:
+                raise RuntimeError(f"eth_getLogs failed ({resp.status})")
+            logs.extend(resp.data.get("result") or [])
+        # Ordre chronologique pour les fenêtres et les max
+        logs.sort(key=lambda l: (int(l.get("blockNumber", "0x0"), 16), int(l.get("logIndex", "0x0"), 16)))
+        return logs
+
+    async def _block_number(self, chain: str) -> Optional[int]:
+        resp = await self.http.post_rpc(self.rpc_manager.get(chain), json={
+            "jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber", "params": []
+        })
+        if resp.status != 200 or not isinstance(resp.data, dict) or "result" not in resp.data:
+            return None
+        return int(resp.data["result"], 16)
+
+    async def poll_once(self, chain: str):
+        latest = await self._block_number(chain)
+        if latest is None:
+            return
+        last = self.last_blocks.get(chain, latest - 1)
+        window_blocks = int(self.window // BLOCK_TIMES.get(chain, 12)) + 1
+
+        # Nouvelles paires: on remonte la fenêtre complète une fois
+        backfill = [p for p in self._needs_backfill.get(chain, set()) if p in self.pairs]
+        if backfill:
+            logs = await self._get_logs(chain, backfill, max(0, latest - window_blocks), latest)
+            self.ingest(chain, logs, latest)
+            for pair in backfill:
+                self.pairs[pair].warm = True
+            self._needs_backfill[chain].difference_update(backfill)
+
+        live = [p for p, f in self.pairs.items() if f.chain == chain and p not in backfill]
+        if live and latest > last:
+            # Après une panne RPC (last non avancé), seule la fenêtre compte: la plage
+            # reste bornée au lieu de grossir jusqu'au refus du provider
+            from_block = max(last + 1, latest - window_blocks)
+            if from_block > last + 1:
+                self.stats["skipped_blocks"] += from_block - last - 1
+            logs = await self._get_logs(chain, live, from_block, latest)
+            self.ingest(chain, logs, latest)
+
+        self.last_blocks[chain] = latest
+        self.stats["polls"] += 1
+
+    def evict_idle(self, now: Optional[float] = None):
+        now = now or time.time()
+        idle = [p for p, f in self.pairs.items() if now - max(f.read_at, f.updated_at) > self.idle_ttl]
+        for pair in idle:
+            self.unwatch(pair)
+            self.stats["evicted"] += 1
+
+    async def run(self):
+        self.running = True
+        logger.info(f"🌊 Swap flow engine started ({', '.join(self.chains)})")
+        await asyncio.gather(*(self._chain_loop(chain) for chain in self.chains if self.rpc_manager.get(chain)))
+
+    async def _chain_loop(self, chain: str):
+        interval = POLL_INTERVALS.get(chain, 2.0)
+        while self.running:
+            try:
+                if any(f.chain == chain for f in self.pairs.values()):
+                    await self.poll_once(chain)
+                self.evict_idle()
+                await asyncio.sleep(interval)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Swap flow error on {chain}: {e}")
+                await asyncio.sleep(interval * 2)
+
+    def stop(self):
+        self.running = False
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats["pairs"] = len(self.pairs)
+        stats["buffered_swaps"] = sum(len(f) for f in self.pairs.values())
+        return stats
@@ -0,0 +1,304 @@
+"""
+🧪 Swap Simulator - Achat/vente simulés en local pour la détection de honeypots
+Une seule requête JSON-RPC (eth_getCode + eth_simulateV1 en batch) exécute:
+quote -> achat -> balance -> transfert -> approve -> échelle de ventes (quote, vente, balance WETH)
+"""
+
+import hashlib
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from core.cache import TTLCache
+from core.detector import WRAPPED_NATIVE
+from core.evm_abi import MAX_UINT256, decode_uint, decode_uint_array, encode_call
+from core.http_client import HTTPClient, get_http_client
+
+logger = logging.getLogger(__name__)
+
+# Routers V2 correspondant aux factories de core.detector.DEX_FACTORIES
+ROUTERS = {
+    "ETH": {
+        "uniswap_v2": "0x7a250d5630B4cF539739dF2C5dAcb4c659F2488D",
+        "sushiswap": "0xd9e1cE17f2641f24aE83637ab66a2cca9C378B9F",
+    },
+    "BSC": {
+        "pancakeswap_v2": "0x10ED43C718714eb63d5aA57B78B54704E526134E",
+        "biswap": "0x3a6d8cA21D1CF76F653A67577FA0D27453350dD8",
+    },
+}
+DEFAULT_DEX = {"ETH": "uniswap_v2", "BSC": "pancakeswap_v2"}
+
+# Montant d'achat simulé (wei): assez petit pour passer les maxTx, assez gros pour mesurer les taxes
+BUY_AMOUNTS = {
+    "ETH": 5 * 10 ** 16,   # 0.05 ETH
+    "BSC": 10 ** 17,       # 0.1 BNB
+}
+
+# Adresses fictives: le wallet simulé reçoit du natif par state override
+SIM_WALLET = "0x5151515151515151515151515151515151515151"
+SIM_RECEIVER = "0x5252525252525252525252525252525252525252"
+
+# Les appels d'une simulation ne peuvent pas se transmettre de valeurs: la balance
+# achetée n'est pas connue à l'avance. La vente est donc tentée sur une échelle de
+# montants décroissants (10^45 ... 10^0): les ventes au-dessus de la balance revertent
+# sans changer l'état, la première qui passe revend entre 0.1% et 100% des tokens.
+SELL_LADDER = [10 ** e for e in range(45, -1, -3)]
+
+# Limite de gas du bloc simulé (la plupart des appels de l'échelle revertent vite)
+SIM_BLOCK_GAS_LIMIT = 200_000_000
+
+
+class SwapSimulator:
+    """
+    Simule un cycle achat/vente via un router V2 avec eth_simulateV1.
+    Le RPC de simulation est configurable par chaîne (ex: un fork anvil local);
+    à défaut le RPC principal de la chaîne est utilisé.
+    Les résultats sont cachés par (chaîne, token, router): deux tokens au même
+    bytecode (templates, launchpads) n'ont pas les mêmes réserves, owner ou
+    réglages de taxe. Le hash du bytecode accompagne le résultat à titre
+    indicatif (liste de bytecodes connus), jamais comme clé de cache.
+    """
+
+    def __init__(self, rpc_manager, sim_rpc_urls: Optional[Dict[str, str]] = None,
+                 http_client: Optional[HTTPClient] = None, buy_amounts: Optional[Dict[str, int]] = None,
+                 cache_ttl: float = 120.0, cache_size: int = 2000, unsupported_ttl: float = 600.0):
+        self.rpc_manager = rpc_manager
+        if sim_rpc_urls is None:
+            sim_rpc_urls = getattr(rpc_manager, "simulation_rpcs", None) or {}
+        self.sim_rpc_urls = {k: v for k, v in sim_rpc_urls.items() if v}
+        self.http = http_client or get_http_client()
+        self.buy_amounts = dict(BUY_AMOUNTS)
+        self.buy_amounts.update(buy_amounts or {})
+
+        self.results = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        # RPC sans eth_simulateV1 (JSON-RPC -32601): réessayé après unsupported_ttl,
+        # le provider peut l'activer ou le RPC être remplacé
+        self.unsupported = TTLCache(maxsize=64, ttl=unsupported_ttl)
+
+        self.stats = {"simulations": 0, "batches": 0, "cache_hits": 0, "errors": 0, "unsupported": 0}
+
+    def _rpc_url(self, chain: str) -> str:
+        return self.sim_rpc_urls.get(chain) or self.rpc_manager.get(chain)
+
+    async def simulate(self, token_address: str, chain: str, dex: Optional[str] = None,
+                       use_cache: bool = True) -> Optional[Dict]:
+        """
+        Retourne le résultat de simulation (format HoneypotDetector) ou None si
+        la simulation n'est pas possible (RPC sans eth_simulateV1, pas de liquidité...)
+        """
+        results = await self.simulate_many([(token_address, dex)], chain, use_cache=use_cache)
+        return results.get(token_address.lower())
+
+    async def simulate_many(self, tokens: List[Tuple[str, Optional[str]]], chain: str,
+                            use_cache: bool = True) -> Dict[str, Optional[Dict]]:
+        """
+        Simule plusieurs tokens (token, dex) d'une même chaîne dans un seul batch
+        JSON-RPC. use_cache=False force une nouvelle simulation (re-vérification).
+        """
+        weth = WRAPPED_NATIVE.get(chain)
+        rpc_url = self._rpc_url(chain)
+        results: Dict[str, Optional[Dict]] = {}
+        if not weth or not rpc_url or rpc_url in self.unsupported:
+            return {token.lower(): None for token, _dex in tokens}
+
+        to_run = []
+        for token_address, dex in tokens:
+            token = token_address.lower()
+            router = ROUTERS.get(chain, {}).get(dex or DEFAULT_DEX.get(chain))
+            results[token] = None
+            if not router:
+                continue
+
+            cached = self.results.get((chain, token, router)) if use_cache else None
+            if cached:
+                self.stats["cache_hits"] += 1
+                results[token] = cached
+            else:
+                to_run.append((token, router))
+
+        if not to_run:
+            return results
+
+        try:
+            outcomes = await self._run(rpc_url, to_run, weth, self.buy_amounts[chain])
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Swap simulation error ({len(to_run)} tokens on {chain}): {e}")
+            return results
+
+        for (token, router), (code, blocks) in zip(to_run, outcomes):
+            if not blocks or not code or code == "0x":
+                continue
+
+            result = self._interpret(blocks[0]["calls"])
+            if result is None:
+                continue
+
+            result["code_hash"] = hashlib.sha256(code.encode()).hexdigest()
+            self.results.set((chain, token, router), result)
+            results[token] = result
+
+        return results
+
+    def _build_calls(self, token: str, weth: str, router: str, buy_amount: int) -> List[Dict]:
+        deadline = int(time.time()) + 600
+        buy_path = [weth, token]
+        sell_path = [token, weth]
+
+        def call(to: str, data: str, value: int = 0) -> Dict:
+            payload = {"from": SIM_WALLET, "to": to, "data": data}
+            if value:
+                payload["value"] = hex(value)
+            return payload
+
+        calls = [
+            # 0: tokens attendus sans taxe
+            call(router, encode_call("getAmountsOut", [("uint256", buy_amount), ("address[]", buy_path)])),
+            # 1: achat
+            call(router, encode_call("swapExactETHForTokensSupportingFeeOnTransferTokens", [
+                ("uint256", 0), ("address[]", buy_path), ("address", SIM_WALLET), ("uint256", deadline)
+            ]), value=buy_amount),
+            # 2: tokens réellement reçus
+            call(token, encode_call("balanceOf", [("address", SIM_WALLET)])),
+            # 3: transfert wallet -> wallet (blacklists, anti-bot, transferts bloqués)
+            call(token, encode_call("transfer", [("address", SIM_RECEIVER), ("uint256", 1)])),
+            # 4: approve du router
+            call(token, encode_call("approve", [("address", router), ("uint256", MAX_UINT256)])),
+            # 5: WETH déjà présent sur le wallet simulé
+            call(weth, encode_call("balanceOf", [("address", SIM_WALLET)])),
+        ]
+
+        # 6+: par montant de l'échelle: quote, vente, balance WETH
+        for amount in SELL_LADDER:
+            calls.append(call(router, encode_call("getAmountsOut", [("uint256", amount), ("address[]", sell_path)])))
+            calls.append(call(router, encode_call("swapExactTokensForTokensSupportingFeeOnTransferTokens", [
+                ("uint256", amount), ("uint256", 0), ("address[]", sell_path),
+                ("address", SIM_WALLET), ("uint256", deadline)
+            ])))
+            calls.append(call(weth, encode_call("balanceOf", [("address", SIM_WALLET)])))
+
+        return calls
+
+    async def _run(self, rpc_url: str, items: List[Tuple[str, str]], weth: str, buy_amount: int) -> List[tuple]:
+        """
+        Batch JSON-RPC [eth_getCode, eth_simulateV1] par token: un seul aller-retour.
+        Retourne (bytecode, blocs simulés) par token, dans l'ordre de `items`.
+        """
+        payload = []
+        for i, (token, router) in enumerate(items):
+            simulation = {
+                "blockStateCalls": [{
+                    "blockOverrides": {"gasLimit": hex(SIM_BLOCK_GAS_LIMIT)},
+                    "stateOverrides": {SIM_WALLET: {"balance": hex(buy_amount * 10)}},
+                    "calls": self._build_calls(token, weth, router, buy_amount),
+                }],
+                "validation": False,
+            }
+            payload.append({"jsonrpc": "2.0", "id": 2 * i, "method": "eth_getCode", "params": [token, "latest"]})
+            payload.append({"jsonrpc": "2.0", "id": 2 * i + 1, "method": "eth_simulateV1",
+                            "params": [simulation, "latest"]})
+
+        self.stats["simulations"] += len(items)
+        self.stats["batches"] += 1
+        resp = await self.http.post_rpc(rpc_url, json=payload)
+        if resp.status != 200 or not isinstance(resp.data, list):
+            raise RuntimeError(f"HTTP {resp.status}")
+
+        by_id = {item.get("id"): item for item in resp.data}
+        outcomes = []
+        for i in range(len(items)):
+            code = by_id.get(2 * i, {}).get("result")
+            sim = by_id.get(2 * i + 1, {})
+
+            if "error" in sim:
+                error = sim["error"]
+                # Méthode absente (code JSON-RPC standard): inutile de réessayer tout de suite
+                if error.get("code") == -32601:
+                    self.unsupported.set(rpc_url, True)
+                    self.stats["unsupported"] += 1
+                    logger.warning(f"⚠️ eth_simulateV1 not supported by {rpc_url}, "
+                                   f"simulation disabled for {self.unsupported.ttl:.0f}s")
+                    return [(None, None)] * len(items)
+                self.stats["errors"] += 1
+                logger.debug(f"eth_simulateV1 error for {items[i][0]}: {error.get('message')}")
+
+            outcomes.append((code, sim.get("result")))
+
+        return outcomes
+
+    @staticmethod
+    def _ok(call: Dict) -> bool:
+        return call.get("status") == "0x1"
+
+    def _interpret(self, calls: List[Dict]) -> Optional[Dict]:
+        """Calcule taxes, gas et restrictions à partir des résultats de la simulation"""
+        # Pas de quote = pas de paire/liquidité sur ce router: non concluant
+        if not self._ok(calls[0]):
+            return None
+        quotes = decode_uint_array(calls[0].get("returnData"))
+        expected_tokens = quotes[-1] if quotes else 0
+        if expected_tokens == 0:
+            return None
+
+        can_buy = self._ok(calls[1])
+        received = decode_uint(calls[2].get("returnData")) if can_buy and self._ok(calls[2]) else 0
+        can_buy = can_buy and received > 0
+        transfer_ok = self._ok(calls[3])
+        weth_before = decode_uint(calls[5].get("returnData"))
+
+        result = {
+            "is_honeypot": False,
+            "can_buy": can_buy,
+            "can_sell": False,
+            "buy_tax": 0.0,
+            "sell_tax": 0.0,
+            "buy_gas": int(calls[1].get("gasUsed", "0x0"), 16) if can_buy else 0,
+            "sell_gas": 0,
+            "transfer_ok": transfer_ok,
+            "liquidity_removable": False,
+            "verified": True,
+            "source": "simulation",
+        }
+
+        if not can_buy:
+            result["is_honeypot"] = True
+            result["reason"] = "Buy reverted in simulation"
+            return result
+
+        result["buy_tax"] = round(max(0.0, 1 - received / expected_tokens) * 100, 2)
+
+        for i, amount in enumerate(SELL_LADDER):
+            quote_call, sell_call, balance_call = calls[6 + 3 * i:9 + 3 * i]
+            if amount > received or not self._ok(sell_call):
+                continue
+
+            quote = decode_uint_array(quote_call.get("returnData"))
+            expected_out = quote[-1] if quote else 0
+            weth_out = decode_uint(balance_call.get("returnData")) - weth_before
+
+            result["can_sell"] = weth_out > 0
+            result["sell_gas"] = int(sell_call.get("gasUsed", "0x0"), 16)
+            if expected_out:
+                result["sell_tax"] = round(max(0.0, 1 - weth_out / expected_out) * 100, 2)
+            result["sell_fraction"] = round(amount / received, 4)
+            break
+
+        if not result["can_sell"]:
+            result["is_honeypot"] = True
+            result["reason"] = "Sell reverted in simulation"
+        elif result["sell_tax"] >= 90:
+            result["is_honeypot"] = True
+            result["reason"] = f"Sell tax {result['sell_tax']}% in simulation"
+        elif not transfer_ok:
+            result["reason"] = "Wallet-to-wallet transfers are restricted"
+        else:
+            result["reason"] = "Verified via local swap simulation"
+
+        return result
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats["cache"] = self.results.get_stats()
+        stats["unsupported_rpcs"] = len([url for url in self.unsupported.keys() if url in self.unsupported])
+        return stats
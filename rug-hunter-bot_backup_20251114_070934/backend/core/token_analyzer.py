@@ -1,10 +1,20 @@
 """Token Analyzer - Real Blockchain Data"""
 import asyncio
-import aiohttp
+import random
 from web3 import Web3
-from typing import Optional
+from typing import Optional, Set
 import logging
 
+from core.http_client import get_http_client
+from core.indicator_collectors import build_default_pipeline
+from core.deployer_index import DeployerIndex
+from core.indicators import IndicatorContext
+from core.lp_lock_analyzer import LPLockAnalyzer
+from core.swap_flow import SwapFlowEngine
+from core.swap_simulator import SwapSimulator
+from ml.advanced_scorer import ANALYSIS_FIELDS
+from ml.batcher import MLBatcher
+
 logger = logging.getLogger(__name__)
 
 ERC20_ABI = [
@@ -17,20 +27,29 @@ ERC20_ABI = [
 ]
 
 class TokenAnalyzer:
-    def __init__(self, rpc_manager, ml_scorer, config: dict):
+    def __init__(self, rpc_manager, ml_scorer, config: dict, simulator: Optional[SwapSimulator] = None,
+                 flow_engine: Optional[SwapFlowEngine] = None, deployer_index: Optional[DeployerIndex] = None,
+                 lp_lock_analyzer: Optional[LPLockAnalyzer] = None, scoring_service=None):
         self.ml = ml_scorer
+        # Les analyses concurrentes partagent un même predict_many
+        # (dans un pool de processus si un ScoringService est fourni)
+        self.ml_batcher = scoring_service or MLBatcher(ml_scorer, config.get("ML_BATCH_WINDOW_MS", 5))
         self.rpc_manager = rpc_manager
         self.config = config
         self.web3_connections = {}
-        self.session = None
+        self.http = get_http_client()
+        self.simulator = simulator or SwapSimulator(rpc_manager)
+        self.flow_engine = flow_engine
+        self.lp_lock_analyzer = lp_lock_analyzer or LPLockAnalyzer(rpc_manager)
+        self.pipeline = build_default_pipeline(self.simulator, config.get("INDICATOR_DEADLINES"),
+                                               flow_engine, deployer_index, self.lp_lock_analyzer)
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        # Les connexions appartiennent au client HTTP partagé
+        pass
     
     def _get_web3(self, chain: str) -> Web3:
         if chain not in self.web3_connections:
@@ -40,7 +59,8 @@ class TokenAnalyzer:
             self.web3_connections[chain] = Web3(Web3.HTTPProvider(rpc_url))
         return self.web3_connections[chain]
     
-    async def analyze(self, token_address: str, chain: str, pair_address: Optional[str] = None):
+    async def analyze(self, token_address: str, chain: str, pair_address: Optional[str] = None,
+                      detection: Optional[dict] = None):
         """Analyse complète d'un token"""
         try:
             w3 = self._get_web3(chain)
@@ -48,14 +68,14 @@ class TokenAnalyzer:
             
             logger.info(f"Analyzing {token_address} on {chain}")
             
-            if not self.session:
-                self.session = aiohttp.ClientSession()
-            
             # Analyse basique
-            indicators = await self._get_all_indicators(token_address, chain, w3)
+            indicators, report = await self._get_all_indicators(token_address, chain, pair_address, detection)
             
             # ML Scoring
-            scores = self.ml.predict(indicators)
+            scores = await self.ml_batcher.predict(indicators)
+            # Features absentes du dict, remplacées par leur valeur d'imputation du schéma
+            report["ml_imputed"] = scores.get("imputed", 0)
+            report["ml_fallback"] = bool(scores.get("fallback"))
             
             return {
                 "token_address": token_address,
@@ -64,79 +84,44 @@ class TokenAnalyzer:
                 "profit_potential": scores["profit_potential"],
                 "confidence": scores["confidence"],
                 "recommendation": self._get_recommendation(scores),
-                "indicators": indicators
+                "indicators": indicators,
+                "indicator_report": report
             }
         except Exception as e:
             logger.error(f"Analysis failed: {e}")
             return self._fallback_analysis(token_address, chain)
     
-    async def _get_all_indicators(self, token: str, chain: str, w3: Web3):
-        """Récupère tous les 54 indicateurs"""
-        indicators = {
-            "contract_verified": True,
-            "ownership_renounced": False,
-            "has_mint_function": True,
-            "has_pause_function": False,
-            "has_blacklist_function": False,
-            "has_proxy_pattern": False,
-            "has_selfdestruct": False,
-            "admin_functions_count": 2,
-            "compiler_version_recent": True,
-            "bytecode_suspicious": False,
-            "external_calls_safe": True,
-            "reentrancy_protected": True,
-            "can_buy": True,
-            "can_sell": True,
-            "buy_gas_used": 150000,
-            "sell_gas_used": 180000,
-            "buy_tax_real": 5,
-            "sell_tax_real": 8,
-            "slippage_tolerance": 10,
-            "max_transaction_limit": 1000000,
-            "liquidity_eth": 25.5,
-            "liquidity_usd": 51000,
-            "market_cap_usd": 150000,
-            "total_supply": 1000000000,
-            "circulating_supply": 800000000,
-            "burned_percent": 20,
-            "holder_count": 250,
-            "lp_locked": True,
-            "lp_lock_duration_days": 365,
-            "price_usd": 0.00015,
-            "age_minutes": 15,
-            "pair_creation_block": 18500000,
-            "deployer_address_age": 180,
-            "deployer_previous_tokens": 3,
-            "owner_is_deployer": True,
-            "ownership_transfers_count": 0,
-            "owner_eth_balance": 5.2,
-            "contract_eth_balance": 0.5,
-            "top10_holders_percent": 45,
-            "owner_balance_percent": 15,
-            "volume_5min_usd": 12000,
-            "buy_count_5min": 35,
-            "sell_count_5min": 12,
-            "unique_buyers_5min": 28,
-            "price_change_5min_percent": 45,
-            "price_volatility_5min": 8.5,
-            "largest_buy_usd": 2500,
-            "largest_sell_usd": 800,
-            "owner_sells_post_launch": False,
-            "whale_buys_count": 3,
-            "whale_sells_count": 0,
-            "suspicious_wallet_funding": False,
-            "bot_wallets_detected": 5,
-            "coordinated_buying_detected": True
-        }
+    async def _get_all_indicators(self, token: str, chain: str, pair_address: Optional[str] = None,
+                                  detection: Optional[dict] = None):
+        """Collecte les indicateurs en parallèle (chaque collecteur a sa deadline)"""
+        ctx = IndicatorContext(
+            token, chain, self.rpc_manager.get(chain),
+            pair_address=pair_address, detection=detection,
+            http_client=self.http, config=self.config,
+        )
+        result = await self.pipeline.run(ctx, self._needed_fields())
         
-        # Ajouter vraies données si possible
-        try:
-            contract = w3.eth.contract(address=token, abi=ERC20_ABI)
-            indicators["total_supply"] = contract.functions.totalSupply().call()
-        except:
-            pass
+        report = result["report"]
+        if report["missing"]:
+            logger.info(f"Indicators missing for {token}: {len(report['missing'])}/{len(self.pipeline.fields)}")
         
-        return indicators
+        return result["indicators"], report
+    
+    def _needed_fields(self) -> Optional[Set[str]]:
+        """
+        Champs à collecter: ceux lus par le modèle actif (et le candidat en shadow)
+        plus ceux de l'analyse de trading. None (tout collecter) sans modèle chargé,
+        si SKIP_UNUSED_COLLECTORS est désactivé, ou pour une fraction des détections
+        (FULL_COLLECTION_SAMPLE_RATE): les features abandonnées par un modèle réduit
+        restent alimentées dans le jeu d'entraînement et peuvent être réévaluées.
+        """
+        if not self.config.get("SKIP_UNUSED_COLLECTORS", True):
+            return None
+        if random.random() < self.config.get("FULL_COLLECTION_SAMPLE_RATE", 0.1):
+            return None
+        used_features = getattr(self.ml, "used_features", None)
+        used = used_features() if used_features else None
+        return used | ANALYSIS_FIELDS if used is not None else None
     
     def _get_recommendation(self, scores):
         rug_risk = scores["rug_risk"]
@@ -3,6 +3,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from contextlib import contextmanager
 from .models import Base
+import asyncio
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -43,10 +45,12 @@ class DatabaseManager:
             session.close()
     
     async def save_detection(self, detection_data: dict):
-        """Sauvegarde une détection"""
+        """Sauvegarde une détection (session synchrone: hors de la boucle d'événements)"""
         if not self.engine:
             return
-        
+        await asyncio.to_thread(self._save_detection, detection_data)
+    
+    def _save_detection(self, detection_data: dict):
         try:
             from .models import DetectedToken
             with self.get_session() as session:
@@ -66,10 +70,12 @@ class DatabaseManager:
             logger.error(f"Failed to save detection: {e}")
     
     async def save_analysis(self, token_address: str, chain: str, analysis: dict):
-        """Sauvegarde une analyse"""
+        """Sauvegarde une analyse (session synchrone: hors de la boucle d'événements)"""
         if not self.engine:
             return
-        
+        await asyncio.to_thread(self._save_analysis, token_address, chain, analysis)
+    
+    def _save_analysis(self, token_address: str, chain: str, analysis: dict):
         try:
             from .models import DetectedToken
             with self.get_session() as session:
@@ -84,6 +90,7 @@ class DatabaseManager:
                         token.rug_risk_score = analysis["rug_risk_score"]
                         token.profit_potential = analysis["profit_potential"]
                         token.recommendation = analysis["recommendation"]
-                        token.analysis_data = analysis
+                        # Scalaires numpy éventuels (indicateurs) ramenés en float pour la colonne JSON
+                        token.analysis_data = json.loads(json.dumps(analysis, default=float))
         except Exception as e:
             logger.error(f"Failed to save analysis: {e}")
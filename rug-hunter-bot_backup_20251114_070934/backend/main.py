@@ -2,6 +2,7 @@
 from fastapi import FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
+from fastapi.encoders import jsonable_encoder
 import uvicorn
 import asyncio
 from contextlib import asynccontextmanager
@@ -12,10 +13,27 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from core.detector import MultiChainDetector
+from core.http_client import get_http_client, close_http_client
+from core.dexscreener_client import get_dexscreener_client
 from core.token_analyzer import TokenAnalyzer
-from ml.scorer import MLScorer
+from core.swap_flow import SwapFlowEngine
+from core.deployer_index import DeployerIndex
+from core.lp_lock_analyzer import LPLockAnalyzer
+from core.rule_engine import get_rule_engine
+from core.analysis_funnel import build_default_funnel
+from core.solana_account_loader import SolanaAccountLoader
+from core.solana_holders import SolanaHolderAnalytics
+from core.solana_detector import SolanaTokenDetector
+from core.pump_fun_tracker import PumpFunCurveTracker
+from trading.engine import TradingEngine
+from trading.risk_manager import RiskManager
+from trading.auto_trader import AutoTrader
+from trading.position_reverifier import PositionReverifier
+from ml.model_registry import ModelRegistry
+from ml.scoring_service import ScoringService
 from ml.advanced_scorer import AdvancedTradingScorer
 from api.routes import router, add_detection
+from database.db import DatabaseManager
 from config.settings import Settings
 
 # Import conditionnel des notifications
@@ -44,6 +62,10 @@ class RPCManager:
             "ETH": settings.ETH_RPC_URL,
             "BSC": settings.BSC_RPC_URL,
         }
+        self.simulation_rpcs = {
+            "ETH": getattr(settings, "ETH_SIMULATION_RPC_URL", None),
+            "BSC": getattr(settings, "BSC_SIMULATION_RPC_URL", None),
+        }
     
     def get(self, chain: str):
         return self.rpcs.get(chain, "")
@@ -52,9 +74,25 @@ class AppState:
     def __init__(self):
         self.settings = None
         self.trading_mode = "PAPER"
+        self.db = None
         self.detector = None
         self.analyzer = None
         self.advanced_scorer = None
+        self.ml_registry = None
+        self.scoring_service = None
+        self.flow_engine = None
+        self.deployer_index = None
+        self.lp_lock_analyzer = None
+        self.funnel = None
+        self.sol_loader = None
+        self.sol_holders = None
+        self.sol_tracker = None
+        self.sol_detector = None
+        self.sol_tasks = []
+        self.trading_engine = None
+        self.auto_trader = None
+        self.reverifier = None
+        self.reverifier_tasks = []
         self.telegram = None
         self.discord = None
 
@@ -68,9 +106,23 @@ async def lifespan(app: FastAPI):
     app_state.trading_mode = app_state.settings.TRADING_MODE
     app_state.rpc_manager = RPCManager(app_state.settings)
     
+    # Détections et analyses persistées: jeu d'entraînement de scripts/train_models.py
+    app_state.db = DatabaseManager(app_state.settings.DATABASE_URL)
+    app_state.db.init_db()
+    
     # ML System
-    app_state.ml_scorer = MLScorer()
-    app_state.advanced_scorer = AdvancedTradingScorer(app_state.ml_scorer)
+    # Modèles chargés (mmap) au premier scoring; les nouvelles versions sont
+    # validées (canari + shadow) puis remplacent l'active sans redémarrage
+    app_state.ml_registry = ModelRegistry(app_state.settings.ML_MODELS_PATH, app_state.settings.ML_FALLBACK,
+                                          shadow_seconds=app_state.settings.ML_SHADOW_SECONDS,
+                                          max_flip_rate=app_state.settings.ML_MAX_DECISION_FLIP_RATE)
+    # Parcours des arbres dans un pool de processus: la boucle n'attend que des futures
+    if app_state.settings.ML_SCORING_WORKERS > 0:
+        app_state.scoring_service = ScoringService(app_state.ml_registry, app_state.settings.ML_SCORING_WORKERS,
+                                                   max_in_flight=app_state.settings.ML_MAX_IN_FLIGHT)
+        app_state.scoring_service.start()
+    app_state.flow_engine = SwapFlowEngine(app_state.rpc_manager)
+    app_state.advanced_scorer = AdvancedTradingScorer(app_state.ml_registry, app_state.flow_engine)
     
     # Notifications (optionnel)
     if NOTIFICATIONS_AVAILABLE:
@@ -85,8 +137,27 @@ async def lifespan(app: FastAPI):
     config = {
         "ETHERSCAN_API_KEY": getattr(app_state.settings, "ETHERSCAN_API_KEY", ""),
         "BSCSCAN_API_KEY": getattr(app_state.settings, "BSCSCAN_API_KEY", ""),
+        "SKIP_UNUSED_COLLECTORS": app_state.settings.SKIP_UNUSED_COLLECTORS,
+        "FULL_COLLECTION_SAMPLE_RATE": app_state.settings.FULL_COLLECTION_SAMPLE_RATE,
     }
-    app_state.analyzer = TokenAnalyzer(app_state.rpc_manager, app_state.ml_scorer, config)
+    app_state.deployer_index = DeployerIndex(app_state.settings.DEPLOYER_INDEX_PATH)
+    app_state.lp_lock_analyzer = LPLockAnalyzer(app_state.rpc_manager)
+    # Les locks d'une paire ne changent qu'avec un Transfer du token LP
+    app_state.flow_engine.lp_transfer_listeners.append(app_state.lp_lock_analyzer.invalidate)
+    app_state.analyzer = TokenAnalyzer(app_state.rpc_manager, app_state.ml_registry, config,
+                                       flow_engine=app_state.flow_engine,
+                                       deployer_index=app_state.deployer_index,
+                                       lp_lock_analyzer=app_state.lp_lock_analyzer,
+                                       scoring_service=app_state.scoring_service)
+    
+    # Funnel: rejets bon marché avant la simulation et l'analyse complète
+    app_state.funnel = build_default_funnel(
+        {
+            "MAX_BUY_TAX": app_state.settings.MAX_BUY_TAX,
+            "MAX_SELL_TAX": app_state.settings.MAX_SELL_TAX,
+        },
+        app_state.analyzer, app_state.analyzer.simulator, app_state.deployer_index,
+    )
     
     # Detector
     enabled_chains = []
@@ -101,7 +172,40 @@ async def lifespan(app: FastAPI):
         "SCAN_BLOCK_INTERVAL": getattr(app_state.settings, "SCAN_BLOCK_INTERVAL", 3),
     }
     
-    app_state.detector = MultiChainDetector(enabled_chains, app_state.rpc_manager, detection_config)
+    app_state.detector = MultiChainDetector(enabled_chains, app_state.rpc_manager, detection_config,
+                                            deployer_index=app_state.deployer_index,
+                                            lp_lock_analyzer=app_state.lp_lock_analyzer)
+    
+    # Solana: holders rafraîchis en fond, limités à la fenêtre d'analyse
+    if getattr(app_state.settings, "ENABLE_SOL_DETECTION", False):
+        app_state.sol_loader = SolanaAccountLoader(app_state.settings.SOL_RPC_URL)
+        app_state.sol_holders = SolanaHolderAnalytics(
+            app_state.sol_loader,
+            max_age_seconds=detection_config["MAX_TOKEN_AGE_MINUTES"] * 60,
+        )
+        sol_ws_url = app_state.settings.SOL_WS_URL or \
+            app_state.settings.SOL_RPC_URL.replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+        app_state.sol_tracker = PumpFunCurveTracker(app_state.sol_loader, ws_url=sol_ws_url)
+        app_state.sol_detector = SolanaTokenDetector(app_state.settings.SOL_RPC_URL,
+                                                     account_loader=app_state.sol_loader,
+                                                     holder_analytics=app_state.sol_holders,
+                                                     pump_fun_tracker=app_state.sol_tracker)
+    
+    # Trading: positions re-simulées à chaque bloc, sortie d'urgence si la vente se ferme
+    trading_config = {
+        "TRADING_MODE": app_state.trading_mode,
+        "AUTO_TRADING_ENABLED": app_state.settings.AUTO_TRADING_ENABLED,
+        "MAX_POSITION_SIZE_USD": app_state.settings.MAX_POSITION_SIZE_USD,
+    }
+    # Seuil de confiance: config/rules.json, sauf réglage explicite (.env / environnement)
+    if "MIN_AUTO_TRADE_CONFIDENCE" in app_state.settings.model_fields_set:
+        trading_config["MIN_AUTO_TRADE_CONFIDENCE"] = app_state.settings.MIN_AUTO_TRADE_CONFIDENCE
+    app_state.trading_engine = TradingEngine(None, app_state.rpc_manager, trading_config)
+    app_state.reverifier = PositionReverifier(app_state.analyzer.simulator, app_state.rpc_manager,
+                                              trading_engine=app_state.trading_engine, config=trading_config)
+    app_state.auto_trader = AutoTrader(app_state.trading_engine, None, RiskManager(trading_config), trading_config,
+                                       reverifier=app_state.reverifier)
+    app_state.reverifier.auto_trader = app_state.auto_trader
     
     logger.info(f"✅ Bot started in {app_state.trading_mode} mode")
     logger.info(f"📡 Monitoring: {enabled_chains}")
@@ -110,12 +214,45 @@ async def lifespan(app: FastAPI):
     # Démarrer
     asyncio.create_task(app_state.detector.start())
     asyncio.create_task(process_detections())
+    asyncio.create_task(app_state.flow_engine.run())
+    asyncio.create_task(app_state.deployer_index.run(app_state.rpc_manager, enabled_chains))
+    asyncio.create_task(app_state.ml_registry.run())
+    app_state.reverifier_tasks = [
+        asyncio.create_task(app_state.reverifier.run()),
+        asyncio.create_task(process_solana_events(app_state.reverifier.event_queue, "emergency_exit")),
+    ]
+    if app_state.sol_detector:
+        app_state.sol_tasks = [
+            asyncio.create_task(app_state.sol_holders.run()),
+            asyncio.create_task(app_state.sol_tracker.subscribe_loop()),
+            asyncio.create_task(app_state.sol_detector.start_detection()),
+            asyncio.create_task(process_solana_events(app_state.sol_detector.event_queue, "new_detection")),
+            asyncio.create_task(process_solana_events(app_state.sol_tracker.event_queue, "curve_event")),
+        ]
     
     yield
     
     logger.info("🛑 Shutting down...")
     if app_state.detector:
         app_state.detector.running = False
+    if app_state.flow_engine:
+        app_state.flow_engine.stop()
+    if app_state.deployer_index:
+        app_state.deployer_index.close()
+    if app_state.ml_registry:
+        app_state.ml_registry.stop()
+    if app_state.scoring_service:
+        await app_state.scoring_service.stop()
+    if app_state.reverifier:
+        app_state.reverifier.stop()
+        for task in app_state.reverifier_tasks:
+            task.cancel()
+    if app_state.sol_detector:
+        app_state.sol_holders.stop()
+        app_state.sol_tracker.stop()
+        for task in app_state.sol_tasks:
+            task.cancel()
+    await close_http_client()
 
 app = FastAPI(title="RUG HUNTER API", version="3.0.0", lifespan=lifespan)
 
@@ -151,62 +288,125 @@ async def websocket_feed(websocket: WebSocket):
     finally:
         active_websockets.remove(websocket)
 
-async def process_detections():
-    """Traite les détections"""
-    logger.info("🔄 Detection processor started")
-    
+async def process_solana_events(queue: asyncio.Queue, message_type: str):
+    """
+    Détections Solana, événements de bonding curve (et signaux de sortie du
+    re-vérificateur): historique + diffusion WebSocket
+    """
     while True:
+        event = await queue.get()
         try:
-            detection = await app_state.detector.event_queue.get()
-            
-            add_detection(detection)
-            
-            # Broadcast WebSocket
+            if message_type == "new_detection":
+                add_detection(event)
+            data = jsonable_encoder(event)
             for ws in active_websockets:
                 try:
-                    await ws.send_json({"type": "new_detection", "data": detection})
+                    await ws.send_json({"type": message_type, "data": data})
                 except:
                     pass
-            
-            # Analyse
-            logger.info(f"🔍 Analyzing: {detection['symbol']}...")
-            
-            async with app_state.analyzer as analyzer:
-                base_analysis = await analyzer.analyze(
-                    detection["token_address"],
-                    detection["chain"],
-                    detection.get("pair_address")
-                )
-                
-                advanced_analysis = app_state.advanced_scorer.analyze_and_recommend(
-                    base_analysis['indicators'],
-                    detection
-                )
-            
-            # Afficher recommandations
-            print_trading_recommendations(detection, advanced_analysis)
-            
-            # Notifications
-            if NOTIFICATIONS_AVAILABLE and app_state.telegram:
-                await app_state.telegram.send_detection_alert(detection, advanced_analysis)
-            if NOTIFICATIONS_AVAILABLE and app_state.discord:
-                await app_state.discord.send_detection_alert(detection, advanced_analysis)
-            
-            # Broadcast analyse
-            complete_data = {
-                "detection": detection,
-                "advanced_analysis": advanced_analysis
-            }
-            
+        except Exception as e:
+            logger.error(f"Solana event processing error: {e}")
+
+async def process_detections():
+    """
+    Traite les détections en parallèle (au plus MAX_CONCURRENT_ANALYSES): une
+    rafale de détections se retrouve dans les mêmes lots de scoring ML
+    """
+    logger.info("🔄 Detection processor started")
+    slots = asyncio.Semaphore(app_state.settings.MAX_CONCURRENT_ANALYSES)
+    tasks = set()
+    
+    while True:
+        detection = await app_state.detector.event_queue.get()
+        await slots.acquire()
+        task = asyncio.create_task(handle_detection(detection))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        task.add_done_callback(lambda _t: slots.release())
+
+async def handle_detection(detection: dict):
+    """Historique, funnel, recommandations et diffusion d'une détection"""
+    try:
+        add_detection(detection)
+        await app_state.db.save_detection(detection)
+        
+        if detection.get("pair_address"):
+            app_state.flow_engine.watch(
+                detection["chain"], detection["pair_address"], detection["token_address"],
+                decimals=detection.get("decimals", 18),
+                creation_block=detection.get("block_number"),
+                liquidity_usd=detection.get("liquidity_usd", 0),
+            )
+        
+        # Broadcast WebSocket
+        for ws in active_websockets:
+            try:
+                await ws.send_json({"type": "new_detection", "data": detection})
+            except:
+                pass
+        
+        # Analyse (funnel: les étapes coûteuses ne voient que les survivants)
+        logger.info(f"🔍 Analyzing: {detection['symbol']}...")
+        
+        funnel_result = await app_state.funnel.run(detection)
+        if not funnel_result["passed"]:
+            logger.info(f"⏭️ {detection['symbol']} rejected at {funnel_result['rejected_by']}: "
+                        f"{funnel_result['reason']}")
             for ws in active_websockets:
                 try:
-                    await ws.send_json({"type": "complete_analysis", "data": complete_data})
+                    await ws.send_json({"type": "rejected_detection", "data": {
+                        "detection": detection,
+                        "rejected_by": funnel_result["rejected_by"],
+                        "reason": funnel_result["reason"],
+                    }})
                 except:
                     pass
-            
-        except Exception as e:
-            logger.error(f"❌ Processing error: {e}")
-            await asyncio.sleep(1)
+            return
+        
+        base_analysis = funnel_result["results"].get("analysis")
+        if base_analysis is None:
+            # Étape d'analyse désactivée ou en erreur
+            base_analysis = await app_state.analyzer.analyze(
+                detection["token_address"], detection["chain"], detection.get("pair_address"), detection
+            )
+        # Indicateurs et rapport des collecteurs (statut, durée): features et coûts à l'entraînement
+        await app_state.db.save_analysis(detection["token_address"], detection["chain"], base_analysis)
+        # Momentum frais lu sur la boucle (état du SwapFlowEngine)
+        indicators = app_state.advanced_scorer.prepare_indicators(base_analysis['indicators'], detection)
+        # Scores de l'analyse réutilisés: le modèle vient de voir ces indicateurs
+        base_scores = {
+            "rug_risk": base_analysis["rug_risk_score"],
+            "profit_potential": base_analysis["profit_potential"],
+            "confidence": base_analysis["confidence"],
+        }
+        # Analyse et recommandations (calcul pur) hors de la boucle d'événements
+        advanced_analysis = await asyncio.to_thread(
+            app_state.advanced_scorer.recommend, indicators, detection, base_scores
+        )
+        
+        # Afficher recommandations
+        print_trading_recommendations(detection, advanced_analysis)
+        
+        # Notifications
+        if NOTIFICATIONS_AVAILABLE and app_state.telegram:
+            await app_state.telegram.send_detection_alert(detection, advanced_analysis)
+        if NOTIFICATIONS_AVAILABLE and app_state.discord:
+            await app_state.discord.send_detection_alert(detection, advanced_analysis)
+        
+        # Broadcast analyse
+        complete_data = {
+            "detection": detection,
+            "advanced_analysis": advanced_analysis
+        }
+        
+        for ws in active_websockets:
+            try:
+                await ws.send_json({"type": "complete_analysis", "data": complete_data})
+            except:
+                pass
+
+    except Exception as e:
+        logger.error(f"❌ Processing error: {e}")
 
 def print_trading_recommendations(detection: dict, analysis: dict):
     """Affiche les recommandations"""
@@ -320,5 +520,45 @@ async def get_live_stats():
         "total_pnl": 0.0,
     }
 
+@app.get("/api/stats/http")
+async def get_http_stats():
+    """Métriques du client HTTP partagé (latence, statuts, cache par host)"""
+    return {
+        **get_http_client().get_metrics(),
+        "dexscreener": get_dexscreener_client().get_stats(),
+        "swap_flow": app_state.flow_engine.get_stats() if app_state.flow_engine else {},
+        "deployer_index": app_state.deployer_index.get_stats() if app_state.deployer_index else {},
+        "lp_locks": app_state.lp_lock_analyzer.get_stats() if app_state.lp_lock_analyzer else {},
+    }
+
+@app.get("/api/stats/funnel")
+async def get_funnel_stats():
+    """Entrées, rejets et temps moyen par étape du funnel d'analyse"""
+    return app_state.funnel.get_stats() if app_state.funnel else {}
+
+@app.get("/api/stats/rules")
+async def get_rule_stats():
+    """Règles chargées: hits, erreurs et temps moyen par règle"""
+    return get_rule_engine().get_stats()
+
+@app.get("/api/stats/ml")
+async def get_ml_stats():
+    """Scoring ML (pool de processus ou micro-lots), versions des modèles et features les plus imputées"""
+    if not app_state.analyzer:
+        return {}
+    return {**app_state.analyzer.ml_batcher.get_stats(), "models": app_state.ml_registry.get_stats(),
+            "schema": app_state.ml_registry.schema.get_stats()}
+
+@app.get("/api/stats/collectors")
+async def get_collector_stats():
+    """Coût mesuré de chaque collecteur d'indicateurs et champs lus par le modèle actif"""
+    if not app_state.analyzer:
+        return {}
+    used = app_state.ml_registry.used_features()
+    return {
+        "collectors": app_state.analyzer.pipeline.get_stats(),
+        "model_features": sorted(used) if used is not None else None,
+    }
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
@@ -1,19 +1,63 @@
 """Advanced ML Scorer with Trading Recommendations"""
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 import logging
 
+from core.rule_engine import RuleEngine, get_rule_engine
+
 logger = logging.getLogger(__name__)
 
+# Indicateurs lus par les analyses de sécurité/liquidité/momentum: collectés même
+# si le modèle actif ne s'en sert pas
+ANALYSIS_FIELDS = frozenset({
+    "age_minutes", "buy_count_5min", "buy_tax_real", "can_buy", "can_sell", "contract_verified",
+    "has_blacklist_function", "has_mint_function", "has_pause_function", "has_proxy_pattern",
+    "has_selfdestruct", "holder_count", "lp_lock_duration_days", "lp_locked", "owner_balance_percent",
+    "ownership_renounced", "sell_count_5min", "sell_tax_real", "top10_holders_percent",
+    "unique_buyers_5min", "volume_5min_usd",
+})
+
 class AdvancedTradingScorer:
-    def __init__(self, base_scorer):
+    """
+    Pénalités de sécurité: règles "trading_security" de config/rules.json.
+    Liquidité et momentum restent en code: ce sont des barèmes par paliers (un
+    seul palier retenu, avec son niveau), que les règles bloquantes / à points
+    additifs du moteur ne savent pas exprimer.
+    """
+
+    def __init__(self, base_scorer, flow_engine=None, rule_engine: Optional[RuleEngine] = None):
         self.base_scorer = base_scorer
+        # SwapFlowEngine optionnel: momentum rafraîchi au moment du scoring
+        self.flow_engine = flow_engine
+        self.rules = rule_engine or get_rule_engine()
+        
+    def prepare_indicators(self, indicators: dict, detection_data: dict) -> dict:
+        """Indicateurs complétés par le momentum frais, tels que scorés par le modèle"""
+        pair_address = detection_data.get("pair_address")
+        if self.flow_engine and self.flow_engine.is_warm(pair_address):
+            indicators = {**indicators, **self.flow_engine.features(pair_address)}
+        return indicators
+    
+    def analyze_and_recommend(self, indicators: dict, detection_data: dict,
+                              base_scores: Optional[dict] = None) -> dict:
+        """
+        Analyse complète avec recommandations de trading précises.
+        `base_scores`: scores ML déjà calculés (ScoringService) sur prepare_indicators();
+        sans eux, le scorer de base est appelé ici, de façon synchrone.
+        """
         
-    def analyze_and_recommend(self, indicators: dict, detection_data: dict) -> dict:
-        """Analyse complète avec recommandations de trading précises"""
+        indicators = self.prepare_indicators(indicators, detection_data)
         
         # Scores ML de base
-        base_scores = self.base_scorer.predict(indicators)
+        if base_scores is None:
+            base_scores = self.base_scorer.predict(indicators)
+        return self.recommend(indicators, detection_data, base_scores)
+    
+    def recommend(self, indicators: dict, detection_data: dict, base_scores: dict) -> dict:
+        """
+        Analyse et recommandations sur des indicateurs déjà préparés et scorés.
+        Calcul pur (aucun état partagé): peut tourner hors de la boucle d'événements.
+        """
         
         # Analyse approfondie
         security_analysis = self._analyze_security(indicators)
@@ -51,57 +95,17 @@ class AdvancedTradingScorer:
         }
     
     def _analyze_security(self, ind: dict) -> dict:
-        """Analyse de sécurité détaillée"""
-        security_score = 100
-        issues = []
-        warnings = []
-        
-        # Ownership
-        if not ind.get('ownership_renounced', False):
-            security_score -= 20
-            issues.append("Owner not renounced - Can modify contract")
-        
-        # Dangerous functions
-        if ind.get('has_mint_function', False):
-            security_score -= 15
-            issues.append("Mint function present - Supply can be inflated")
-        
-        if ind.get('has_pause_function', False):
-            security_score -= 10
-            warnings.append("Pause function present - Trading can be stopped")
-        
-        if ind.get('has_blacklist_function', False):
-            security_score -= 25
-            issues.append("Blacklist function - Wallets can be blocked")
-        
-        if ind.get('has_proxy_pattern', False):
-            security_score -= 15
-            issues.append("Proxy pattern - Contract can be changed")
-        
-        if ind.get('has_selfdestruct', False):
-            security_score -= 30
-            issues.append("Selfdestruct present - Contract can be destroyed")
-        
-        # Verification
-        if not ind.get('contract_verified', False):
-            security_score -= 10
-            warnings.append("Contract not verified on explorer")
-        
-        # Honeypot
-        if not ind.get('can_sell', True):
-            security_score -= 50
-            issues.append("HONEYPOT DETECTED - Cannot sell")
-        
-        if not ind.get('can_buy', True):
-            security_score -= 50
-            issues.append("Cannot buy - Trading blocked")
+        """Analyse de sécurité détaillée (règles "trading_security")"""
+        rules = self.rules.get("trading_security")
+        result = rules.evaluate(ind)
+        security_score = 100 + int(result["score"])
         
         return {
             "score": max(0, security_score),
-            "issues": issues,
-            "warnings": warnings,
+            "issues": rules.messages(result, ind, tag="issue"),
+            "warnings": rules.messages(result, ind, tag="warning"),
             "is_honeypot": not ind.get('can_sell', True),
-            "is_safe": security_score >= 70
+            "is_safe": security_score >= rules.params["SAFE_SCORE"]
         }
     
     def _analyze_liquidity(self, ind: dict, detection: dict) -> dict:
@@ -0,0 +1,70 @@
+"""
+🧮 ML Batcher - regroupe les scorings arrivés à quelques ms d'intervalle
+Une rafale de détections (même bloc, plusieurs DEX) est scorée en un seul
+MLScorer.predict_many au lieu d'un appel sklearn par token.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MLBatcher:
+    def __init__(self, scorer, batch_window_ms: float = 5, max_batch_size: int = 256):
+        self.scorer = scorer
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._flush_handle = None
+
+        self.stats = {"requests": 0, "batches": 0, "largest_batch": 0, "errors": 0}
+
+    async def predict(self, indicators: dict) -> Dict:
+        """Même résultat que MLScorer.predict, mais mis en file avec les autres scorings en attente"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((indicators, future))
+        self.stats["requests"] += 1
+        self._schedule_flush(loop)
+        return await future
+
+    def _schedule_flush(self, loop):
+        if len(self._pending) >= self.max_batch_size:
+            if self._flush_handle:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+
+    def _flush(self):
+        """Score tout ce qui attend (predict_many est synchrone: pas de tâche à créer)"""
+        self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        self.stats["batches"] += 1
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(pending))
+        try:
+            scores = self.scorer.predict_many([indicators for indicators, _ in pending])
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"ML batch scoring failed ({len(pending)} tokens): {e}")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for i, (_, future) in enumerate(pending):
+            if not future.done():
+                future.set_result({key: int(values[i]) for key, values in scores.items()})
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats["avg_batch_size"] = round(stats["requests"] / stats["batches"], 2) if stats["batches"] else 0
+        stats["pending"] = len(self._pending)
+        return stats
@@ -0,0 +1,95 @@
+"""
+🎯 Calibration - risque de rug et confiance déterministes
+La confiance vient des votes des arbres de la forêt: classe majoritaire nette
+et arbres d'accord -> confiance haute. Risque et confiance sont recalibrés par
+régression isotonique sur des données tenues à l'écart, exportée en points
+d'interpolation (np.interp, pas de sklearn à l'inférence).
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CALIBRATION_FILENAME = "calibration.json"
+
+
+class Calibrator:
+    """Fonction croissante par morceaux définie par ses points (x, y)"""
+
+    def __init__(self, x: np.ndarray, y: np.ndarray):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+
+    def __call__(self, values: np.ndarray) -> np.ndarray:
+        return np.interp(values, self.x, self.y)
+
+    @classmethod
+    def identity(cls) -> "Calibrator":
+        return cls([0.0, 1.0], [0.0, 1.0])
+
+    @classmethod
+    def fit(cls, values: np.ndarray, targets: np.ndarray) -> "Calibrator":
+        from sklearn.isotonic import IsotonicRegression
+
+        iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(values, targets)
+        return cls(iso.X_thresholds_, iso.y_thresholds_)
+
+    def to_dict(self) -> Dict:
+        return {"x": [round(float(v), 6) for v in self.x], "y": [round(float(v), 6) for v in self.y]}
+
+
+def vote_scores(votes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    votes: (n, n_arbres), proportion de la classe rug dans la feuille de chaque arbre.
+    Retourne (probabilité brute, confiance brute) dans [0, 1]:
+    confiance = marge de la classe majoritaire * accord des arbres (1 - 2 * écart-type).
+    """
+    p = votes.mean(axis=1)
+    agreement = 1.0 - 2.0 * votes.std(axis=1)
+    return p, np.maximum(p, 1.0 - p) * np.clip(agreement, 0.0, 1.0)
+
+
+class ScoreCalibration:
+    def __init__(self, rug: Optional[Calibrator] = None, confidence: Optional[Calibrator] = None,
+                 meta: Optional[Dict] = None):
+        self.rug = rug or Calibrator.identity()
+        self.confidence = confidence or Calibrator.identity()
+        self.calibrated = rug is not None
+        self.meta = meta or {}
+
+    def apply(self, votes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(risque de rug, confiance) calibrés en [0, 1], en une passe sur les votes"""
+        p, raw_confidence = vote_scores(votes)
+        return self.rug(p), self.confidence(raw_confidence)
+
+    @classmethod
+    def fit(cls, votes: np.ndarray, y_rug: np.ndarray) -> "ScoreCalibration":
+        """
+        Sur un jeu tenu à l'écart: le risque est calibré sur la fréquence de rug,
+        la confiance sur la fréquence à laquelle la décision (risque >= 0.5) est juste.
+        """
+        p, raw_confidence = vote_scores(votes)
+        rug = Calibrator.fit(p, y_rug)
+        correct = ((rug(p) >= 0.5) == (y_rug == 1)).astype(np.float64)
+        confidence = Calibrator.fit(raw_confidence, correct)
+        return cls(rug, confidence, {"rows": int(len(y_rug)), "holdout_accuracy": round(float(correct.mean()), 4)})
+
+    def save(self, models_path: Path):
+        path = Path(models_path) / CALIBRATION_FILENAME
+        path.write_text(json.dumps({"rug": self.rug.to_dict(), "confidence": self.confidence.to_dict(),
+                                    **self.meta}, indent=2))
+
+    @classmethod
+    def load(cls, models_path: Path) -> "ScoreCalibration":
+        """Calibration enregistrée avec les modèles; sans fichier, scores bruts"""
+        path = Path(models_path) / CALIBRATION_FILENAME
+        if not path.exists():
+            return cls()
+        data = json.loads(path.read_text())
+        meta = {k: v for k, v in data.items() if k not in ("rug", "confidence")}
+        return cls(Calibrator(**data["rug"]), Calibrator(**data["confidence"]), meta)
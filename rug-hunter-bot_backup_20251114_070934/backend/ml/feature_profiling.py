@@ -0,0 +1,217 @@
+"""
+🔬 Feature Profiling - importance des features face à leur coût de collecte
+L'importance est mesurée par permutation sur les arbres exportés (tree_engine):
+baisse de ROC AUC (rug) et de R² (profit) quand une colonne, ou toutes les
+colonnes d'un collecteur, sont mélangées entre les lignes. Le coût vient des
+durées des collecteurs enregistrées avec chaque analyse (Dataset.stats).
+
+On coupe par collecteur, pas par feature: c'est le collecteur qui coûte des
+appels RPC/explorer. Un collecteur est gardé si ses features pèsent dans le
+modèle ou si l'analyse de trading lit l'un de ses champs (ANALYSIS_FIELDS).
+Les modèles réduits gardent les 54 colonnes du schéma, les features
+abandonnées figées à leur valeur d'imputation: aucun arbre ne coupe dessus, et
+le pipeline ne lance plus leurs collecteurs (MLScorer.used_features).
+
+Les modèles finaux sont entraînés sur tout le jeu: l'importance se mesure sur
+les détections postérieures au modèle (metrics.json: trained_through_id). Sans
+elles, le rapport l'indique ("evaluation": "in_sample"): les baisses mesurées
+sur des lignes d'entraînement surestiment les features mémorisées.
+"""
+
+import dataclasses
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.indicator_collectors import (ContractCollector, DeployerCollector, HoldersCollector, LPLockCollector,
+                                       MarketCollector, SimulationCollector, SwapsCollector)
+from ml.advanced_scorer import ANALYSIS_FIELDS
+from ml.feature_schema import FeatureSchema
+from ml.scorer import MLScorer
+from ml.training import Dataset
+
+logger = logging.getLogger(__name__)
+
+COLLECTORS = (MarketCollector, ContractCollector, HoldersCollector, SwapsCollector, DeployerCollector,
+              LPLockCollector, SimulationCollector)
+
+DEFAULT_REPEATS = 5
+# Sans détections postérieures au modèle: lignes les plus récentes (ordre des ids) évaluées
+EVAL_FRACTION = 0.2
+# Baisse minimale pour qu'un collecteur vaille d'être lancé
+MIN_AUC_DROP = 0.002
+MIN_R2_DROP = 0.005
+
+
+def collector_fields() -> Dict[str, Tuple[str, ...]]:
+    return {collector.name: collector.fields for collector in COLLECTORS}
+
+
+def trained_through_id(models_path: Path) -> Optional[int]:
+    """Id de la dernière détection d'entraînement (metrics.json), None si inconnu"""
+    path = Path(models_path) / "metrics.json"
+    if not path.exists():
+        return None
+    value = json.loads(path.read_text()).get("trained_through_id")
+    return int(value) if value is not None else None
+
+
+def _evaluation_rows(dataset: Dataset, cutoff: Optional[int], eval_fraction: float) -> Tuple[np.ndarray, str]:
+    """Lignes jamais vues par le modèle si elles contiennent les deux classes, sinon les plus récentes"""
+    if cutoff is not None:
+        rows = np.flatnonzero(dataset.ids > cutoff)
+        if len(np.unique(dataset.y_rug[rows])) == 2:
+            return rows, "holdout"
+        logger.warning(f"⚠️ {len(rows)} detections newer than the model (id > {cutoff}), not enough to evaluate")
+    else:
+        logger.warning("⚠️ Model has no trained_through_id, training rows cannot be excluded")
+    logger.warning("⚠️ Importance measured in-sample: drops overstate memorized features")
+    order = np.argsort(dataset.ids)
+    start = len(order) - max(1, int(len(order) * eval_fraction))
+    return order[start:], "in_sample"
+
+
+def _metrics(scorer: MLScorer, X: np.ndarray, y_rug: np.ndarray, y_profit: np.ndarray) -> Tuple[float, float]:
+    """(ROC AUC du risque calibré, R² du potentiel) tels que servis par MLScorer"""
+    from sklearn.metrics import r2_score, roc_auc_score
+
+    rug_probability, _ = scorer.calibration.apply(scorer.rug_engine.tree_values(X))
+    profit = np.clip(scorer.profit_engine.predict(X), 0, 100)
+    return float(roc_auc_score(y_rug, rug_probability)), float(r2_score(y_profit, profit))
+
+
+def permutation_importance(scorer: MLScorer, X: np.ndarray, y_rug: np.ndarray, y_profit: np.ndarray,
+                           groups: Dict[str, Sequence[int]], n_repeats: int = DEFAULT_REPEATS,
+                           random_state: int = 42) -> Tuple[Dict, Dict[str, Dict]]:
+    """
+    Baisse des métriques quand les colonnes d'un groupe sont permutées ensemble
+    (même permutation des lignes: les corrélations internes au groupe sont gardées).
+    Les colonnes qu'aucun arbre ne lit ont une importance nulle sans être évaluées.
+    """
+    used = set(np.concatenate([scorer.rug_engine.used_features(), scorer.profit_engine.used_features()]).tolist())
+    rng = np.random.default_rng(random_state)
+    base_auc, base_r2 = _metrics(scorer, X, y_rug, y_profit)
+
+    X_perm = X.copy()
+    results = {}
+    for name, columns in groups.items():
+        columns = [j for j in columns if j in used]
+        if not columns:
+            results[name] = {"rug_auc_drop": 0.0, "rug_auc_drop_std": 0.0,
+                             "profit_r2_drop": 0.0, "profit_r2_drop_std": 0.0, "used": False}
+            continue
+        auc_drops, r2_drops = [], []
+        for _ in range(n_repeats):
+            X_perm[:, columns] = X[np.ix_(rng.permutation(len(X)), columns)]
+            auc, r2 = _metrics(scorer, X_perm, y_rug, y_profit)
+            auc_drops.append(base_auc - auc)
+            r2_drops.append(base_r2 - r2)
+        X_perm[:, columns] = X[:, columns]
+        results[name] = {
+            "rug_auc_drop": round(float(np.mean(auc_drops)), 5),
+            "rug_auc_drop_std": round(float(np.std(auc_drops)), 5),
+            "profit_r2_drop": round(float(np.mean(r2_drops)), 5),
+            "profit_r2_drop_std": round(float(np.std(r2_drops)), 5),
+            "used": True,
+        }
+    return {"rug_auc": round(base_auc, 4), "profit_r2": round(base_r2, 4)}, results
+
+
+def profile_features(scorer: MLScorer, dataset: Dataset, n_repeats: int = DEFAULT_REPEATS,
+                     eval_fraction: float = EVAL_FRACTION, min_auc_drop: float = MIN_AUC_DROP,
+                     min_r2_drop: float = MIN_R2_DROP, random_state: int = 42) -> Dict:
+    """
+    Rapport importance/coût par feature et par collecteur, avec la liste des
+    features à garder ("keep") pour entraîner un modèle réduit.
+    Les lignes évaluées sont les détections postérieures au modèle; à défaut,
+    les plus récentes (`eval_fraction`), et le rapport est marqué "in_sample".
+    """
+    scorer.load()
+    if scorer.fallback_active:
+        raise ValueError(f"No models to profile in {scorer.models_path}")
+    schema = scorer.schema
+    if dataset.X.shape[1] != len(schema):
+        raise ValueError(f"Dataset has {dataset.X.shape[1]} columns, model schema has {len(schema)}")
+
+    cutoff = trained_through_id(scorer.models_path)
+    rows, evaluation = _evaluation_rows(dataset, cutoff, eval_fraction)
+    X, y_rug, y_profit = dataset.X[rows], dataset.y_rug[rows], dataset.y_profit[rows]
+    if len(np.unique(y_rug)) < 2:
+        raise ValueError("Evaluation rows contain a single rug class, increase --eval-fraction")
+
+    index = {name: j for j, name in enumerate(schema.names)}
+    fields_by_collector = collector_fields()
+    owner = {field: name for name, fields in fields_by_collector.items() for field in fields}
+
+    baseline, by_feature = permutation_importance(
+        scorer, X, y_rug, y_profit, {name: [j] for name, j in index.items()}, n_repeats, random_state)
+    _, by_collector = permutation_importance(
+        scorer, X, y_rug, y_profit,
+        {name: [index[f] for f in fields if f in index] for name, fields in fields_by_collector.items()},
+        n_repeats, random_state)
+
+    costs = dataset.stats.get("collectors", {})
+    collectors = {}
+    for name, fields in fields_by_collector.items():
+        importance = by_collector[name]
+        required_by_analysis = sorted(ANALYSIS_FIELDS.intersection(fields))
+        worth = importance["rug_auc_drop"] >= min_auc_drop or importance["profit_r2_drop"] >= min_r2_drop
+        collectors[name] = {
+            **importance,
+            "cost": costs.get(name, {}),
+            "model_fields": [f for f in fields if by_feature.get(f, {}).get("used")],
+            "required_by_analysis": required_by_analysis,
+            "collect": worth or bool(required_by_analysis),
+        }
+
+    # Une feature sans collecteur connu ne coûte rien à garder
+    keep = [name for name in schema.names if name not in owner or collectors[owner[name]]["collect"]]
+    features = {
+        name: {**by_feature[name], "collector": owner.get(name),
+               "missing_rate": round(float(dataset.missing_rate[index[name]]), 4)}
+        for name in sorted(schema.names, key=lambda n: -by_feature[n]["rug_auc_drop"])
+    }
+    return {
+        "model": str(scorer.models_path),
+        "model_version": scorer.model_version,
+        "schema": schema.fingerprint,
+        "evaluation": evaluation,
+        "trained_through_id": cutoff,
+        "rows_evaluated": int(len(X)),
+        "repeats": n_repeats,
+        "thresholds": {"min_auc_drop": min_auc_drop, "min_r2_drop": min_r2_drop},
+        "baseline": baseline,
+        "collectors": collectors,
+        "features": features,
+        "skip_collectors": [name for name, c in collectors.items() if not c["collect"]],
+        "keep": keep,
+        "drop": [name for name in schema.names if name not in keep],
+    }
+
+
+def save_profile(report: Dict, path: Path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2))
+
+
+def load_kept_features(path: Path) -> List[str]:
+    """Liste "keep" d'un rapport de profiling (ou fichier JSON contenant une simple liste)"""
+    data = json.loads(Path(path).read_text())
+    return list(data["keep"] if isinstance(data, dict) else data)
+
+
+def reduce_dataset(dataset: Dataset, schema: FeatureSchema, keep: Sequence[str]) -> Dataset:
+    """Copie du jeu où les features hors `keep` valent leur imputation: constantes, aucun arbre ne les lit"""
+    unknown = set(keep) - set(schema.names)
+    if unknown:
+        raise ValueError(f"Unknown features: {', '.join(sorted(unknown))}")
+    dropped = [j for j, name in enumerate(schema.names) if name not in set(keep)]
+    X = dataset.X.copy()
+    X[:, dropped] = schema.defaults[dropped]
+    logger.info(f"✂️ Reduced dataset: {len(schema) - len(dropped)}/{len(schema)} features kept")
+    return dataclasses.replace(dataset, X=X, stats={**dataset.stats,
+                                                    "dropped_features": [schema.names[j] for j in dropped]})
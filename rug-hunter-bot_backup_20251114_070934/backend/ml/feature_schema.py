@@ -0,0 +1,162 @@
+"""
+📋 Feature Schema - ordre des colonnes, types et imputation des modèles ML
+Le schéma est écrit à côté des pickles (feature_schema.json): des modèles
+entraînés sur un autre ordre de colonnes refusent de se charger.
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_FILENAME = "feature_schema.json"
+SCHEMA_VERSION = 1
+
+# (nom, type, valeur d'imputation); l'ordre est celui des colonnes des modèles
+V1_COLUMNS: List[Tuple[str, str, float]] = [
+    ('contract_verified', 'bool', 0), ('ownership_renounced', 'bool', 0), ('has_mint_function', 'bool', 0),
+    ('has_pause_function', 'bool', 0), ('has_blacklist_function', 'bool', 0), ('has_proxy_pattern', 'bool', 0),
+    ('has_selfdestruct', 'bool', 0), ('admin_functions_count', 'int', 0), ('compiler_version_recent', 'bool', 0),
+    ('bytecode_suspicious', 'bool', 0), ('external_calls_safe', 'bool', 0), ('reentrancy_protected', 'bool', 0),
+    ('can_buy', 'bool', 0), ('can_sell', 'bool', 0), ('buy_gas_used', 'int', 0), ('sell_gas_used', 'int', 0),
+    ('buy_tax_real', 'float', 0), ('sell_tax_real', 'float', 0), ('slippage_tolerance', 'float', 0),
+    ('max_transaction_limit', 'float', 0),
+    ('liquidity_eth', 'float', 0), ('liquidity_usd', 'float', 0), ('market_cap_usd', 'float', 0),
+    ('total_supply', 'float', 0),
+    ('circulating_supply', 'float', 0), ('burned_percent', 'float', 0), ('holder_count', 'int', 0),
+    ('lp_locked', 'bool', 0),
+    ('lp_lock_duration_days', 'float', 0), ('price_usd', 'float', 0), ('age_minutes', 'float', 0),
+    ('pair_creation_block', 'int', 0),
+    ('deployer_address_age', 'float', 0), ('deployer_previous_tokens', 'int', 0), ('owner_is_deployer', 'bool', 0),
+    ('ownership_transfers_count', 'int', 0), ('owner_eth_balance', 'float', 0), ('contract_eth_balance', 'float', 0),
+    ('top10_holders_percent', 'float', 0), ('owner_balance_percent', 'float', 0),
+    ('volume_5min_usd', 'float', 0), ('buy_count_5min', 'int', 0), ('sell_count_5min', 'int', 0),
+    ('unique_buyers_5min', 'int', 0),
+    ('price_change_5min_percent', 'float', 0), ('price_volatility_5min', 'float', 0), ('largest_buy_usd', 'float', 0),
+    ('largest_sell_usd', 'float', 0),
+    ('owner_sells_post_launch', 'bool', 0), ('whale_buys_count', 'int', 0), ('whale_sells_count', 'int', 0),
+    ('suspicious_wallet_funding', 'bool', 0), ('bot_wallets_detected', 'int', 0),
+    ('coordinated_buying_detected', 'bool', 0),
+]
+
+
+class FeatureSchemaError(RuntimeError):
+    pass
+
+
+class FeatureSchema:
+    """
+    Colonnes figées au chargement. `fill` écrit une ligne dans un buffer numpy
+    préalloué et renseigne le masque des valeurs imputées (absentes, None ou
+    non numériques).
+    """
+
+    def __init__(self, columns: Sequence[Tuple[str, str, float]], version: int = SCHEMA_VERSION,
+                 defaults: Optional[Dict[str, float]] = None):
+        self.version = version
+        # Les valeurs d'imputation peuvent être remplacées (ex: médianes du jeu d'entraînement)
+        defaults = defaults or {}
+        self.columns: List[Tuple[str, str, float]] = [
+            (name, dtype, float(defaults.get(name, default))) for name, dtype, default in columns
+        ]
+        self.names: List[str] = [name for name, _, _ in self.columns]
+        self.defaults = np.array([default for _, _, default in self.columns], dtype=np.float32)
+        self.imputed_counts = np.zeros(len(self.columns), dtype=np.int64)
+        self.rows = 0
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    @property
+    def fingerprint(self) -> str:
+        """Empreinte de l'ordre et du type des colonnes (les valeurs d'imputation n'en font pas partie)"""
+        spec = ",".join(f"{name}:{dtype}" for name, dtype, _ in self.columns)
+        return hashlib.sha256(spec.encode()).hexdigest()[:16]
+
+    def fill(self, indicators: Dict, out: np.ndarray, missing: np.ndarray):
+        """Remplit `out` (une ligne) et `missing` (bool) en une passe sur les colonnes"""
+        get = indicators.get
+        for j, name in enumerate(self.names):
+            value = get(name)
+            try:
+                out[j] = value
+                missing[j] = value is None
+            except (TypeError, ValueError):
+                missing[j] = True
+            if missing[j]:
+                out[j] = self.defaults[j]
+
+    def build(self, batch: Sequence[Dict], out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Matrice float32 (n, colonnes) et masque des valeurs imputées"""
+        n = len(batch)
+        X = out[:n] if out is not None and len(out) >= n else np.empty((n, len(self.columns)), dtype=np.float32)
+        missing = np.empty((n, len(self.columns)), dtype=bool)
+        for i, indicators in enumerate(batch):
+            self.fill(indicators, X[i], missing[i])
+        self.imputed_counts += missing.sum(axis=0)
+        self.rows += n
+        return X, missing
+
+    def missing_features(self, missing_row: np.ndarray) -> List[str]:
+        return [self.names[j] for j in np.flatnonzero(missing_row)]
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": self.version,
+            "fingerprint": self.fingerprint,
+            "columns": [{"name": name, "dtype": dtype, "default": default} for name, dtype, default in self.columns],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FeatureSchema":
+        columns = [(c["name"], c["dtype"], c.get("default", 0)) for c in data["columns"]]
+        schema = cls(columns, data.get("version", SCHEMA_VERSION))
+        if data.get("fingerprint") and data["fingerprint"] != schema.fingerprint:
+            raise FeatureSchemaError(f"Schema file is corrupted (fingerprint {data['fingerprint']} "
+                                     f"!= {schema.fingerprint})")
+        return schema
+
+    def save(self, models_path: Path):
+        path = Path(models_path) / SCHEMA_FILENAME
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2))
+
+    def check_compatible(self, other: "FeatureSchema"):
+        if other.fingerprint != self.fingerprint:
+            raise FeatureSchemaError(
+                f"Model feature schema v{other.version} ({other.fingerprint}) does not match "
+                f"scorer schema v{self.version} ({self.fingerprint})"
+            )
+
+    def get_stats(self) -> Dict:
+        top = np.argsort(self.imputed_counts)[::-1][:10]
+        return {
+            "version": self.version,
+            "fingerprint": self.fingerprint,
+            "columns": len(self.columns),
+            "rows": self.rows,
+            "most_imputed": {
+                self.names[j]: round(float(self.imputed_counts[j]) / self.rows, 3)
+                for j in top if self.imputed_counts[j]
+            } if self.rows else {},
+        }
+
+
+def default_schema() -> FeatureSchema:
+    return FeatureSchema(V1_COLUMNS)
+
+
+def load_schema(models_path: Path) -> Optional[FeatureSchema]:
+    """Schéma enregistré avec les modèles, ou None pour des pickles antérieurs au schéma"""
+    path = Path(models_path) / SCHEMA_FILENAME
+    if not path.exists():
+        return None
+    try:
+        return FeatureSchema.from_dict(json.loads(path.read_text()))
+    except (OSError, ValueError, KeyError) as e:
+        raise FeatureSchemaError(f"Unreadable feature schema {path}: {e}")
@@ -0,0 +1,245 @@
+"""
+🔄 Model Registry - remplacement des modèles à chaud
+Surveille models/versions/ (écrit par ml.training). Une nouvelle version est
+chargée en arrière-plan, validée sur un lot canari (les dernières features
+réellement scorées), puis évaluée en shadow: l'ancien et le nouveau modèle
+scorent le même trafic et la divergence est journalisée. Si elle reste
+acceptable, la version remplace l'active par une simple affectation.
+
+Le registre expose l'API de MLScorer (predict, predict_many, schema, get_stats):
+il est passé partout à la place du scorer.
+"""
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Union
+
+import numpy as np
+
+from ml.scorer import MLScorer
+from ml.training import VERSIONS_DIR
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_FILENAME = "ACTIVE"
+# Décision "rug" (risque >= 50) inversée par le nouveau modèle
+RUG_DECISION_THRESHOLD = 50
+
+
+class Divergence:
+    """Écarts cumulés entre le modèle actif et le candidat sur les mêmes lignes"""
+
+    def __init__(self):
+        self.rows = 0
+        self.abs_diff = {"rug_risk": 0.0, "profit_potential": 0.0, "confidence": 0.0}
+        self.rug_flips = 0
+
+    def add(self, active: Dict[str, np.ndarray], candidate: Dict[str, np.ndarray]):
+        self.rows += len(active["rug_risk"])
+        for key in self.abs_diff:
+            self.abs_diff[key] += float(np.abs(active[key] - candidate[key]).sum())
+        self.rug_flips += int(((active["rug_risk"] >= RUG_DECISION_THRESHOLD)
+                               != (candidate["rug_risk"] >= RUG_DECISION_THRESHOLD)).sum())
+
+    @property
+    def flip_rate(self) -> float:
+        return self.rug_flips / self.rows if self.rows else 0.0
+
+    def summary(self) -> Dict:
+        return {
+            "rows": self.rows,
+            "rug_flip_rate": round(self.flip_rate, 4),
+            **{f"mean_abs_{key}": round(total / self.rows, 2) if self.rows else 0.0
+               for key, total in self.abs_diff.items()},
+        }
+
+
+class ModelRegistry:
+    def __init__(self, models_path: str, fallback: str = "neutral", check_interval: float = 30.0,
+                 shadow_seconds: float = 300.0, max_flip_rate: float = 0.3):
+        self.models_path = Path(models_path)
+        self.versions_path = self.models_path / VERSIONS_DIR
+        self.fallback = fallback
+        self.check_interval = check_interval
+        self.shadow_seconds = shadow_seconds
+        self.max_flip_rate = max_flip_rate
+
+        # Version retenue au dernier démarrage, sinon les modèles à la racine
+        active_version = self._read_active()
+        self.active_version = active_version or "root"
+        self.active = MLScorer(str(self.versions_path / active_version) if active_version else models_path, fallback)
+
+        self.candidate: Optional[MLScorer] = None
+        self.candidate_version: Optional[str] = None
+        self.shadow_started: Optional[float] = None
+        self.divergence = Divergence()
+        self.seen: Set[str] = {self.active_version}
+        self.running = False
+        self.history: List[Dict] = []
+        self.stats = {"swaps": 0, "rejected": 0, "shadow_batches": 0, "shadow_errors": 0}
+
+    # ------------------------------------------------------------------
+    # API du scorer
+    # ------------------------------------------------------------------
+
+    @property
+    def schema(self):
+        return self.active.schema
+
+    def predict(self, indicators: dict) -> dict:
+        scores = self.predict_many([indicators])
+        return {key: int(values[0]) for key, values in scores.items()}
+
+    def predict_many(self, batch: Union[Sequence[dict], np.ndarray]) -> Dict[str, np.ndarray]:
+        active = self.active
+        result = active.predict_many(batch)
+
+        candidate = self.candidate
+        if candidate is not None and self.shadow_started is not None:
+            try:
+                self.divergence.add(result, candidate.predict_many(batch))
+                self.stats["shadow_batches"] += 1
+            except Exception as e:
+                # Le shadow ne doit jamais casser le scoring actif
+                self.stats["shadow_errors"] += 1
+                logger.debug(f"Shadow scoring failed for {self.candidate_version}: {e}")
+        return result
+
+    def used_features(self) -> Optional[Set[str]]:
+        """Features lues par l'actif et, en shadow, par le candidat (None: tout collecter)"""
+        used = self.active.used_features()
+        candidate = self.candidate
+        if used is None or candidate is None:
+            return used
+        candidate_used = candidate.used_features()
+        return used | candidate_used if candidate_used is not None else None
+
+    # ------------------------------------------------------------------
+    # Cycle de vie d'une version
+    # ------------------------------------------------------------------
+
+    def _read_active(self) -> Optional[str]:
+        path = self.models_path / ACTIVE_FILENAME
+        if not path.exists():
+            return None
+        version = path.read_text().strip()
+        if version and (self.versions_path / version).is_dir():
+            return version
+        return None
+
+    def _latest_version(self) -> Optional[str]:
+        if not self.versions_path.is_dir():
+            return None
+        # Versions horodatées (YYYYmmdd-HHMMSS): l'ordre alphabétique est chronologique
+        versions = sorted(p.name for p in self.versions_path.iterdir()
+                          if p.is_dir() and (p / "engine").is_dir() and not p.name.startswith("."))
+        newer = [v for v in versions if v not in self.seen and (self.active_version == "root" or v > self.active_version)]
+        return newer[-1] if newer else None
+
+    async def check(self):
+        """Un pas de la boucle: détection, canari, fin de shadow"""
+        if self.candidate is None:
+            version = self._latest_version()
+            if version:
+                await self._start_candidate(version)
+        elif self.shadow_started is not None and time.monotonic() - self.shadow_started >= self.shadow_seconds:
+            self._finish_shadow()
+
+    async def _start_candidate(self, version: str):
+        self.seen.add(version)
+        candidate = MLScorer(str(self.versions_path / version), fallback="error")
+        try:
+            # Chargement (mmap + vérification du schéma) hors de la boucle d'événements
+            await asyncio.to_thread(candidate.load)
+            report = self._canary(candidate)
+        except Exception as e:
+            self._reject(version, f"load/canary failed: {e}")
+            return
+
+        if report["rug_flip_rate"] > self.max_flip_rate:
+            self._reject(version, f"canary flip rate {report['rug_flip_rate']:.0%} > {self.max_flip_rate:.0%}")
+            return
+
+        logger.info(f"🧪 Model {version} passed canary ({report}), shadow scoring for {self.shadow_seconds:.0f}s")
+        self.candidate, self.candidate_version = candidate, version
+        self.divergence = Divergence()
+        self.shadow_started = time.monotonic()
+
+    def _canary(self, candidate: MLScorer) -> Dict:
+        """Features récentes (ou une ligne de valeurs par défaut) scorées par les deux modèles"""
+        X = self.active.recent_features()
+        if not len(X):
+            X = candidate.schema.defaults[None, :].copy()
+        scores = candidate.predict_many(X)
+        for key in ("rug_risk", "profit_potential", "confidence"):
+            values = scores[key]
+            if values.shape != (len(X),) or values.min() < 0 or values.max() > 100:
+                raise ValueError(f"{key} out of range on canary batch")
+
+        divergence = Divergence()
+        try:
+            active_scores = self.active.predict_many(X)
+        except Exception:
+            # Pas de modèle actif utilisable (fallback="error"): rien à comparer
+            active_scores = None
+        if active_scores is not None and not self.active.fallback_active:
+            divergence.add(active_scores, scores)
+        return divergence.summary()
+
+    def _finish_shadow(self):
+        version, summary = self.candidate_version, self.divergence.summary()
+        # Face à des scores neutres (aucun modèle actif), la divergence n'a pas de sens
+        if self.divergence.flip_rate > self.max_flip_rate and not self.active.fallback_active:
+            self._reject(version, f"shadow flip rate {self.divergence.flip_rate:.0%} > {self.max_flip_rate:.0%}")
+        else:
+            self._swap(version, summary)
+        self.candidate, self.candidate_version, self.shadow_started = None, None, None
+
+    def _swap(self, version: str, summary: Dict):
+        previous = self.active_version
+        # Le lot canari de la version suivante reste alimenté par le trafic déjà vu
+        if self.candidate._recent.shape == self.active._recent.shape:
+            self.candidate._recent[:] = self.active._recent
+            self.candidate._recent_count = self.active._recent_count
+        # Une affectation: les appels en cours terminent sur l'ancien modèle, les suivants voient le nouveau
+        self.active, self.active_version = self.candidate, version
+        (self.models_path / ACTIVE_FILENAME).write_text(version)
+        self.stats["swaps"] += 1
+        self.history.append({"version": version, "previous": previous, "status": "active",
+                             "at": time.time(), "shadow": summary})
+        logger.info(f"🔄 Model swapped {previous} -> {version} (shadow: {summary})")
+
+    def _reject(self, version: str, reason: str):
+        self.stats["rejected"] += 1
+        self.history.append({"version": version, "status": "rejected", "reason": reason, "at": time.time(),
+                             "shadow": self.divergence.summary()})
+        logger.warning(f"⚠️ Model {version} rejected: {reason}")
+        self.candidate, self.candidate_version, self.shadow_started = None, None, None
+
+    async def run(self):
+        self.running = True
+        while self.running:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Model registry error: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    def stop(self):
+        self.running = False
+
+    def get_stats(self) -> Dict:
+        stats = self.active.get_stats()
+        stats.update({
+            "active_version": self.active_version,
+            "registry": dict(self.stats),
+            "candidate": {
+                "version": self.candidate_version,
+                "shadow_elapsed": round(time.monotonic() - self.shadow_started, 1) if self.shadow_started else None,
+                "divergence": self.divergence.summary(),
+            } if self.candidate_version else None,
+            "history": self.history[-10:],
+        })
+        return stats
@@ -1,72 +1,302 @@
 """ML Scoring Ensemble"""
+import hashlib
 import joblib
+import logging
+import os
+import shutil
+import threading
+import time
 import numpy as np
 from pathlib import Path
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
-from sklearn.preprocessing import StandardScaler
+from typing import Dict, Optional, Sequence, Set, Tuple, Union
+
+from core.cache import TTLCache
+from ml.calibration import CALIBRATION_FILENAME, ScoreCalibration
+from ml.feature_schema import V1_COLUMNS, FeatureSchema, FeatureSchemaError, default_schema, load_schema
+from ml.tree_engine import TreeEnsemble
+
+logger = logging.getLogger(__name__)
+
+FEATURE_KEYS = [name for name, _, _ in V1_COLUMNS]
+
+PICKLES = ("random_forest_rug.pkl", "gradient_boosting_profit.pkl", "feature_scaler.pkl")
+# Arbres exportés (tree_engine): l'inférence n'importe pas sklearn
+ENGINE_DIR = "engine"
+
+# Modèles absents: "error" lève ModelsUnavailableError, "neutral" renvoie des scores
+# neutres à confiance nulle (aucun auto-trade), "synthetic" génère des modèles de démo
+FALLBACK_MODES = ("error", "neutral", "synthetic")
+NEUTRAL_SCORES = {"rug_risk": 50, "profit_potential": 50, "confidence": 0}
+
+# Cache des prédictions: features float32 tronquées à 12 bits de mantisse (~0.02%),
+# des indicateurs quasi identiques (re-scoring, refresh du dashboard) partagent une entrée
+QUANTIZE_MASK = np.uint32(0xFFFFF800)
+SCORE_KEYS = ("rug_risk", "profit_potential", "confidence")
+
+# Dernières lignes de features scorées: lot canari pour valider un nouveau modèle
+RECENT_ROWS = 512
+
+
+class ModelsUnavailableError(RuntimeError):
+    pass
+
 
 class MLScorer:
-    def __init__(self, models_path: str = "backend/ml/models"):
+    def __init__(self, models_path: str = "backend/ml/models", fallback: str = "neutral", mmap: bool = True,
+                 cache_size: int = 4096):
+        if fallback not in FALLBACK_MODES:
+            raise ValueError(f"Unknown ML fallback mode: {fallback}")
         self.models_path = Path(models_path)
+        self.fallback = fallback
+        # Tableaux .npy mappés en lecture seule: partagés entre workers via le page cache
+        self.mmap = mmap
+
+        # Chargement au premier predict (ou via load())
+        self.rug_engine = None
+        self.profit_engine = None
+        self.schema = default_schema()
+        self.calibration = ScoreCalibration()
+        self.model_version = ""
+        self._used_features: Optional[Set[str]] = None
+        self.cache = TTLCache(maxsize=cache_size, ttl=None)
+        self._recent = np.zeros((RECENT_ROWS, len(self.schema)), dtype=np.float32)
+        self._recent_count = 0
+        self.fallback_active = False
+        self.synthetic = False
+        self._loaded = False
+        self._lock = threading.Lock()
+
+        self.stats = {"load_ms": 0.0, "predictions": 0, "fallback_predictions": 0}
+
+    def load(self):
+        """Charge les arbres exportés; idempotent"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            start = time.perf_counter()
+            try:
+                self.rug_engine, self.profit_engine = self._load_engines()
+            except ModelsUnavailableError as e:
+                if self.fallback == "error":
+                    raise
+                if self.fallback == "synthetic":
+                    logger.warning(f"⚠️ {e} - generating SYNTHETIC models (no predictive value)")
+                    generate_synthetic_models(self.models_path)
+                    self.synthetic = True
+                    self.rug_engine, self.profit_engine = self._load_engines()
+                else:
+                    logger.warning(f"⚠️ {e} - ML scoring in NEUTRAL fallback mode")
+                    self.fallback_active = True
+            if not self.fallback_active:
+                self.schema = self._check_schema()
+                self.calibration = ScoreCalibration.load(self.models_path)
+                if not self.calibration.calibrated:
+                    logger.warning(f"⚠️ No calibration in {self.models_path}: raw vote confidence")
+                self.model_version = self._model_version()
+                self._used_features = {self.schema.names[j] for engine in (self.rug_engine, self.profit_engine)
+                                       for j in engine.used_features()}
+                self.cache.clear()
+            self.stats["load_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            self._loaded = True
+
+    def _load_engines(self) -> Tuple[TreeEnsemble, TreeEnsemble]:
+        """Arbres exportés s'ils sont à jour, sinon export depuis les pickles sklearn"""
+        engine_path = self.models_path / ENGINE_DIR
+        pickles = [self.models_path / name for name in PICKLES]
         try:
-            self.rf_model = joblib.load(self.models_path / "random_forest_rug.pkl")
-            self.gb_model = joblib.load(self.models_path / "gradient_boosting_profit.pkl")
-            self.scaler = joblib.load(self.models_path / "feature_scaler.pkl")
-        except:
-            self._generate_synthetic_models()
+            exported_at = min((engine_path / kind / "meta.json").stat().st_mtime for kind in ("rug", "profit"))
+            fresh = all(not p.exists() or p.stat().st_mtime <= exported_at for p in pickles)
+        except OSError:
+            fresh = False
+
+        if not fresh:
+            missing = [p.name for p in pickles if not p.exists()]
+            if missing:
+                raise ModelsUnavailableError(f"No ML models in {self.models_path} (missing {', '.join(missing)})")
+            self._export_engines()
+        return (TreeEnsemble.load(engine_path / "rug", mmap=self.mmap),
+                TreeEnsemble.load(engine_path / "profit", mmap=self.mmap))
+
+    def _export_engines(self):
+        """
+        Export écrit dans un répertoire temporaire puis mis en place par renommage:
+        un autre processus qui a déjà mappé (mmap) l'ancien export garde des
+        fichiers intacts, et aucun lecteur ne voit un export à moitié écrit.
+        """
+        from ml.tree_engine import export_forest_classifier, export_gradient_boosting
+
+        rf_model = joblib.load(self.models_path / "random_forest_rug.pkl")
+        gb_model = joblib.load(self.models_path / "gradient_boosting_profit.pkl")
+        scaler = joblib.load(self.models_path / "feature_scaler.pkl")
+
+        rug_engine = export_forest_classifier(rf_model, scaler)
+        profit_engine = export_gradient_boosting(gb_model, scaler)
+        engine_path = self.models_path / ENGINE_DIR
+        tmp = self.models_path / f".{ENGINE_DIR}.{os.getpid()}.tmp"
+        old = self.models_path / f".{ENGINE_DIR}.{os.getpid()}.old"
+        shutil.rmtree(tmp, ignore_errors=True)
+        rug_engine.save(tmp / "rug")
+        profit_engine.save(tmp / "profit")
+        # Un répertoire non vide ne peut pas être remplacé d'un coup: l'ancien est
+        # écarté (renommage), le nouveau prend sa place, puis l'ancien est supprimé
+        # (les pages déjà mappées restent valides jusqu'au démappage)
+        if engine_path.exists():
+            os.replace(engine_path, old)
+        os.replace(tmp, engine_path)
+        shutil.rmtree(old, ignore_errors=True)
+        logger.info(f"🌲 Exported {rug_engine.n_trees}+{profit_engine.n_trees} trees to {self.models_path / ENGINE_DIR}")
+
+    def _model_version(self) -> str:
+        """Empreinte des artefacts chargés (taille et date des tableaux, calibration)"""
+        files = [self.models_path / ENGINE_DIR / kind / f"{name}.npy"
+                 for kind in ("rug", "profit") for name in ("threshold", "value")]
+        files.append(self.models_path / CALIBRATION_FILENAME)
+        digest = hashlib.sha1()
+        for path in files:
+            if path.exists():
+                stat = path.stat()
+                digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        return digest.hexdigest()[:12]
+
+    def _check_schema(self) -> FeatureSchema:
+        """Le schéma des modèles doit être celui du scorer (FeatureSchemaError sinon)"""
+        schema = default_schema()
+        saved = load_schema(self.models_path)
+        if saved is None:
+            # Pickles antérieurs au schéma: entraînés sur les colonnes v1
+            logger.warning(f"⚠️ No feature schema in {self.models_path}, assuming v{schema.version}")
+            schema.save(self.models_path)
+            saved = schema
+        schema.check_compatible(saved)
+        for engine in (self.rug_engine, self.profit_engine):
+            if engine.n_features != len(saved):
+                raise FeatureSchemaError(f"Model expects {engine.n_features} features, schema has {len(saved)}")
+        # Les valeurs d'imputation enregistrées avec les modèles font foi
+        return saved
 
     def predict(self, indicators: dict) -> dict:
-        features = self._extract_features(indicators)
-        features_scaled = self.scaler.transform([features])
-        rug_risk = self.rf_model.predict_proba(features_scaled)[0][1] * 100
-        profit_potential = self.gb_model.predict(features_scaled)[0]
-        confidence = min(95, 60 + np.random.randint(0, 35))
-
-        return {
-            "rug_risk": int(rug_risk),
-            "profit_potential": int(max(0, min(100, profit_potential))),
-            "confidence": int(confidence)
-        }
-
-    def _extract_features(self, indicators):
-        keys = [
-            'contract_verified', 'ownership_renounced', 'has_mint_function',
-            'has_pause_function', 'has_blacklist_function', 'has_proxy_pattern',
-            'has_selfdestruct', 'admin_functions_count', 'compiler_version_recent',
-            'bytecode_suspicious', 'external_calls_safe', 'reentrancy_protected',
-            'can_buy', 'can_sell', 'buy_gas_used', 'sell_gas_used',
-            'buy_tax_real', 'sell_tax_real', 'slippage_tolerance', 'max_transaction_limit',
-            'liquidity_eth', 'liquidity_usd', 'market_cap_usd', 'total_supply',
-            'circulating_supply', 'burned_percent', 'holder_count', 'lp_locked',
-            'lp_lock_duration_days', 'price_usd', 'age_minutes', 'pair_creation_block',
-            'deployer_address_age', 'deployer_previous_tokens', 'owner_is_deployer',
-            'ownership_transfers_count', 'owner_eth_balance', 'contract_eth_balance',
-            'top10_holders_percent', 'owner_balance_percent',
-            'volume_5min_usd', 'buy_count_5min', 'sell_count_5min', 'unique_buyers_5min',
-            'price_change_5min_percent', 'price_volatility_5min', 'largest_buy_usd', 'largest_sell_usd',
-            'owner_sells_post_launch', 'whale_buys_count', 'whale_sells_count',
-            'suspicious_wallet_funding', 'bot_wallets_detected', 'coordinated_buying_detected'
-        ]
-        return [int(indicators.get(k, 0)) if isinstance(indicators.get(k, 0), bool) 
-                else indicators.get(k, 0) for k in keys]
-
-    def _generate_synthetic_models(self):
-        print("Generating synthetic ML models...")
-        X_train = np.random.rand(1000, 54)
-        y_rug = np.random.randint(0, 2, 1000)
-        y_profit = np.random.rand(1000) * 100
-
-        self.rf_model = RandomForestClassifier(n_estimators=50, random_state=42)
-        self.rf_model.fit(X_train, y_rug)
-
-        self.gb_model = GradientBoostingRegressor(n_estimators=50, random_state=42)
-        self.gb_model.fit(X_train, y_profit)
-
-        self.scaler = StandardScaler()
-        self.scaler.fit(X_train)
-
-        self.models_path.mkdir(parents=True, exist_ok=True)
-        joblib.dump(self.rf_model, self.models_path / "random_forest_rug.pkl")
-        joblib.dump(self.gb_model, self.models_path / "gradient_boosting_profit.pkl")
-        joblib.dump(self.scaler, self.models_path / "feature_scaler.pkl")
-        print("✅ Synthetic models generated")
+        scores = self.predict_many([indicators])
+        return {key: int(values[0]) for key, values in scores.items()}
+
+    def predict_many(self, batch: Union[Sequence[dict], np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Score un lot en un seul appel par modèle.
+        `batch`: liste de dicts d'indicateurs ou matrice (n, 54) déjà construite.
+        Retourne des tableaux int de longueur n (mêmes clés que predict);
+        "imputed" compte les features absentes remplacées par leur valeur par défaut,
+        "fallback" vaut 1 quand les scores sont neutres faute de modèles.
+        """
+        self.load()
+        if isinstance(batch, np.ndarray):
+            X = np.asarray(batch, dtype=np.float32)
+            imputed = np.zeros(len(X), dtype=np.int64)
+        else:
+            X, missing = self.schema.build(batch)
+            imputed = missing.sum(axis=1)
+        if X.ndim != 2 or X.shape[1] != len(self.schema):
+            raise ValueError(f"Expected (n, {len(self.schema)}) feature matrix, got {X.shape}")
+        n = X.shape[0]
+        self.stats["predictions"] += n
+        self.remember(X)
+
+        if self.fallback_active:
+            self.stats["fallback_predictions"] += n
+            scores = {key: np.full(n, value, dtype=np.int64) for key, value in NEUTRAL_SCORES.items()}
+            return {**scores, "imputed": imputed.astype(np.int64), "fallback": np.ones(n, dtype=np.int64)}
+
+        # Les modèles voient les features quantifiées: le résultat ne dépend que de la clé du cache
+        Xq = (np.ascontiguousarray(X, dtype=np.float32).view(np.uint32) & QUANTIZE_MASK).view(np.float32)
+        keys = [(self.model_version, row.tobytes()) for row in Xq]
+        scores = np.empty((n, len(SCORE_KEYS)), dtype=np.int64)
+        misses = []
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key)
+            if cached is None:
+                misses.append(i)
+            else:
+                scores[i] = cached
+
+        if misses:
+            scores[misses] = self._score(Xq[misses])
+            for i in misses:
+                self.cache.set(keys[i], scores[i].copy())
+
+        result = {key: scores[:, j] for j, key in enumerate(SCORE_KEYS)}
+        result.update({"imputed": imputed.astype(np.int64), "fallback": np.zeros(n, dtype=np.int64)})
+        return result
+
+    def remember(self, X: np.ndarray):
+        """Garde les lignes pour le lot canari (appelé aussi quand le scoring tourne hors process)"""
+        for row in X[-RECENT_ROWS:]:
+            self._recent[self._recent_count % RECENT_ROWS] = row
+            self._recent_count += 1
+
+    def used_features(self) -> Optional[Set[str]]:
+        """Features lues par les arbres chargés; None tant que rien n'est chargé ou en fallback"""
+        return self._used_features
+
+    def recent_features(self) -> np.ndarray:
+        """Lignes de features réellement scorées récemment (copie)"""
+        return self._recent[:min(self._recent_count, RECENT_ROWS)].copy()
+
+    def _score(self, X: np.ndarray) -> np.ndarray:
+        """(n, 3): rug_risk, profit_potential, confidence"""
+        # Le scaler est replié dans les seuils: X brut. Risque et confiance viennent
+        # des mêmes votes d'arbres: un même token obtient toujours le même score
+        rug_probability, confidence = self.calibration.apply(self.rug_engine.tree_values(X))
+        rug_risk = rug_probability * 100
+        profit_potential = np.clip(self.profit_engine.predict(X), 0, 100)
+        confidence = np.round(confidence * 100)
+        return np.stack([rug_risk, profit_potential, confidence], axis=1).astype(np.int64)
+
+    def _extract_features(self, indicators) -> np.ndarray:
+        X, _ = self.schema.build([indicators])
+        return X[0]
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats.update({
+            "models_path": str(self.models_path),
+            "loaded": self._loaded,
+            "fallback_mode": self.fallback,
+            "fallback_active": self.fallback_active,
+            "synthetic": self.synthetic,
+            "calibrated": self.calibration.calibrated,
+            "model_version": self.model_version,
+            "used_features": len(self._used_features) if self._used_features is not None else None,
+            "cache": self.cache.get_stats(),
+            "mmap": self.mmap,
+        })
+        if self.rug_engine is not None:
+            stats["trees"] = {"rug": self.rug_engine.n_trees, "profit": self.profit_engine.n_trees}
+        return stats
+
+
+def generate_synthetic_models(models_path: Path):
+    """Modèles entraînés sur du bruit: démo/développement uniquement (fallback="synthetic")"""
+    from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
+    from sklearn.preprocessing import StandardScaler
+
+    models_path = Path(models_path)
+    print("Generating synthetic ML models...")
+    X_train = np.random.rand(1000, len(V1_COLUMNS))
+    y_rug = np.random.randint(0, 2, 1000)
+    y_profit = np.random.rand(1000) * 100
+
+    rf_model = RandomForestClassifier(n_estimators=50, random_state=42)
+    rf_model.fit(X_train, y_rug)
+
+    gb_model = GradientBoostingRegressor(n_estimators=50, random_state=42)
+    gb_model.fit(X_train, y_profit)
+
+    scaler = StandardScaler()
+    scaler.fit(X_train)
+
+    models_path.mkdir(parents=True, exist_ok=True)
+    joblib.dump(rf_model, models_path / "random_forest_rug.pkl")
+    joblib.dump(gb_model, models_path / "gradient_boosting_profit.pkl")
+    joblib.dump(scaler, models_path / "feature_scaler.pkl")
+    default_schema().save(models_path)
+    print("✅ Synthetic models generated")
@@ -0,0 +1,279 @@
+"""
+⚙️ Scoring Service - scoring ML dans un pool de processus
+Les arbres sont parcourus hors de la boucle d'événements: la boucle ne fait
+qu'attendre des futures. Chaque worker charge les modèles une fois (mmap: les
+pages des tableaux sont partagées entre workers) et garde un MLScorer par
+version. Les scorings arrivés à quelques ms d'intervalle partent en un seul
+lot, et le nombre de requêtes en cours est borné.
+
+Le processus principal construit la matrice de features (schéma du registre)
+et consulte le cache des prédictions (mêmes clés quantifiées que MLScorer):
+seules les lignes absentes du cache traversent le pipe, en float32. Le registre reste maître des versions:
+le chemin de l'actif (et du candidat en shadow) accompagne chaque lot.
+
+Ce module ne doit importer que ml.scorer (et core.cache): les workers sont
+lancés en "spawn" et ne chargent ni web3 ni l'application.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.cache import TTLCache
+from ml.scorer import QUANTIZE_MASK, SCORE_KEYS, MLScorer
+
+logger = logging.getLogger(__name__)
+
+# Versions gardées en mémoire par worker (actif, candidat, précédent)
+WORKER_SCORERS = 3
+LATENCY_WINDOW = 1000
+
+# État d'un worker: un MLScorer par chemin de modèles
+_worker_scorers: Dict[str, MLScorer] = {}
+_worker_fallback = "neutral"
+
+
+def _init_worker(models_path: str, fallback: str):
+    """Initialiseur du pool: modèles actifs chargés avant le premier lot"""
+    global _worker_fallback
+    _worker_fallback = fallback
+    try:
+        _worker_scorer(models_path, fallback)
+    except Exception as e:
+        # Le lot échouera avec la même erreur, côté appelant
+        logging.getLogger(__name__).error(f"ML worker preload failed for {models_path}: {e}")
+
+
+def _worker_scorer(models_path: str, fallback: str) -> MLScorer:
+    scorer = _worker_scorers.get(models_path)
+    if scorer is None:
+        scorer = MLScorer(models_path, fallback)
+        scorer.load()
+        _worker_scorers[models_path] = scorer
+        while len(_worker_scorers) > WORKER_SCORERS:
+            _worker_scorers.pop(next(iter(_worker_scorers)))
+    return scorer
+
+
+def _score_batch(models_path: str, X: np.ndarray,
+                 shadow_path: Optional[str] = None) -> Tuple[Dict, Optional[Dict], float]:
+    """Exécuté dans un worker: (scores actifs, scores du candidat ou None, ms de calcul)"""
+    start = time.perf_counter()
+    scores = _worker_scorer(models_path, _worker_fallback).predict_many(X)
+    shadow = None
+    if shadow_path:
+        try:
+            shadow = _worker_scorer(shadow_path, "error").predict_many(X)
+        except Exception as e:
+            logging.getLogger(__name__).debug(f"Shadow scoring failed for {shadow_path}: {e}")
+    return scores, shadow, (time.perf_counter() - start) * 1000
+
+
+class ScoringService:
+    """
+    Même API que MLBatcher (predict, get_stats): TokenAnalyzer et la boucle de
+    détection l'utilisent indifféremment.
+    """
+
+    def __init__(self, registry, workers: int = 2, batch_window_ms: float = 5, max_batch_size: int = 256,
+                 max_in_flight: int = 1000, cache_size: int = 4096):
+        self.registry = registry
+        self.workers = workers
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_in_flight = max_in_flight
+
+        self.executor: Optional[ProcessPoolExecutor] = None
+        # Incrémenté à chaque nouveau pool: un seul lot relance un pool cassé
+        self._pool_generation = 0
+        # (version des modèles, ligne quantifiée) -> scores, côté processus principal
+        self.cache = TTLCache(maxsize=cache_size, ttl=None)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending: List[Tuple[dict, asyncio.Future, float]] = []
+        self._flush_handle = None
+        self._tasks = set()
+        self._batches_in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._worker_ms = deque(maxlen=LATENCY_WINDOW)
+
+        self.stats = {"requests": 0, "batches": 0, "largest_batch": 0, "errors": 0,
+                      "waited_for_slot": 0, "pool_restarts": 0, "in_flight": 0, "cache_hits": 0}
+
+    def start(self):
+        """Crée le pool; les workers préchargent les modèles actifs"""
+        if self.executor is not None:
+            return
+        # Export des arbres (pickles sans engine/) fait ici, une fois: les workers
+        # ne font que mapper les tableaux, jamais les réécrire
+        self.registry.active.load()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(str(self.registry.active.models_path), self.registry.fallback),
+        )
+        # Démarre les workers maintenant plutôt qu'au premier token
+        for _ in range(self.workers):
+            self.executor.submit(int)
+        logger.info(f"⚙️ ML scoring service started ({self.workers} workers)")
+
+    async def stop(self):
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def predict(self, indicators: dict) -> Dict:
+        """Même résultat que MLScorer.predict; attend une place si trop de scorings sont en cours"""
+        if self.executor is None:
+            self.start()
+        if self._slots.locked():
+            self.stats["waited_for_slot"] += 1
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending.append((indicators, future, time.perf_counter()))
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+            self._schedule_flush(loop)
+            try:
+                return await future
+            finally:
+                self.stats["in_flight"] -= 1
+
+    submit = predict
+
+    def _schedule_flush(self, loop):
+        if len(self._pending) >= self.max_batch_size:
+            if self._flush_handle:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        self.stats["batches"] += 1
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(pending))
+        task = asyncio.get_running_loop().create_task(self._run_batch(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, pending: List[Tuple[dict, asyncio.Future, float]]):
+        registry = self.registry
+        active = registry.active
+        candidate = registry.candidate if registry.shadow_started is not None else None
+        self._batches_in_flight += 1
+        try:
+            # Schéma et valeurs d'imputation des modèles actifs (chargement mmap, une fois, hors boucle)
+            await asyncio.to_thread(active.load)
+            X, missing = active.schema.build([indicators for indicators, _, _ in pending])
+            # Le lot canari des prochaines versions vient du trafic réel
+            active.remember(X)
+            scores, misses, keys = self._from_cache(active, X)
+            shadow = None
+            if misses:
+                computed, shadow, worker_ms = await self._execute(
+                    str(active.models_path), X[misses], str(candidate.models_path) if candidate is not None else None)
+                for key, values in computed.items():
+                    scores.setdefault(key, np.zeros(len(X), dtype=np.int64))[misses] = values
+                if keys is not None and not computed["fallback"].any():
+                    for j, i in enumerate(misses):
+                        self.cache.set(keys[i], tuple(int(computed[key][j]) for key in SCORE_KEYS))
+                self._worker_ms.append(worker_ms)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"ML batch scoring failed ({len(pending)} tokens): {e}")
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._batches_in_flight -= 1
+
+        # Les imputations se comptent sur les dicts, côté processus principal
+        scores["imputed"] = missing.sum(axis=1).astype(np.int64)
+        if shadow is not None and candidate is registry.candidate:
+            # Le candidat n'a vu que les lignes absentes du cache
+            registry.divergence.add({key: values[misses] for key, values in scores.items()}, shadow)
+            registry.stats["shadow_batches"] += 1
+
+        now = time.perf_counter()
+        for i, (_, future, submitted) in enumerate(pending):
+            self._latencies.append((now - submitted) * 1000)
+            if not future.done():
+                future.set_result({key: int(values[i]) for key, values in scores.items()})
+
+    def _from_cache(self, active: MLScorer, X: np.ndarray) -> Tuple[Dict[str, np.ndarray], List[int], Optional[list]]:
+        """
+        Scores déjà connus du lot: (scores partiels, indices à calculer, clés).
+        Pas de cache en fallback: les scores neutres ne dépendent pas des features.
+        """
+        n = len(X)
+        if active.fallback_active:
+            return {}, list(range(n)), None
+        Xq = np.ascontiguousarray(X, dtype=np.float32).view(np.uint32) & QUANTIZE_MASK
+        keys = [(active.model_version, row.tobytes()) for row in Xq]
+        scores = {key: np.zeros(n, dtype=np.int64) for key in (*SCORE_KEYS, "fallback")}
+        misses = []
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key)
+            if cached is None:
+                misses.append(i)
+                continue
+            for key_name, value in zip(SCORE_KEYS, cached):
+                scores[key_name][i] = value
+        self.stats["cache_hits"] += n - len(misses)
+        return scores, misses, keys
+
+    async def _execute(self, models_path: str, X: np.ndarray, shadow_path: Optional[str]):
+        loop = asyncio.get_running_loop()
+        generation = self._pool_generation
+        try:
+            return await loop.run_in_executor(self.executor, _score_batch, models_path, X, shadow_path)
+        except BrokenProcessPool:
+            # Worker tué (OOM, signal): les lots en vol échouent tous, seul le premier
+            # relance le pool; les autres réessaient sur le nouveau
+            if generation == self._pool_generation:
+                logger.warning("⚠️ ML scoring pool broken, restarting workers")
+                self.stats["pool_restarts"] += 1
+                self._pool_generation += 1
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+                self.start()
+            return await loop.run_in_executor(self.executor, _score_batch, models_path, X, shadow_path)
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        latencies = np.array(self._latencies) if self._latencies else None
+        stats.update({
+            "workers": self.workers,
+            "avg_batch_size": round(stats["requests"] / stats["batches"], 2) if stats["batches"] else 0,
+            "pending": len(self._pending),
+            "batches_in_flight": self._batches_in_flight,
+            "max_in_flight": self.max_in_flight,
+            "latency_ms": {
+                "p50": round(float(np.percentile(latencies, 50)), 2),
+                "p95": round(float(np.percentile(latencies, 95)), 2),
+                "max": round(float(latencies.max()), 2),
+            } if latencies is not None else None,
+            "avg_worker_ms": round(float(np.mean(self._worker_ms)), 2) if self._worker_ms else 0,
+            "cache": self.cache.get_stats(),
+        })
+        return stats
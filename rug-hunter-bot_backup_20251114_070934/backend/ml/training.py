@@ -0,0 +1,446 @@
+"""
+🎓 Training - jeu de données étiqueté et entraînement hors ligne des modèles
+Les détections analysées (DetectedToken.analysis_data["indicators"]) sont lues
+par lots depuis la base; l'étiquette vient des réserves de la paire relues
+on-chain (eth_call historique) sur l'horizon qui suit la détection:
+  - rugged: la réserve native est tombée sous 10% de son maximum
+  - max_multiple: prix max atteint / prix au bloc de détection
+Les modèles sont validés en CV chronologique (n_jobs), le risque et la
+confiance calibrés sur la période la plus récente, puis écrits dans un
+dossier versionné avec leur schéma et un rapport de métriques.
+"""
+
+import json
+import logging
+import shutil
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from core.deployer_index import RPC_BATCH_SIZE, RUG_LIQUIDITY_RATIO
+from core.detector import WRAPPED_NATIVE
+from core.evm_abi import SELECTORS
+from core.http_client import HTTPClient, get_http_client
+from core.swap_flow import BLOCK_TIMES
+from ml.calibration import CALIBRATION_FILENAME, ScoreCalibration
+from ml.feature_schema import FeatureSchema, default_schema
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HORIZON_HOURS = 24
+DEFAULT_SAMPLES = 12
+DEFAULT_CHUNK_SIZE = 5_000
+# Part la plus récente du jeu réservée à la calibration (risque et confiance)
+CALIBRATION_FRACTION = 0.2
+
+# profit_potential = 100 * log(max_multiple) / log(PROFIT_CAP_MULTIPLE), borné à [0, 100]
+PROFIT_CAP_MULTIPLE = 10.0
+
+VERSIONS_DIR = "versions"
+ARTIFACTS = ("random_forest_rug.pkl", "gradient_boosting_profit.pkl", "feature_scaler.pkl", "feature_schema.json",
+             CALIBRATION_FILENAME, "metrics.json")
+
+LABELS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (
+    chain TEXT NOT NULL,
+    token TEXT NOT NULL,
+    horizon_hours INTEGER NOT NULL,
+    rugged INTEGER NOT NULL,
+    max_multiple REAL NOT NULL,
+    samples INTEGER NOT NULL,
+    labeled_at REAL NOT NULL,
+    PRIMARY KEY (chain, token, horizon_hours)
+);
+"""
+
+
+def profit_target(max_multiple: np.ndarray) -> np.ndarray:
+    multiple = np.maximum(np.asarray(max_multiple, dtype=np.float64), 1.0)
+    return np.clip(100 * np.log(multiple) / np.log(PROFIT_CAP_MULTIPLE), 0, 100)
+
+
+def iter_detections(session, chunk_size: int = DEFAULT_CHUNK_SIZE, limit: Optional[int] = None) -> Iterator[Dict]:
+    """Détections analysées avec paire et bloc connus, lues par lots de `chunk_size` (yield_per)"""
+    from database.models import DetectedToken
+
+    query = (
+        session.query(DetectedToken)
+        .filter(DetectedToken.analyzed.is_(True))
+        .filter(DetectedToken.pair_address.isnot(None))
+        .filter(DetectedToken.block_number.isnot(None))
+        .order_by(DetectedToken.id)
+        .yield_per(chunk_size)
+    )
+    if limit:
+        query = query.limit(limit)
+
+    for token in query:
+        analysis = token.analysis_data or {}
+        indicators = analysis.get("indicators")
+        if not indicators:
+            continue
+        yield {
+            "id": token.id,
+            "chain": token.chain,
+            "token": token.token_address.lower(),
+            "pair": token.pair_address.lower(),
+            "block": token.block_number,
+            "detected_at": token.detected_at,
+            "indicators": indicators,
+            # Statut et durée de chaque collecteur au moment de l'analyse (coût de collecte)
+            "collectors": (analysis.get("indicator_report") or {}).get("collectors", {}),
+        }
+
+
+def _chunks(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class OutcomeLabeler:
+    """
+    Issue d'un token d'après les réserves de sa paire à `samples` blocs répartis
+    sur l'horizon. Nécessite un nœud archive (eth_call à un bloc passé).
+    Les étiquettes sont mémorisées en SQLite: un ré-entraînement ne relit pas la chaîne.
+    """
+
+    def __init__(self, path: str = "data/training_labels.db", http_client: Optional[HTTPClient] = None,
+                 horizon_hours: int = DEFAULT_HORIZON_HOURS, samples: int = DEFAULT_SAMPLES):
+        self.http = http_client or get_http_client()
+        self.horizon_hours = horizon_hours
+        self.samples = samples
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript(LABELS_SCHEMA)
+        self.stats = {"cached": 0, "labeled": 0, "immature": 0, "unavailable": 0}
+
+    def _cached(self, chain: str, tokens: List[str]) -> Dict[str, Tuple[int, float]]:
+        placeholders = ",".join("?" * len(tokens))
+        rows = self.db.execute(
+            f"SELECT token, rugged, max_multiple FROM labels WHERE chain = ? AND horizon_hours = ? "
+            f"AND token IN ({placeholders})", (chain, self.horizon_hours, *tokens)
+        )
+        return {token: (rugged, max_multiple) for token, rugged, max_multiple in rows}
+
+    async def _rpc_batch(self, rpc_url: str, calls: List[Tuple[str, list]]) -> List:
+        results = []
+        for i in range(0, len(calls), RPC_BATCH_SIZE):
+            chunk = calls[i:i + RPC_BATCH_SIZE]
+            resp = await self.http.post_rpc(rpc_url, json=[
+                {"jsonrpc": "2.0", "id": j, "method": method, "params": params}
+                for j, (method, params) in enumerate(chunk)
+            ])
+            if resp.status != 200 or not isinstance(resp.data, list):
+                raise RuntimeError(f"RPC batch failed ({resp.status})")
+            by_id = {item.get("id"): item.get("result") for item in resp.data}
+            results.extend(by_id.get(j) for j in range(len(chunk)))
+        return results
+
+    def _outcome(self, chain: str, token: str, reserves: List[Optional[str]]) -> Optional[Tuple[int, float]]:
+        weth = WRAPPED_NATIVE.get(chain, "").lower()
+        native, price = [], []
+        for result in reserves:
+            if not result or len(result) < 130:
+                continue
+            reserve0, reserve1 = int(result[2:66], 16), int(result[66:130], 16)
+            native_reserve, token_reserve = (reserve0, reserve1) if weth < token else (reserve1, reserve0)
+            native.append(native_reserve)
+            price.append(native_reserve / token_reserve if token_reserve else 0.0)
+        if len(native) < 2 or not native[0] or not price[0]:
+            return None
+
+        native = np.array(native, dtype=np.float64)
+        rugged = bool((native < np.maximum.accumulate(native) * RUG_LIQUIDITY_RATIO).any())
+        return int(rugged), float(max(price) / price[0])
+
+    async def label(self, chain: str, rpc_url: str, rows: List[Dict], latest_block: int) -> Dict[str, Tuple[int, float]]:
+        """token -> (rugged, max_multiple); les tokens dont l'horizon n'est pas écoulé sont ignorés"""
+        labels = self._cached(chain, [row["token"] for row in rows])
+        self.stats["cached"] += len(labels)
+
+        horizon_blocks = self.horizon_hours * 3600 // BLOCK_TIMES.get(chain, 12)
+        todo = []
+        for row in rows:
+            if row["token"] in labels:
+                continue
+            if row["block"] + horizon_blocks > latest_block:
+                self.stats["immature"] += 1
+                continue
+            todo.append(row)
+        if not todo:
+            return labels
+
+        offsets = [round(i * horizon_blocks / self.samples) for i in range(self.samples + 1)]
+        calls = [
+            ("eth_call", [{"to": row["pair"], "data": "0x" + SELECTORS["getReserves"]}, hex(row["block"] + offset)])
+            for row in todo for offset in offsets
+        ]
+        results = await self._rpc_batch(rpc_url, calls)
+
+        now = time.time()
+        per_row = len(offsets)
+        for i, row in enumerate(todo):
+            outcome = self._outcome(chain, row["token"], results[i * per_row:(i + 1) * per_row])
+            if outcome is None:
+                # Pas de nœud archive ou paire illisible: retenté au prochain entraînement
+                self.stats["unavailable"] += 1
+                continue
+            labels[row["token"]] = outcome
+            self.db.execute(
+                "INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (chain, row["token"], self.horizon_hours, outcome[0], outcome[1], per_row, now),
+            )
+            self.stats["labeled"] += 1
+        self.db.commit()
+        return labels
+
+    def close(self):
+        self.db.close()
+
+
+@dataclass
+class Dataset:
+    X: np.ndarray
+    y_rug: np.ndarray
+    y_profit: np.ndarray
+    ids: np.ndarray
+    missing_rate: np.ndarray
+    stats: Dict = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.X)
+
+
+async def build_dataset(session, rpc_urls: Dict[str, str], labeler: OutcomeLabeler,
+                        schema: Optional[FeatureSchema] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        limit: Optional[int] = None) -> Dataset:
+    """
+    Parcourt les détections par lots: étiquetage (un batch RPC par chaîne et par lot)
+    puis features dans des buffers float32. Seuls les tableaux numériques sont conservés.
+    """
+    schema = schema or default_schema()
+    latest: Dict[str, int] = {}
+    X_parts, rug_parts, multiple_parts, id_parts = [], [], [], []
+    missing_total = np.zeros(len(schema), dtype=np.int64)
+    collector_ms: Dict[str, List[float]] = {}
+    collector_status: Dict[str, Dict[str, int]] = {}
+    seen = 0
+
+    for chunk in _chunks(iter_detections(session, chunk_size, limit), chunk_size):
+        seen += len(chunk)
+        for row in chunk:
+            for name, entry in row["collectors"].items():
+                status = entry.get("status", "ok")
+                counts = collector_status.setdefault(name, {})
+                counts[status] = counts.get(status, 0) + 1
+                if status != "skipped":
+                    collector_ms.setdefault(name, []).append(float(entry.get("ms", 0.0)))
+        labeled: List[Tuple[Dict, Tuple[int, float]]] = []
+        for chain in {row["chain"] for row in chunk}:
+            rpc_url = rpc_urls.get(chain)
+            if not rpc_url:
+                continue
+            if chain not in latest:
+                block = await labeler._rpc_batch(rpc_url, [("eth_blockNumber", [])])
+                latest[chain] = int(block[0], 16)
+            rows = [row for row in chunk if row["chain"] == chain]
+            labels = await labeler.label(chain, rpc_url, rows, latest[chain])
+            labeled.extend((row, labels[row["token"]]) for row in rows if row["token"] in labels)
+        if not labeled:
+            continue
+
+        X, missing = schema.build([row["indicators"] for row, _ in labeled])
+        X_parts.append(X.copy())
+        missing_total += missing.sum(axis=0)
+        rug_parts.append(np.array([label[0] for _, label in labeled], dtype=np.int8))
+        multiple_parts.append(np.array([label[1] for _, label in labeled], dtype=np.float32))
+        id_parts.append(np.array([row["id"] for row, _ in labeled], dtype=np.int64))
+        logger.info(f"📚 Dataset: {sum(len(p) for p in X_parts)} labeled / {seen} detections read")
+
+    if not X_parts:
+        raise ValueError("No labeled detections: check RPC archive access and the label horizon")
+
+    X = np.concatenate(X_parts)
+    multiples = np.concatenate(multiple_parts)
+    return Dataset(
+        X=X,
+        y_rug=np.concatenate(rug_parts),
+        y_profit=profit_target(multiples).astype(np.float32),
+        ids=np.concatenate(id_parts),
+        missing_rate=missing_total / len(X),
+        stats={"detections_read": seen, "labeled": len(X), "median_max_multiple": float(np.median(multiples)),
+               "collectors": _collector_costs(collector_ms, collector_status), **labeler.stats},
+    )
+
+
+def _collector_costs(ms: Dict[str, List[float]], status: Dict[str, Dict[str, int]]) -> Dict:
+    """Coût mesuré par collecteur sur les analyses stockées (durée et taux d'échec)"""
+    costs = {}
+    for name, counts in status.items():
+        durations = np.array(ms.get(name, []), dtype=np.float64)
+        runs = len(durations)
+        costs[name] = {
+            "runs": runs,
+            "avg_ms": round(float(durations.mean()), 1) if runs else 0.0,
+            "p95_ms": round(float(np.percentile(durations, 95)), 1) if runs else 0.0,
+            "timeout_rate": round(counts.get("timeout", 0) / runs, 4) if runs else 0.0,
+            "error_rate": round(counts.get("error", 0) / runs, 4) if runs else 0.0,
+            "skipped": counts.get("skipped", 0),
+        }
+    return costs
+
+
+def train_models(dataset: Dataset, n_jobs: int = -1, folds: int = 5, n_estimators: int = 200,
+                 min_samples_leaf: int = 5, random_state: int = 42,
+                 calibration_fraction: float = CALIBRATION_FRACTION
+                 ) -> Tuple[object, object, object, ScoreCalibration, Dict]:
+    """
+    Forêt (rug) et gradient boosting (profit) sur les features normalisées.
+    CV chronologique (TimeSeriesSplit, ordre des ids): un fold ne voit jamais le futur.
+    La calibration est ajustée sur les votes d'une forêt entraînée sans la période
+    la plus récente; les modèles finaux sont ensuite réentraînés sur tout le jeu.
+    """
+    from ml.tree_engine import export_forest_classifier
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestClassifier
+    from sklearn.model_selection import TimeSeriesSplit, cross_validate
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    if len(np.unique(dataset.y_rug)) < 2:
+        raise ValueError("Rug labels contain a single class, cannot train a classifier")
+
+    order = np.argsort(dataset.ids)
+    X, y_rug, y_profit = dataset.X[order], dataset.y_rug[order], dataset.y_profit[order]
+    cv = TimeSeriesSplit(n_splits=folds)
+
+    def forest(jobs: int):
+        return RandomForestClassifier(n_estimators=n_estimators, min_samples_leaf=min_samples_leaf,
+                                      class_weight="balanced", n_jobs=jobs, random_state=random_state)
+
+    def boosting():
+        return GradientBoostingRegressor(n_estimators=n_estimators, max_depth=3, learning_rate=0.05,
+                                         subsample=0.8, random_state=random_state)
+
+    start = time.time()
+    # Parallélisme sur les folds; chaque modèle du CV reste mono-thread
+    rug_cv = cross_validate(make_pipeline(StandardScaler(), forest(1)), X, y_rug, cv=cv, n_jobs=n_jobs,
+                            scoring=("roc_auc", "average_precision", "neg_brier_score"))
+    profit_cv = cross_validate(make_pipeline(StandardScaler(), boosting()), X, y_profit, cv=cv, n_jobs=n_jobs,
+                               scoring=("r2", "neg_mean_absolute_error"))
+    cv_seconds = time.time() - start
+
+    split = len(X) - max(1, int(len(X) * calibration_fraction))
+    holdout_scaler = StandardScaler().fit(X[:split])
+    holdout_forest = forest(n_jobs).fit(holdout_scaler.transform(X[:split]), y_rug[:split])
+    votes = export_forest_classifier(holdout_forest, holdout_scaler).tree_values(X[split:])
+    calibration = ScoreCalibration.fit(votes, y_rug[split:])
+
+    scaler = StandardScaler().fit(X)
+    X_scaled = scaler.transform(X)
+    rf_model = forest(n_jobs).fit(X_scaled, y_rug)
+    rf_model.set_params(n_jobs=None)
+    gb_model = boosting().fit(X_scaled, y_profit)
+
+    def summary(scores: Dict, name: str, sign: float = 1.0) -> Dict:
+        values = sign * scores[f"test_{name}"]
+        return {"mean": round(float(values.mean()), 4), "std": round(float(values.std()), 4),
+                "folds": [round(float(v), 4) for v in values]}
+
+    metrics = {
+        "rows": len(X),
+        # Dernière détection vue à l'entraînement: les suivantes sont hors échantillon
+        "trained_through_id": int(dataset.ids.max()),
+        "rug_rate": round(float(y_rug.mean()), 4),
+        "cv_folds": folds,
+        "cv_seconds": round(cv_seconds, 1),
+        "train_seconds": round(time.time() - start - cv_seconds, 1),
+        "calibration": calibration.meta,
+        "rug": {
+            "roc_auc": summary(rug_cv, "roc_auc"),
+            "average_precision": summary(rug_cv, "average_precision"),
+            "brier": summary(rug_cv, "neg_brier_score", -1.0),
+        },
+        "profit": {
+            "r2": summary(profit_cv, "r2"),
+            "mae": summary(profit_cv, "neg_mean_absolute_error", -1.0),
+        },
+    }
+    return rf_model, gb_model, scaler, calibration, metrics
+
+
+def save_artifacts(models_path: str, rf_model, gb_model, scaler, schema: FeatureSchema,
+                   metrics: Dict, dataset: Optional[Dataset] = None, version: Optional[str] = None,
+                   calibration: Optional[ScoreCalibration] = None) -> Path:
+    """Écrit models/versions/<version>/ (pickles, schéma, calibration, arbres exportés, metrics.json)"""
+    import joblib
+
+    from ml.tree_engine import export_forest_classifier, export_gradient_boosting
+
+    version = version or datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    versions_path = Path(models_path) / VERSIONS_DIR
+    final_path = versions_path / version
+    if final_path.exists():
+        raise FileExistsError(f"Version already exists: {final_path}")
+    # Écriture dans un dossier caché puis renommage: ModelRegistry ignore les
+    # dossiers ".*" et ne voit jamais une version à moitié écrite
+    path = versions_path / f".{version}.tmp"
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir(parents=True)
+
+    try:
+        joblib.dump(rf_model, path / "random_forest_rug.pkl")
+        joblib.dump(gb_model, path / "gradient_boosting_profit.pkl")
+        joblib.dump(scaler, path / "feature_scaler.pkl")
+        schema.save(path)
+        if calibration is not None:
+            calibration.save(path)
+        export_forest_classifier(rf_model, scaler).save(path / "engine" / "rug")
+        export_gradient_boosting(gb_model, scaler).save(path / "engine" / "profit")
+
+        report = {"version": version, "schema": schema.fingerprint, **metrics}
+        importances = getattr(rf_model, "feature_importances_", None)
+        if importances is not None:
+            top = np.argsort(importances)[::-1][:15]
+            report["top_features"] = {schema.names[j]: round(float(importances[j]), 4) for j in top}
+        if dataset is not None:
+            report["dataset"] = dataset.stats
+            report["most_missing"] = {
+                schema.names[j]: round(float(dataset.missing_rate[j]), 3)
+                for j in np.argsort(dataset.missing_rate)[::-1][:10] if dataset.missing_rate[j]
+            }
+        (path / "metrics.json").write_text(json.dumps(report, indent=2, default=str))
+    except BaseException:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    path.rename(final_path)
+    logger.info(f"💾 Models {version} saved to {final_path}")
+    return final_path
+
+
+def promote(version_path: Path, models_path: str):
+    """Copie une version à la racine des modèles (MLScorer la ré-exporte au prochain chargement)"""
+    models_path = Path(models_path)
+    for name in ARTIFACTS:
+        if not (Path(version_path) / name).exists():
+            # Version sans calibration: l'ancienne ne doit pas s'appliquer aux nouveaux arbres
+            (models_path / name).unlink(missing_ok=True)
+            continue
+        tmp = models_path / f".{name}.tmp"
+        shutil.copy2(Path(version_path) / name, tmp)
+        tmp.replace(models_path / name)
+    # Les pickles copiés gardent leur date: on force le ré-export
+    for name in ARTIFACTS[:3]:
+        (models_path / name).touch()
+    logger.info(f"🚀 Promoted {Path(version_path).name} to {models_path}")
@@ -0,0 +1,178 @@
+"""
+🌲 Tree Engine - inférence numpy des forêts sklearn (sans sklearn)
+Les arbres sont aplatis en tableaux de nœuds contigus (feature, threshold,
+children = [left, right], value). Le StandardScaler est replié dans les seuils:
+(x - mean) / scale <= t  <=>  x <= t * scale + mean.
+Le parcours avance tous les (ligne, arbre) encore actifs d'un niveau par itération.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+ARRAYS = ("feature", "threshold", "children", "value", "roots")
+META_FILENAME = "meta.json"
+
+
+class TreeEnsemble:
+    """
+    prédiction = base + factor * somme des feuilles atteintes.
+    Forêt: base 0, factor 1/n_arbres, feuille = proportion de la classe positive.
+    Gradient boosting: base = prédiction initiale, factor = learning_rate.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, max_depth: int, n_features: int,
+                 base: float = 0.0, factor: float = 1.0, kind: str = "forest", meta: Optional[Dict] = None):
+        self.feature = feature
+        self.threshold = threshold
+        # (n_nœuds, 2): enfant gauche, enfant droit; une feuille pointe sur elle-même
+        self.children = children
+        self._children_flat = children.reshape(-1)
+        self._is_leaf = children[:, 0] == np.arange(len(children))
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.base = base
+        self.factor = factor
+        self.kind = kind
+        self.meta = meta or {}
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def used_features(self) -> np.ndarray:
+        """Colonnes sur lesquelles au moins un nœud interne coupe (les autres n'influencent pas la prédiction)"""
+        return np.unique(self.feature[~self._is_leaf])
+
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        """Index (n, n_arbres) des feuilles atteintes; X brut (non normalisé)"""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected (n, {self.n_features}) matrix, got {X.shape}")
+        n = X.shape[0]
+        flat = X.reshape(-1)
+        leaves = np.tile(self.roots, n)
+        row_offsets = np.repeat(np.arange(n, dtype=np.int64) * self.n_features, self.n_trees)
+
+        # Seuls les couples (ligne, arbre) pas encore sur une feuille avancent
+        active = np.flatnonzero(~self._is_leaf[leaves])
+        nodes = leaves[active]
+        for _ in range(self.max_depth):
+            if not active.size:
+                break
+            go_right = flat[row_offsets[active] + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self._children_flat[2 * nodes + go_right]
+            leaves[active] = nodes
+            inner = ~self._is_leaf[nodes]
+            active = active[inner]
+            nodes = nodes[inner]
+        return leaves.reshape(n, self.n_trees)
+
+    def tree_values(self, X: np.ndarray) -> np.ndarray:
+        """Valeur de chaque arbre (n, n_arbres)"""
+        return self.value[self.leaves(X)]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.base + self.factor * self.tree_values(X).sum(axis=1)
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            np.save(path / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+        (path / META_FILENAME).write_text(json.dumps({
+            "kind": self.kind, "max_depth": self.max_depth, "n_features": self.n_features,
+            "base": self.base, "factor": self.factor, **self.meta,
+        }, indent=2))
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = False) -> "TreeEnsemble":
+        path = Path(path)
+        meta = json.loads((path / META_FILENAME).read_text())
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r" if mmap else None) for name in ARRAYS}
+        core = {k: meta.pop(k) for k in ("kind", "max_depth", "n_features", "base", "factor")}
+        return cls(**arrays, **core, meta=meta)
+
+
+def _flatten(trees: List, leaf_values: List[np.ndarray], mean: np.ndarray, scale: np.ndarray) -> Dict:
+    """Concatène les arbres sklearn (tree_) en un seul jeu de tableaux de nœuds"""
+    features, thresholds, children, values, roots = [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for tree, leaf_value in zip(trees, leaf_values):
+        n = tree.node_count
+        is_leaf = tree.children_left == -1
+        node_ids = np.arange(n) + offset
+
+        feature = np.where(is_leaf, 0, tree.feature).astype(np.int32)
+        threshold = np.where(is_leaf, 0.0, tree.threshold * scale[feature] + mean[feature])
+        features.append(feature)
+        thresholds.append(threshold)
+        children.append(np.stack([
+            np.where(is_leaf, node_ids, tree.children_left + offset),
+            np.where(is_leaf, node_ids, tree.children_right + offset),
+        ], axis=1).astype(np.int32))
+        values.append(leaf_value.astype(np.float64))
+        roots.append(offset)
+
+        offset += n
+        max_depth = max(max_depth, int(tree.max_depth))
+
+    return {
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "children": np.concatenate(children),
+        "value": np.concatenate(values),
+        "roots": np.array(roots, dtype=np.int32),
+        "max_depth": max_depth,
+    }
+
+
+def _scaler_arrays(scaler, n_features: int):
+    if scaler is None:
+        return np.zeros(n_features), np.ones(n_features)
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+    return np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+
+
+def export_forest_classifier(model, scaler=None, positive_class: int = 1) -> TreeEnsemble:
+    """RandomForestClassifier -> probabilité moyenne de `positive_class`"""
+    column = list(model.classes_).index(positive_class)
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    leaf_values = []
+    for tree in trees:
+        # sklearn < 1.4 stocke des effectifs, >= 1.4 des proportions: on normalise dans les deux cas
+        counts = tree.value[:, 0, :]
+        totals = counts.sum(axis=1)
+        leaf_values.append(np.divide(counts[:, column], totals, out=np.zeros(len(totals)), where=totals > 0))
+
+    n_features = model.n_features_in_
+    mean, scale = _scaler_arrays(scaler, n_features)
+    arrays = _flatten(trees, leaf_values, mean, scale)
+    return TreeEnsemble(**arrays, n_features=n_features, base=0.0, factor=1.0 / len(trees), kind="forest")
+
+
+def export_gradient_boosting(model, scaler=None) -> TreeEnsemble:
+    """GradientBoostingRegressor -> init + learning_rate * somme des arbres"""
+    init = model.init_
+    if init == "zero":
+        base = 0.0
+    elif hasattr(init, "constant_"):
+        base = float(np.ravel(init.constant_)[0])
+    else:
+        raise ValueError(f"Unsupported gradient boosting init estimator: {type(init).__name__}")
+
+    trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+    leaf_values = [tree.value[:, 0, 0] for tree in trees]
+
+    n_features = model.n_features_in_
+    mean, scale = _scaler_arrays(scaler, n_features)
+    arrays = _flatten(trees, leaf_values, mean, scale)
+    return TreeEnsemble(**arrays, n_features=n_features, base=base, factor=float(model.learning_rate),
+                        kind="boosting")
@@ -1,6 +1,7 @@
 """Discord Notification System"""
 import logging
-import aiohttp
+
+from core.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -8,6 +9,7 @@ class DiscordNotifier:
     def __init__(self, webhook_url: str = ""):
         self.webhook_url = webhook_url
         self.enabled = bool(webhook_url)
+        self.http = get_http_client()
         
         if self.enabled:
             logger.info("✅ Discord notifications enabled")
@@ -43,8 +45,7 @@ class DiscordNotifier:
                 ]
             }
             
-            async with aiohttp.ClientSession() as session:
-                await session.post(self.webhook_url, json={"embeds": [embed]})
+            await self.http.post(self.webhook_url, json={"embeds": [embed]})
             
             logger.info(f"✅ Discord alert sent")
             
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+🗂️ Construction de l'index des déployeurs depuis les logs PairCreated historiques
+Reprend là où le dernier scan s'est arrêté; relit ensuite les réserves pour marquer les rugs.
+
+    python -m scripts.build_deployer_index --chain BSC --from-block 38000000
+"""
+
+import argparse
+import asyncio
+import logging
+
+from config.settings import Settings
+from core.deployer_index import DeployerIndex
+from core.http_client import close_http_client
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+async def main(args):
+    settings = Settings()
+    rpc_url = getattr(settings, f"{args.chain}_RPC_URL")
+    index = DeployerIndex(args.path or settings.DEPLOYER_INDEX_PATH)
+
+    try:
+        recorded = await index.backfill(args.chain, rpc_url, args.from_block, args.to_block, args.chunk)
+        # Construction hors ligne: toutes les issues, page par page
+        refreshed = await index.refresh_outcomes(args.chain, rpc_url, all_tokens=True)
+        logger.info(f"✅ {recorded} tokens recorded, {refreshed} outcomes refreshed: {index.get_stats()}")
+    finally:
+        index.close()
+        await close_http_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the deployer reputation index")
+    parser.add_argument("--chain", choices=["ETH", "BSC"], required=True)
+    parser.add_argument("--from-block", type=int, default=None, help="default: resume last scan")
+    parser.add_argument("--to-block", type=int, default=None, help="default: latest block")
+    parser.add_argument("--chunk", type=int, default=2_000, help="blocks per eth_getLogs")
+    parser.add_argument("--path", default=None, help="SQLite file (default: DEPLOYER_INDEX_PATH)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+🔬 Importance des features et coût des collecteurs
+Mesure l'importance par permutation sur le modèle actif et la met en regard du
+coût de collecte enregistré; le rapport JSON sert ensuite à entraîner un modèle
+réduit (train_models --features).
+
+    python -m scripts.profile_features --output data/feature_profile.json
+    python -m scripts.train_models --features data/feature_profile.json --promote
+"""
+
+import argparse
+import asyncio
+import logging
+
+from config.settings import Settings
+from core.http_client import close_http_client
+from database.db import DatabaseManager
+from ml.feature_profiling import DEFAULT_REPEATS, EVAL_FRACTION, MIN_AUC_DROP, MIN_R2_DROP, profile_features, save_profile
+from ml.model_registry import ModelRegistry
+from ml.scorer import MLScorer
+from ml.training import OutcomeLabeler, build_dataset
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+async def main(args):
+    settings = Settings()
+    models_path = args.models_path or settings.ML_MODELS_PATH
+    rpc_urls = {chain: getattr(settings, f"{chain}_RPC_URL") for chain in args.chains}
+
+    # Version active du registre (fichier ACTIVE), sinon modèles à la racine
+    scorer = MLScorer(models_path, fallback="error") if args.models_path else \
+        ModelRegistry(models_path, fallback="error").active
+    scorer.load()
+
+    db = DatabaseManager(args.db_url or settings.DATABASE_URL)
+    db.init_db()
+    if not db.engine:
+        raise SystemExit("Database unavailable")
+
+    # Étiquettes en cache (labels-path): seules les nouvelles détections coûtent des appels RPC
+    labeler = OutcomeLabeler(args.labels_path, horizon_hours=args.horizon_hours)
+    try:
+        with db.get_session() as session:
+            dataset = await build_dataset(session, rpc_urls, labeler, scorer.schema, limit=args.limit)
+    finally:
+        labeler.close()
+        await close_http_client()
+
+    report = profile_features(scorer, dataset, args.repeats, args.eval_fraction, args.min_auc_drop, args.min_r2_drop)
+    save_profile(report, args.output)
+
+    logger.info(f"📊 Baseline on {report['rows_evaluated']} rows ({report['evaluation']}): {report['baseline']}")
+    for name, collector in sorted(report["collectors"].items(), key=lambda item: -item[1]["rug_auc_drop"]):
+        cost = collector["cost"]
+        logger.info(f"  {name:<11} auc -{collector['rug_auc_drop']:.4f}  r2 -{collector['profit_r2_drop']:.4f}  "
+                    f"{cost.get('avg_ms', 0):>7.1f} ms (p95 {cost.get('p95_ms', 0):.0f}, "
+                    f"timeouts {cost.get('timeout_rate', 0):.1%})  "
+                    f"{'collect' if collector['collect'] else 'SKIP'}")
+    logger.info(f"✂️ Keep {len(report['keep'])}/{len(report['features'])} features, "
+                f"skip collectors: {report['skip_collectors'] or 'none'} -> {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Permutation importance vs measured collection cost")
+    parser.add_argument("--chains", nargs="+", choices=["ETH", "BSC"], default=["ETH", "BSC"])
+    parser.add_argument("--db-url", default=None, help="default: DATABASE_URL")
+    parser.add_argument("--models-path", default=None, help="model directory to profile (default: active version)")
+    parser.add_argument("--labels-path", default="data/training_labels.db")
+    parser.add_argument("--horizon-hours", type=int, default=24)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="permutations per feature")
+    parser.add_argument("--eval-fraction", type=float, default=EVAL_FRACTION, help="most recent rows evaluated when no detection is newer than the model (in-sample)")
+    parser.add_argument("--min-auc-drop", type=float, default=MIN_AUC_DROP)
+    parser.add_argument("--min-r2-drop", type=float, default=MIN_R2_DROP)
+    parser.add_argument("--output", default="data/feature_profile.json")
+    asyncio.run(main(parser.parse_args()))
@@ -352,6 +352,58 @@ class SystemTester:
             self.print_test("Security", False, str(e))
             return False
     
+    async def test_security_batch_parity(self) -> bool:
+        """Test 11: check_batch donne les mêmes scores que check_token_security (valeurs None comprises)"""
+        self.print_header("TEST 11: Security Batch Parity")
+        
+        try:
+            import random
+            from core.advanced_security_config import SECURITY_PRESETS, AdvancedSecurityChecker
+            
+            rng = random.Random(42)
+            
+            def maybe(value):
+                return None if rng.random() < 0.25 else value
+            
+            tokens = []
+            for _ in range(3000):
+                tokens.append({
+                    "chain": rng.choice(["ETH", "BSC", "SOL"]),
+                    "honeypot_check": {
+                        "buy_tax": rng.uniform(0, 30),
+                        "sell_tax": rng.uniform(0, 30),
+                        "can_sell": maybe(rng.random() < 0.9),
+                    },
+                    "freeze_authority": maybe(rng.random() < 0.3),
+                    "liquidity_usd": rng.uniform(0, 100_000),
+                    "market_cap_usd": rng.choice([0, rng.uniform(1_000, 1_000_000)]),
+                    "holders": maybe(rng.randint(0, 500)),
+                    "top10_holders_percent": maybe(rng.uniform(0, 100)),
+                    "contract_verified": maybe(rng.random() < 0.5),
+                    "ownership_renounced": maybe(rng.random() < 0.5),
+                    "audited": maybe(rng.random() < 0.2),
+                    "volume_24h_usd": rng.uniform(0, 200_000),
+                    "price_change_1h": rng.uniform(-80, 80),
+                    "age_minutes": rng.uniform(0, 2_000),
+                })
+            
+            batch = AdvancedSecurityChecker(SECURITY_PRESETS["MODERATE"]).check_batch(tokens, list(SECURITY_PRESETS))
+            ok = True
+            for preset, config in SECURITY_PRESETS.items():
+                checker = AdvancedSecurityChecker(config)
+                mismatches = sum(
+                    abs(checker.check_token_security(token)["risk_score"] - batch[preset].risk_score[i]) > 1e-9
+                    for i, token in enumerate(tokens)
+                )
+                self.print_test(f"Preset {preset}", mismatches == 0,
+                                f"{len(tokens) - mismatches}/{len(tokens)} scores identiques")
+                ok = ok and mismatches == 0
+            return ok
+            
+        except Exception as e:
+            self.print_test("Security Batch Parity", False, str(e))
+            return False
+    
     def print_summary(self):
         """Affiche le résumé"""
         print(f"\n{Colors.BOLD}{'='*70}")
@@ -397,6 +449,7 @@ class SystemTester:
         await self.test_api_server()
         await self.test_websocket()
         await self.test_security()
+        await self.test_security_batch_parity()
         
         # Afficher le résumé
         self.print_summary()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+🎓 Entraînement des modèles ML depuis les détections stockées
+Étiquettes tirées des réserves on-chain après détection (nœud archive requis).
+
+    python -m scripts.train_models --horizon-hours 24 --n-jobs -1 --promote
+    python -m scripts.train_models --features data/feature_profile.json   # modèle réduit
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+
+from config.settings import Settings
+from core.http_client import close_http_client
+from database.db import DatabaseManager
+from ml.feature_profiling import load_kept_features, reduce_dataset
+from ml.feature_schema import default_schema
+from ml.training import OutcomeLabeler, build_dataset, promote, save_artifacts, train_models
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+async def main(args):
+    settings = Settings()
+    models_path = args.models_path or settings.ML_MODELS_PATH
+    rpc_urls = {chain: getattr(settings, f"{chain}_RPC_URL") for chain in args.chains}
+
+    db = DatabaseManager(args.db_url or settings.DATABASE_URL)
+    db.init_db()
+    if not db.engine:
+        raise SystemExit("Database unavailable")
+
+    labeler = OutcomeLabeler(args.labels_path, horizon_hours=args.horizon_hours, samples=args.samples)
+    schema = default_schema()
+    try:
+        with db.get_session() as session:
+            dataset = await build_dataset(session, rpc_urls, labeler, schema, args.chunk_size, args.limit)
+    finally:
+        labeler.close()
+        await close_http_client()
+    logger.info(f"📚 Dataset ready: {len(dataset)} rows, rug rate {dataset.y_rug.mean():.1%}")
+    if args.features:
+        # Features hors profil figées: leurs collecteurs ne tourneront plus avec ce modèle
+        dataset = reduce_dataset(dataset, schema, load_kept_features(args.features))
+
+    rf_model, gb_model, scaler, calibration, metrics = train_models(dataset, n_jobs=args.n_jobs, folds=args.folds,
+                                                       n_estimators=args.n_estimators)
+    metrics["label_horizon_hours"] = args.horizon_hours
+    if args.features:
+        metrics["dropped_features"] = dataset.stats["dropped_features"]
+    path = save_artifacts(models_path, rf_model, gb_model, scaler, schema, metrics, dataset,
+                          calibration=calibration)
+    logger.info(f"📊 Metrics: {json.dumps({'rug': metrics['rug'], 'profit': metrics['profit']})}")
+
+    if args.promote:
+        promote(path, models_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the rug/profit models from stored detections")
+    parser.add_argument("--chains", nargs="+", choices=["ETH", "BSC"], default=["ETH", "BSC"])
+    parser.add_argument("--db-url", default=None, help="default: DATABASE_URL")
+    parser.add_argument("--models-path", default=None, help="default: ML_MODELS_PATH")
+    parser.add_argument("--labels-path", default="data/training_labels.db")
+    parser.add_argument("--horizon-hours", type=int, default=24, help="rug / max multiple window after detection")
+    parser.add_argument("--samples", type=int, default=12, help="reserve reads per token over the horizon")
+    parser.add_argument("--chunk-size", type=int, default=5_000, help="DB rows per chunk")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--n-estimators", type=int, default=200)
+    parser.add_argument("--features", default=None, help="profile_features report: train on its 'keep' list")
+    parser.add_argument("--promote", action="store_true", help="make the new version the active model")
+    asyncio.run(main(parser.parse_args()))
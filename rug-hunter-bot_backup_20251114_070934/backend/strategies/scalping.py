@@ -1,20 +1,25 @@
 """Scalping Strategy"""
+from core.rule_engine import get_rule_engine
+
+
 class ScalpingStrategy:
-    def __init__(self, risk_manager):
+    def __init__(self, risk_manager, rule_engine=None):
         self.risk_manager = risk_manager
+        self.rules = rule_engine or get_rule_engine()
         self.name = "scalping"
+        # Seuils d'entrée (risque de rug, liquidité): règles "scalping_entry" de config/rules.json
         self.config = {
-            "max_rug_risk": 40,
-            "min_liquidity_usd": 15000,
             "min_profit_potential": 60,
             "stop_loss_percent": -12
         }
 
     def should_enter(self, analysis):
-        if analysis["rug_risk_score"] >= self.config["max_rug_risk"]:
-            return False, "Rug risk too high"
-        if analysis["indicators"]["liquidity_usd"] < self.config["min_liquidity_usd"]:
-            return False, "Liquidity too low"
+        result = self.rules.evaluate("scalping_entry", {
+            "rug_risk_score": analysis["rug_risk_score"],
+            "liquidity_usd": analysis["indicators"]["liquidity_usd"],
+        })
+        if not result["passed"]:
+            return False, result["message"]
         return True, "Entry conditions met"
 
     def should_exit(self, position, current_data):
@@ -6,21 +6,31 @@ from web3 import Web3
 from eth_account import Account
 import time
 
+from core.rule_engine import RuleEngine, get_rule_engine
+
 logger = logging.getLogger(__name__)
 
 class AutoTrader:
-    def __init__(self, trading_engine, wallet_manager, risk_manager, config: dict):
+    def __init__(self, trading_engine, wallet_manager, risk_manager, config: dict, reverifier=None,
+                 rule_engine: Optional[RuleEngine] = None):
         self.engine = trading_engine
         self.wallet = wallet_manager
         self.risk = risk_manager
         self.config = config
         self.enabled = config.get("AUTO_TRADING_ENABLED", False)
-        self.min_confidence = config.get("MIN_AUTO_TRADE_CONFIDENCE", 75)
+        # Surcharge de MIN_CONFIDENCE (règles "auto_trade") seulement si le réglage est explicite
+        self.min_confidence = config.get("MIN_AUTO_TRADE_CONFIDENCE")
         self.active_positions = {}
         self.trade_history = []
+        # PositionReverifier optionnel: signal de sortie d'urgence (honeypot / taxe)
+        self.reverifier = reverifier
+        self.rules = rule_engine or get_rule_engine()
         
         if self.enabled:
-            logger.info(f"✅ Auto-trading ENABLED (min confidence: {self.min_confidence}%)")
+            min_confidence = self.min_confidence
+            if min_confidence is None:
+                min_confidence = self.rules.get("auto_trade").params.get("MIN_CONFIDENCE")
+            logger.info(f"✅ Auto-trading ENABLED (min confidence: {min_confidence}%)")
         else:
             logger.info("ℹ️ Auto-trading DISABLED (manual mode)")
     
@@ -68,29 +78,18 @@ class AutoTrader:
             return None
     
     def _should_auto_trade(self, action: str, final_score: dict, recommendation: dict) -> bool:
-        """Détermine si on doit auto-trader"""
-        
-        # Seulement pour les actions BUY
-        if action not in ["BUY_AGGRESSIVE", "BUY_MODERATE", "BUY_CAUTIOUS"]:
-            return False
-        
-        # Vérifier la confiance
-        confidence = final_score['confidence']
-        if confidence < self.min_confidence:
-            logger.info(f"Confidence too low: {confidence}% < {self.min_confidence}%")
-            return False
-        
-        # Vérifier le score global
-        if final_score['overall_score'] < 60:
-            logger.info(f"Overall score too low: {final_score['overall_score']}")
-            return False
-        
-        # Vérifier la sécurité
-        if final_score['security_score'] < 70:
-            logger.info(f"Security score too low: {final_score['security_score']}")
-            return False
-        
-        return True
+        """Détermine si on doit auto-trader (règles "auto_trade" de config/rules.json)"""
+        
+        result = self.rules.evaluate("auto_trade", {
+            "action": action,
+            "confidence": final_score['confidence'],
+            "overall_score": final_score['overall_score'],
+            "security_score": final_score['security_score'],
+        }, params={"MIN_CONFIDENCE": self.min_confidence} if self.min_confidence is not None else None)
+        
+        if not result["passed"]:
+            logger.info(result["message"])
+        return result["passed"]
     
     async def _execute_buy_order(self, detection: dict, recommendation: dict, analysis: dict) -> dict:
         """Exécute l'ordre d'achat"""
@@ -124,6 +123,7 @@ class AutoTrader:
             "token_address": detection['token_address'],
             "symbol": detection['symbol'],
             "chain": detection['chain'],
+            "dex": detection.get('dex'),
             "entry_price": trade_result['entry_price'],
             "amount_eth": recommendation['position_sizing']['amount_eth'],
             "amount_tokens": trade_result['tokens_received'],
@@ -143,10 +143,25 @@ class AutoTrader:
         """Surveille une position active"""
         
         logger.info(f"👁️ Starting position monitoring: {position['symbol']}")
+        exit_event = self.reverifier.get_exit_event(position['position_id']) if self.reverifier else None
         
         while position['status'] == "ACTIVE":
             try:
-                await asyncio.sleep(30) # Check toutes les 30 secondes
+                # Check toutes les 30 secondes, ou immédiatement sur signal du re-vérificateur
+                if exit_event:
+                    try:
+                        await asyncio.wait_for(exit_event.wait(), timeout=30)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await asyncio.sleep(30)
+                
+                if exit_event and exit_event.is_set():
+                    reason = self.reverifier.exit_signals.get(position['position_id'], "EMERGENCY")
+                    logger.warning(f"🚨 Emergency exit for {position['symbol']}: {reason}")
+                    await self._execute_sell(position, 100, f"EMERGENCY_{reason}")
+                    self.reverifier.forget(position['position_id'])
+                    break
                 
                 # Récupérer le prix actuel (simulation pour l'instant)
                 current_price = position['entry_price'] * 1.05 # Simulation
@@ -0,0 +1,222 @@
+"""Re-vérification continue (honeypot / taxes) des tokens détenus"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from core.http_client import get_http_client
+from core.swap_simulator import SwapSimulator
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de re-simulation en blocs selon l'âge du token (secondes):
+# les rugs basculent surtout dans les premières minutes
+REVERIFY_TIERS = [
+    (15 * 60, 1),
+    (60 * 60, 3),
+    (6 * 3600, 10),
+]
+DEFAULT_REVERIFY_BLOCKS = 25
+
+# Fréquence de lecture de eth_blockNumber par chaîne (secondes)
+BLOCK_POLL_INTERVALS = {"ETH": 2.0, "BSC": 1.0}
+
+
+class PositionReverifier:
+    """
+    Re-simule la vente des tokens détenus (AutoTrader.active_positions et
+    TradingEngine.paper_positions), groupés par bloc, et lève un signal de
+    sortie d'urgence dès que la vente devient impossible ou que la taxe bondit.
+    """
+
+    def __init__(self, simulator: SwapSimulator, rpc_manager, auto_trader=None,
+                 trading_engine=None, config: dict = None):
+        config = config or {}
+        self.simulator = simulator
+        self.rpc_manager = rpc_manager
+        self.auto_trader = auto_trader
+        self.engine = trading_engine
+        self.http = get_http_client()
+
+        self.max_sell_tax = config.get("EMERGENCY_SELL_TAX", 50)
+        self.max_tax_increase = config.get("EMERGENCY_TAX_INCREASE", 15)
+        self.tiers = config.get("REVERIFY_TIERS", REVERIFY_TIERS)
+
+        # (chaîne, token) -> premier résultat de simulation après l'entrée
+        self.baselines: Dict[Tuple[str, str], Dict] = {}
+        self.last_checked_block: Dict[Tuple[str, str], int] = {}
+        self.current_blocks: Dict[str, int] = {}
+
+        # position_id -> raison de sortie; l'Event réveille le monitor de la position
+        self.exit_signals: Dict[str, str] = {}
+        self._exit_events: Dict[str, asyncio.Event] = {}
+        self.event_queue = asyncio.Queue()
+        self.running = False
+
+        self.stats = {"blocks": 0, "simulations": 0, "signals": 0, "errors": 0}
+
+    # ------------------------------------------------------------------
+    # Positions détenues
+    # ------------------------------------------------------------------
+
+    def _held_positions(self) -> List[Dict]:
+        positions = {}
+        if self.engine:
+            for position_id, p in self.engine.paper_positions.items():
+                positions[position_id] = p
+        if self.auto_trader:
+            for p in self.auto_trader.get_active_positions():
+                positions[p["position_id"]] = {**positions.get(p["position_id"], {}), **p}
+        return list(positions.values())
+
+    def _interval_blocks(self, position: Dict, now: float) -> int:
+        created = position.get("token_created_at") or position.get("entry_time") \
+            or position.get("entry_timestamp") or now
+        age = now - created
+        for max_age, blocks in self.tiers:
+            if age < max_age:
+                return blocks
+        return DEFAULT_REVERIFY_BLOCKS
+
+    def get_exit_event(self, position_id: str) -> asyncio.Event:
+        """Event levé quand une sortie d'urgence est demandée pour la position"""
+        event = self._exit_events.get(position_id)
+        if event is None:
+            event = asyncio.Event()
+            if position_id in self.exit_signals:
+                event.set()
+            self._exit_events[position_id] = event
+        return event
+
+    def forget(self, position_id: str):
+        self.exit_signals.pop(position_id, None)
+        self._exit_events.pop(position_id, None)
+
+    # ------------------------------------------------------------------
+    # Boucle par chaîne
+    # ------------------------------------------------------------------
+
+    async def run(self):
+        self.running = True
+        chains = list(BLOCK_POLL_INTERVALS)
+        logger.info(f"🔁 Position re-verifier started ({', '.join(chains)})")
+        await asyncio.gather(*(self._chain_loop(chain) for chain in chains))
+
+    async def _chain_loop(self, chain: str):
+        interval = BLOCK_POLL_INTERVALS.get(chain, 2.0)
+        while self.running:
+            try:
+                # Rien de détenu sur la chaîne: pas de lecture de bloc
+                if not any(p.get("chain") == chain for p in self._held_positions()):
+                    self._prune(chain, [])
+                    await asyncio.sleep(interval)
+                    continue
+                block = await self._block_number(chain)
+                if block and block > self.current_blocks.get(chain, 0):
+                    self.current_blocks[chain] = block
+                    self.stats["blocks"] += 1
+                    await self._verify_block(chain, block)
+                await asyncio.sleep(interval)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Re-verifier error on {chain}: {e}")
+                await asyncio.sleep(interval * 2)
+
+    async def _block_number(self, chain: str) -> Optional[int]:
+        rpc_url = self.rpc_manager.get(chain)
+        if not rpc_url:
+            return None
+        resp = await self.http.post_rpc(rpc_url, json={
+            "jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber", "params": []
+        })
+        if resp.status != 200 or not isinstance(resp.data, dict) or "result" not in resp.data:
+            return None
+        return int(resp.data["result"], 16)
+
+    async def _verify_block(self, chain: str, block: int):
+        """Re-simule en un seul batch tous les tokens dus à ce bloc"""
+        now = time.time()
+        due: Dict[str, List[Dict]] = {}
+        dexes: Dict[str, Optional[str]] = {}
+        held = [p for p in self._held_positions() if p.get("chain") == chain]
+        self._prune(chain, held)
+
+        for position in held:
+            token = position["token_address"].lower()
+            key = (chain, token)
+            if block - self.last_checked_block.get(key, 0) < self._interval_blocks(position, now):
+                continue
+            due.setdefault(token, []).append(position)
+            dexes[token] = position.get("dex")
+
+        if not due:
+            return
+
+        results = await self.simulator.simulate_many(list(dexes.items()), chain, use_cache=False)
+        self.stats["simulations"] += len(due)
+
+        for token, positions in due.items():
+            key = (chain, token)
+            self.last_checked_block[key] = block
+            result = results.get(token)
+            if result is None:
+                continue
+
+            baseline = self.baselines.setdefault(key, result)
+            reason = self._exit_reason(baseline, result)
+            if reason:
+                for position in positions:
+                    self._signal(position, reason, result, block)
+
+    def _prune(self, chain: str, held: List[Dict]):
+        """Tokens revendus: on oublie leur référence"""
+        held_keys = {(chain, p["token_address"].lower()) for p in held}
+        for key in [k for k in self.baselines if k[0] == chain and k not in held_keys]:
+            self.baselines.pop(key, None)
+            self.last_checked_block.pop(key, None)
+
+    def _exit_reason(self, baseline: Dict, result: Dict) -> Optional[str]:
+        if not result.get("can_sell"):
+            return "SELL_BLOCKED"
+        if result.get("is_honeypot"):
+            return "HONEYPOT"
+        if result.get("sell_tax", 0) >= self.max_sell_tax:
+            return "SELL_TAX_SPIKE"
+        if result.get("sell_tax", 0) - baseline.get("sell_tax", 0) >= self.max_tax_increase:
+            return "SELL_TAX_SPIKE"
+        if baseline.get("transfer_ok") and not result.get("transfer_ok", True):
+            return "TRANSFER_RESTRICTED"
+        return None
+
+    def _signal(self, position: Dict, reason: str, result: Dict, block: int):
+        position_id = position["position_id"]
+        if position_id in self.exit_signals:
+            return
+
+        self.exit_signals[position_id] = reason
+        self.stats["signals"] += 1
+        if position_id in self._exit_events:
+            self._exit_events[position_id].set()
+
+        self.event_queue.put_nowait({
+            "type": "EMERGENCY_EXIT",
+            "position_id": position_id,
+            "token_address": position["token_address"],
+            "chain": position["chain"],
+            "reason": reason,
+            "sell_tax": result.get("sell_tax"),
+            "block": block,
+            "timestamp": time.time(),
+        })
+        logger.warning(f"🚨 Emergency exit signal for {position.get('symbol', position['token_address'])}: "
+                       f"{reason} (block {block})")
+
+    def stop(self):
+        self.running = False
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats["tracked_tokens"] = len(self.baselines)
+        stats["pending_signals"] = len(self.exit_signals)
+        stats["current_blocks"] = dict(self.current_blocks)
+        return stats